@@ -0,0 +1,33 @@
+import argparse
+import sys
+import time
+
+from core import analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch analysis of PGN, game archive or FEN-per-line files into JSONL.")
+    parser.add_argument("input", help="A .pgn file, a .tgame archive (data/games), or a text file with one FEN per line ('FEN moves e2e4 e7e5 ...' for a whole game).")
+    parser.add_argument("-o", "--output", default=None, help="JSONL output (defaults to <input>.analysis.jsonl).")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each with its own engine.")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (defaults to <output>.checkpoint).")
+    parser.add_argument("--depth", type=int, default=analysis.DEFAULT_SETTINGS["depth"], help="Depth limit for the built-in engine.")
+    parser.add_argument("--movetime", type=float, default=analysis.DEFAULT_SETTINGS["movetime"], help="Seconds per position.")
+    parser.add_argument("--threshold", type=int, default=analysis.BLUNDER_THRESHOLD, help="Centipawn loss that counts as a blunder.")
+    args = parser.parse_args()
+
+    output = args.output or args.input + ".analysis.jsonl"
+    settings = {"depth": args.depth, "movetime": args.movetime, "threshold": args.threshold}
+
+    start = time.perf_counter()
+    def progress(games_done: int):
+        sys.stderr.write(f"\r{games_done} games done ({time.perf_counter() - start:.1f}s)")
+        sys.stderr.flush()
+
+    games = analysis.run_analysis(args.input, output, args.workers, args.checkpoint, settings, progress)
+    sys.stderr.write("\n")
+    print(f"{games} games analyzed -> {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from core import board, parallel, perft, search
+from core.move import MOVE_NAMES, encode
+from core.position import Position
+from core.rules import arbiter
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# How long `import main` (everything up to the menu) may take, on top of the bare interpreter.
+STARTUP_BUDGET_MS = 50
+
+# Positions the search benchmark thinks about. Quiet-ish middlegames, so the numbers aren't all quiescence.
+SEARCH_FENS = [
+    perft.START_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+]
+
+
+def bench_search(workers_list: list[int], seconds: float, depth: int):
+    """
+    Same positions, same time per move, different worker counts. Scaling = nodes/sec vs the single process.
+    Workers beyond the core count can only share CPUs, so expect scaling to flatten (or drop) past it.
+    """
+    cores = os.cpu_count() or 1
+    print(f"{cores} CPU core(s). Scaling above {cores} worker(s) measures time slicing, not parallelism.\n")
+    print(f"{'WORKERS':>7} {'NODES':>10} {'NPS':>9} {'SCALING':>8} {'AVG DEPTH':>9}")
+    baseline = None
+    for workers in workers_list:
+        nodes = 0
+        total_seconds = 0.0
+        depths = 0
+        searcher = parallel.ParallelSearcher(workers) if workers > 1 else None
+        try:
+            for fen in SEARCH_FENS:
+                if searcher is None:
+                    result = search.search_position(Position.from_fen(fen), depth, seconds)
+                else:
+                    result = searcher.search(fen, depth, seconds)
+                nodes += result["nodes"]
+                total_seconds += result["seconds"]
+                depths += result["depth"]
+        finally:
+            if searcher is not None:
+                searcher.close()
+
+        nps = int(nodes / total_seconds) if total_seconds > 0 else 0
+        if baseline is None:
+            baseline = nps or 1
+        print(f"{workers:>7} {nodes:>10} {nps:>9} {nps / baseline:>7.2f}x {depths / len(SEARCH_FENS):>9.1f}")
+
+
+def get_import_times(statement: str) -> dict[str, tuple[int, int]]:
+    """
+    Runs the statement in a fresh interpreter with -X importtime and reads its report.
+
+    Returns:
+        module name -> (self microseconds, cumulative microseconds). The interpreter's own startup imports
+        (site, encodings, ...) are in there too, they are part of what the player waits for after all.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def get_wall_time(statement: str) -> float:
+    """
+    Seconds from starting the interpreter to it being done with the statement.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=BASE_DIR, check=True)
+    return time.perf_counter() - start
+
+
+def bench_startup(runs: int, top: int) -> bool:
+    """
+    How long it takes to get to the menu, and which imports that time goes to.
+    The first run is thrown away: it may have to write the bytecode and table caches.
+
+    Returns:
+        True if `import main` stayed within STARTUP_BUDGET_MS.
+    """
+    get_import_times("import main")
+    reports = [get_import_times("import main") for _ in range(runs)]
+    totals = {}
+    for report in reports:
+        for name, times in report.items():
+            totals.setdefault(name, []).append(times)
+
+    bare = statistics.median(get_wall_time("pass") for _ in range(runs))
+    wall = statistics.median(get_wall_time("import main") for _ in range(runs))
+    imports_ms = statistics.median(report["main"][1] for report in reports) / 1000
+    print(f"Interpreter alone: {bare * 1000:.1f}ms, up to the menu: {wall * 1000:.1f}ms")
+    print(f"import main: {imports_ms:.1f}ms (budget {STARTUP_BUDGET_MS}ms, median of {runs} runs)\n")
+
+    print(f"{'MODULE':<36} {'SELF MS':>8} {'CUMULATIVE MS':>14}")
+    medians = {name: (statistics.median(s for s, _ in times), statistics.median(c for _, c in times)) for name, times in totals.items()}
+    for name, (self_us, cumulative_us) in sorted(medians.items(), key=lambda item: -item[1][0])[:top]:
+        print(f"{name:<36} {self_us / 1000:>8.2f} {cumulative_us / 1000:>14.2f}")
+
+    within = imports_ms <= STARTUP_BUDGET_MS
+    if not within:
+        print(f"\nOver budget by {imports_ms - STARTUP_BUDGET_MS:.1f}ms. Something heavy got imported at the top level again?")
+    return within
+
+
+def get_random_fens(count: int, seed: int = 1) -> list[str]:
+    """
+    Positions from random games (seeded, so every run gets the same ones). Lots of checks, pins and en passants.
+    """
+    rng = random.Random(seed)
+    fens = []
+    while len(fens) < count:
+        position = Position.from_fen(rng.choice(SEARCH_FENS))
+        for _ in range(rng.randint(1, 80)):
+            moves = arbiter.generate_all_legal_moves(position)
+            if not moves or len(fens) >= count:
+                break
+            position.make_move(MOVE_NAMES[encode(*rng.choice(moves))])
+            fens.append(position.to_fen())
+    return fens
+
+
+def bench_batch(count: int, sample: int):
+    """
+    core.batch (NumPy, all positions at once) vs the arbiter (one position at a time), same positions, same answers.
+    The perft suite's root positions go first, checked against their published move counts (promotions included).
+    """
+    from core import batch, perft
+
+    roots = batch.analyze_fens([entry["fen"] for entry in perft.STANDARD_POSITIONS])["legal_moves"]
+    wrong = [entry["name"] for entry, moves in zip(perft.STANDARD_POSITIONS, roots) if moves != entry["counts"][0]]
+    print(f"perft roots: {len(roots) - len(wrong)}/{len(roots)} move counts match{' (wrong: ' + ', '.join(wrong) + ')' if wrong else ''}")
+
+    fens = get_random_fens(count)
+    start = time.perf_counter()
+    encoded = batch.encode_fens(fens)
+    encode_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    result = batch.analyze(encoded)
+    analyze_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mismatches = 0
+    for i, fen in enumerate(fens[:sample]):
+        position = Position.from_fen(fen)
+        color = position.turn
+        in_check = arbiter.is_king_in_check(position.board, color, position.king_squares[color])
+        if len(arbiter.generate_move_list(position)) != result["legal_moves"][i] or in_check != result["in_check"][i]:
+            mismatches += 1
+    arbiter_rate = min(sample, count) / (time.perf_counter() - start)
+
+    print(f"{count} positions, {int(result['in_check'].sum())} in check, {int(result['checkmate'].sum())} mates")
+    print(f"  batch encode:  {count / encode_seconds:>10.0f} positions/sec")
+    print(f"  batch analyze: {count / analyze_seconds:>10.0f} positions/sec")
+    print(f"  arbiter:       {arbiter_rate:>10.0f} positions/sec (first {min(sample, count)}, {mismatches} mismatches)")
+
+
+def get_rate(count: int, work) -> int:
+    """
+    Best of 3 runs, in items per second. Results are thrown away as we go (keeping them lets the GC eat the benchmark).
+    """
+    best = 0.0
+    for _ in range(3):
+        start = time.perf_counter()
+        work()
+        best = max(best, count / (time.perf_counter() - start))
+    return int(best)
+
+
+def bench_fen(count: int):
+    """
+    FEN parse/serialize throughput: cold parses, cache hits, and what Position does with them.
+    """
+    fens = get_random_fens(count)
+    boards = [board.create_board(fen) for fen in fens]
+    recent = fens[:board.FEN_CACHE.max_entries] # Few enough to all stay in the cache
+    positions = [Position.from_fen(fen) for fen in recent]
+
+    def parse_cold():
+        for fen in fens:
+            board.ParsedFEN(fen)
+
+    def parse_cached():
+        for fen in recent:
+            board.parse_fen(fen)
+
+    def from_fen():
+        for fen in fens:
+            Position.from_fen(fen)
+
+    def serialize():
+        for rows in boards:
+            board.change_board_to_fen(rows)
+
+    def to_fen():
+        for position in positions:
+            position.to_fen()
+
+    print(f"{count} positions (rates in FENs/sec, best of 3)")
+    print(f"  parse, uncached:        {get_rate(count, parse_cold):>9}")
+    print(f"  parse, cached:          {get_rate(len(recent), parse_cached):>9}")
+    print(f"  Position.from_fen:      {get_rate(count, from_fen):>9}")
+    print(f"  change_board_to_fen:    {get_rate(count, serialize):>9}")
+    print(f"  Position.to_fen:        {get_rate(len(positions), to_fen):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for tchess.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = commands.add_parser("search", help="How search throughput scales with worker processes.")
+    search_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to try.")
+    search_parser.add_argument("--seconds", type=float, default=2.0, help="Time per position.")
+    search_parser.add_argument("--depth", type=int, default=64, help="Depth limit (the clock usually stops it first).")
+
+    startup_parser = commands.add_parser("startup", help="Time to the menu, and the slowest imports on the way.")
+    startup_parser.add_argument("--runs", type=int, default=5, help="Runs to take the median of.")
+    startup_parser.add_argument("--top", type=int, default=15, help="How many modules to list.")
+
+    batch_parser = commands.add_parser("batch", help="NumPy batch legality checks (core.batch) vs the arbiter.")
+    batch_parser.add_argument("--positions", type=int, default=50000, help="How many random positions.")
+    batch_parser.add_argument("--sample", type=int, default=5000, help="How many of them the arbiter checks too.")
+
+    fen_parser = commands.add_parser("fen", help="FEN parse/serialize throughput.")
+    fen_parser.add_argument("--positions", type=int, default=20000, help="How many random positions.")
+
+    args = parser.parse_args()
+    if args.command == "search":
+        bench_search(args.workers, args.seconds, args.depth)
+    elif args.command == "batch":
+        bench_batch(args.positions, args.sample)
+    elif args.command == "fen":
+        bench_fen(args.positions)
+    elif args.command == "startup":
+        if not bench_startup(args.runs, args.top):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
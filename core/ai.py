@@ -1,5 +1,30 @@
 import subprocess
 import os
+import threading
+import atexit
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core import search, book, bitbases, profiler
+from core.position import Position
+from core.rules import arbiter
+from core.utils import change_notations
+
+# Difficulty Configuration
+# We limit the engine using 'Skill Level' (0-20) and 'movetime' (ms)
+# Level 1: Skill 0, Depth 1 (Basically random valid moves)
+# Level 2: Skill 5, Depth 5
+# Level 3: Skill 10, 1000ms
+# Level 4: Skill 20, 2000ms
+SKILL_MAP = {1: 0, 2: 5, 3: 10, 4: 20}
+MOVETIME_MAP = {1: 100, 2: 500, 3: 1000, 4: 2000}
+DEPTH_MAP = {1: 1, 2: 5, 3: 10, 4: 15}
+
+
+class EngineError(Exception):
+    """
+    The engine died or stopped talking to us.
+    """
+
 
 def get_binary_path() -> str:
     """
@@ -23,89 +48,512 @@ def send_command(process: subprocess.Popen, cmd: str):
         process.stdin.flush()
 
 
+def get_go_command(difficulty: int) -> str:
+    """
+    The 'go' line for a difficulty level.
+    """
+    if difficulty <= 2:
+        # For low levels, limit depth so it plays bad on purpose
+        return f"go depth {DEPTH_MAP.get(difficulty, 1)}"
+    # For high levels, give it time to think
+    return f"go movetime {MOVETIME_MAP.get(difficulty, 1000)}"
+
+
+def normalize_move(fen: str, move: str) -> str:
+    """
+    A human's move, written the way the engine writes it: lowercase, and a promotion without a piece
+    gets the Queen that Position.make_move gives it (e7e8 -> e7e8q).
+
+    Args:
+        fen: The position the move was played in.
+        move: Whatever main.py accepted ('E7E8', 'e7e8', 'e7e8N'...).
+    """
+    move = move.lower()
+    if len(move) == 4 and move[3] in "18":
+        row, col = change_notations(move[0:2])
+        if Position.from_fen(fen).board[row][col] in "Pp":
+            move += "q"
+    return move
+
+
+class EngineSession:
+    """
+    One long-lived Stockfish process.
+
+    Logic:
+        Spawning Stockfish and doing the 'uci'/'isready' handshake costs way more than a depth 1 search.
+        So we do it once, keep the pipes open, and reuse the process (and its hash table) for every move.
+        If the process dies, the next request starts a fresh one.
+
+        Pondering: Stockfish tells us which reply it expects ('bestmove e7e5 ponder g1f3').
+        While the human thinks, we let it search that reply ('go ponder'). If the human plays it,
+        'ponderhit' turns the ponder search into the real one and the answer is usually already there.
+        If not, 'stop' throws the ponder search away and we search normally.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or get_binary_path()
+        self.process: subprocess.Popen | None = None
+        self.skill: int | None = None
+        self.threads = 1 # What we want
+        self.applied_threads: int | None = None # What the engine was told
+        self.lock = threading.Lock() # One conversation with the engine at a time
+        self.executor: ThreadPoolExecutor | None = None
+        self.ponder_move: str | None = None # The reply the engine expects to its last move
+        self.pondering: tuple[str, str] | None = None # (fen, guessed move) while a ponder search runs
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def read_line(self) -> str:
+        """
+        Reads one line from the engine. An empty read means the pipe is closed, which means it died.
+        """
+        line = self.process.stdout.readline()
+        if line == "":
+            raise EngineError("Engine process exited unexpectedly.")
+        return line.strip()
+
+    def wait_for(self, expected: str) -> str:
+        """
+        Reads lines until one starts with expected, and returns that line.
+        """
+        while True:
+            line = self.read_line()
+            if line.startswith(expected):
+                return line
+
+    def start(self):
+        """
+        Spawns the engine and does the handshake. Kills any previous process first.
+        """
+        if not os.path.exists(self.path):
+            # If the binary is missing, we can't really do anything.
+            raise FileNotFoundError(f"Stockfish binary not found at {self.path}")
+
+        self.close()
+        self.pondering = None
+        self.ponder_move = None
+        # We open pipes to stdin (to talk to it) and stdout (to listen to it).
+        with profiler.timed("engine_spawn"):
+            self.process = subprocess.Popen(
+                self.path,
+                text=True, # To actually get text from the output
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT
+            )
+        self.skill = None
+        self.applied_threads = None
+
+        # 'uci' tells the engine to wake up. Stockfish recommends it.
+        with profiler.timed("engine_handshake"):
+            send_command(self.process, "uci")
+            self.wait_for("uciok")
+            send_command(self.process, "setoption name Ponder value true")
+            send_command(self.process, "isready")
+            self.wait_for("readyok")
+
+    def ensure_started(self):
+        """
+        Starts the engine if it isn't running (first use, or it crashed since).
+        """
+        if not self.is_alive():
+            self.start()
+
+    def set_difficulty(self, difficulty: int):
+        """
+        Only talks to the engine if the skill level actually changed.
+        """
+        skill = SKILL_MAP.get(difficulty, 10)
+        if skill == self.skill:
+            return
+        send_command(self.process, f"setoption name Skill Level value {skill}")
+        send_command(self.process, "isready")
+        self.wait_for("readyok")
+        self.skill = skill
+
+    def apply_threads(self):
+        """
+        Same idea as set_difficulty, for the Threads option (the worker count from the menu).
+        """
+        if self.threads == self.applied_threads:
+            return
+        send_command(self.process, f"setoption name Threads value {self.threads}")
+        send_command(self.process, "isready")
+        self.wait_for("readyok")
+        self.applied_threads = self.threads
+
+    def new_game(self):
+        """
+        Tells the engine a new game started, so it doesn't trust hash entries from the last one.
+        """
+        with self.lock:
+            if self.is_alive():
+                send_command(self.process, "ucinewgame")
+                send_command(self.process, "isready")
+                self.wait_for("readyok")
+
+    def read_best_move(self) -> str | None:
+        """
+        Waits for the 'bestmove e2e4 ponder e7e5' line. Remembers the ponder part for later.
+        """
+        parts = self.wait_for("bestmove").split()
+        self.ponder_move = parts[3] if len(parts) >= 4 and parts[2] == "ponder" else None
+        return parts[1]
+
+    def search(self, fen: str, difficulty: int) -> str | None:
+        self.ensure_started()
+        self.set_difficulty(difficulty)
+        self.apply_threads()
+        with profiler.timed("engine_search"):
+            send_command(self.process, f"position fen {fen}")
+            send_command(self.process, get_go_command(difficulty))
+            # The engine eventually prints 'bestmove e2e4 ponder ...'
+            return self.read_best_move()
+
+    def evaluate(self, fen: str, go_command: str = "go depth 12") -> dict:
+        """
+        Full strength analysis of one position, for tools (core.analysis) rather than for playing.
+
+        Args:
+            fen: The position.
+            go_command: How long to think, e.g. 'go depth 12' or 'go movetime 200'.
+        Returns:
+            {'move': best move, 'score': centipawns from the side to move's point of view}.
+            Mates come out as +-(search.MATE_SCORE - moves to mate), same scale as the built-in engine.
+        """
+        with self.lock:
+            self.ensure_started()
+            self.set_difficulty(4) # Skill 20, no handicaps
+            send_command(self.process, f"position fen {fen}")
+            send_command(self.process, go_command)
+            score = 0
+            while True:
+                parts = self.read_line().split()
+                if not parts:
+                    continue
+                if parts[0] == "bestmove":
+                    move = parts[1] if len(parts) > 1 and parts[1] != "(none)" else None
+                    return {"move": move, "score": score}
+                if parts[0] == "info" and "score" in parts:
+                    i = parts.index("score")
+                    kind, value = parts[i + 1], int(parts[i + 2])
+                    if kind == "cp":
+                        score = value
+                    elif kind == "mate":
+                        score = search.MATE_SCORE - value if value > 0 else -search.MATE_SCORE - value
+
+    def start_ponder(self, fen: str, difficulty: int) -> bool:
+        """
+        Starts searching the expected reply in the background. Returns immediately.
+
+        Args:
+            fen: The position right after the engine's own move (the human is to move).
+            difficulty: Same level as the real search, so a ponderhit plays the same strength.
+        Returns:
+            True if a ponder search was started.
+        """
+        with self.lock:
+            if self.pondering or not self.ponder_move or not self.is_alive():
+                return False
+            self.set_difficulty(difficulty)
+            send_command(self.process, f"position fen {fen} moves {self.ponder_move}")
+            send_command(self.process, "go ponder " + get_go_command(difficulty)[3:])
+            self.pondering = (fen, self.ponder_move)
+            return True
+
+    def discard_ponder(self):
+        """
+        Stops a running ponder search and throws its result away. Caller holds the lock.
+        """
+        if self.pondering is None:
+            return
+        self.pondering = None
+        send_command(self.process, "stop")
+        self.wait_for("bestmove")
+
+    def stop_ponder(self):
+        with self.lock:
+            try:
+                self.discard_ponder()
+            except EngineError:
+                pass # It died while pondering. The next search restarts it anyway.
+
+    def resolve_move(self, fen: str, difficulty: int, played_move: str | None = None) -> str | None:
+        """
+        Gets the engine's move, cashing in the ponder search if the human played the expected move.
+
+        Args:
+            fen: The current position (engine to move).
+            difficulty: 1 to 4.
+            played_move: The human's move that led to fen, if we know it.
+        """
+        with self.lock:
+            try:
+                if self.pondering and played_move and normalize_move(self.pondering[0], played_move) == self.pondering[1]:
+                    self.pondering = None
+                    send_command(self.process, "ponderhit")
+                    return self.read_best_move()
+                self.discard_ponder()
+            except (EngineError, BrokenPipeError):
+                self.pondering = None # Fall through to a normal search, which restarts the engine
+        return self.get_best_move(fen, difficulty)
+
+    def search_async(self, fen: str, difficulty: int, played_move: str | None = None) -> Future:
+        """
+        Same as resolve_move, but on a background thread. Returns a Future with the move string.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        return self.executor.submit(self.resolve_move, fen, difficulty, played_move)
+
+    def get_best_move(self, fen: str, difficulty: int = 1) -> str | None:
+        """
+        Asks the running engine for a move. If it died, it gets restarted and asked once more.
+        A ponder search still running (nobody went through resolve_move, e.g. main.py --profile) gets stopped first,
+        otherwise its 'bestmove' would answer our 'go'.
+        """
+        with self.lock:
+            try:
+                self.discard_ponder()
+                return self.search(fen, difficulty)
+            except (EngineError, BrokenPipeError):
+                self.start()
+                return self.search(fen, difficulty)
+
+    def close(self):
+        """
+        We don't want orphan chess engines eating RAM.
+        """
+        if self.process is None:
+            return
+        try:
+            if self.pondering:
+                send_command(self.process, "stop")
+            self.pondering = None
+            send_command(self.process, "quit")
+            self.process.wait(timeout=1)
+        except (subprocess.TimeoutExpired, BrokenPipeError, OSError):
+            self.process.terminate()
+        self.process = None
+
+
+_default_session: EngineSession | None = None
+_default_lock = threading.Lock()
+
+
+def get_session() -> EngineSession:
+    """
+    The engine session the game uses. Created on first use, shared afterwards.
+    """
+    global _default_session
+    with _default_lock:
+        if _default_session is None:
+            _default_session = EngineSession()
+            atexit.register(_default_session.close)
+        return _default_session
+
+
+def warm_up() -> threading.Thread:
+    """
+    Starts the default engine in a background thread, so the spawn and handshake
+    happen while the player is still staring at the menu. Missing binary? Then nothing happens here,
+    get_best_move falls back to the built-in engine later.
+    """
+    def _start():
+        session = get_session()
+        try:
+            with session.lock:
+                session.ensure_started()
+        except (FileNotFoundError, EngineError, OSError):
+            pass
+
+    thread = threading.Thread(target=_start, daemon=True)
+    thread.start()
+    return thread
+
+
+def close_session():
+    """
+    Shuts the default engine down, if it was ever started. For when warm_up guessed wrong (main.py, PvP).
+    """
+    if _default_session is None:
+        return
+    with _default_session.lock:
+        _default_session.close()
+
+
+def new_game():
+    """
+    Call before every game. A running Stockfish gets 'ucinewgame' and forgets the last game's hash.
+    The built-in engine starts every search from scratch anyway.
+    """
+    if _default_session is not None:
+        _default_session.new_game()
+
+
+_native_executor: ThreadPoolExecutor | None = None
+_workers = 1
+_parallel_searcher = None # A core.parallel.ParallelSearcher, once more than one core is allowed
+
+
+def has_stockfish() -> bool:
+    return os.path.exists(get_session().path)
+
+
+def get_native_executor() -> ThreadPoolExecutor:
+    """
+    A background thread for the built-in engine, so the spinner keeps spinning without Stockfish too.
+    """
+    global _native_executor
+    with _default_lock:
+        if _native_executor is None:
+            _native_executor = ThreadPoolExecutor(max_workers=1)
+        return _native_executor
+
+
+def set_workers(workers: int):
+    """
+    How many cores the AI may use. Stockfish gets it as its Threads option,
+    the built-in engine as the number of core.parallel worker processes.
+    """
+    global _workers
+    _workers = max(1, workers)
+    get_session().threads = _workers
+
+
+def get_parallel_searcher():
+    """
+    The worker pool for the built-in engine. core.parallel (and multiprocessing with it) is only
+    imported here: single core games never pay for it at startup.
+    """
+    from core import parallel
+
+    global _parallel_searcher
+    with _default_lock:
+        if _parallel_searcher is None or _parallel_searcher.workers != _workers:
+            if _parallel_searcher is not None:
+                _parallel_searcher.close()
+            else:
+                atexit.register(close_parallel_searcher)
+            _parallel_searcher = parallel.ParallelSearcher(_workers)
+        return _parallel_searcher
+
+
+def close_parallel_searcher():
+    global _parallel_searcher
+    if _parallel_searcher is not None:
+        _parallel_searcher.close()
+        _parallel_searcher = None
+
+
+def get_native_move(fen: str, difficulty: int = 1) -> str | None:
+    """
+    The built-in engine, on one core or on all the ones set_workers allowed.
+    """
+    if _workers <= 1:
+        with profiler.timed("native_search"):
+            return search.get_best_move(fen, difficulty)
+
+    with profiler.timed("native_search"):
+        result = get_parallel_searcher().search(fen, search.DEPTH_LIMITS.get(difficulty, 2), search.TIME_LIMITS.get(difficulty, 1.0))
+    search.LAST_RESULT.clear()
+    search.LAST_RESULT.update(result)
+    return result["move"]
+
+
+def get_instant_move(fen: str, difficulty: int) -> str | None:
+    """
+    Checks the opening book and the endgame tables before bothering any engine. Microseconds instead of a search.
+    """
+    search.LAST_RESULT.clear() # Whoever answers this move refills it
+    with profiler.timed("book_and_tables"):
+        position = Position.from_fen(fen)
+        move = book.get_book_move(fen, difficulty)
+        source = "book"
+        if move is None:
+            move = bitbases.get_best_move(position)
+            source = "tablebase"
+        # A book is just a file somebody gave us (and a hash collision is a thing), so it gets no free pass.
+        # Neither do the tables. Same check tournament.py runs on every engine move.
+        if move is not None and move[:4] not in arbiter.get_legal_move_names(position):
+            move = None
+    if move is None:
+        return None
+    if _default_session is not None:
+        _default_session.stop_ponder()
+        _default_session.ponder_move = None # Its ponder guess was for some older position
+    search.LAST_RESULT.update({"move": move, source: True})
+    return move
+
+
 def get_best_move(fen: str, difficulty: int = 1) -> str | None:
     """
-    This function spins up a Stockfish process, feeds it the current board state (FEN),
-    drugs it based on the difficulty level (by limiting its thinking time), 
+    Feeds the current board state (FEN) to the shared Stockfish session,
+    drugs it based on the difficulty level (by limiting its thinking time),
     and extracts the best move it can find.
-    
+    Positions in the opening book (data/book.bin) or the endgame tables (data/endgames) don't even get that far.
+    No Stockfish binary? Then the built-in engine (core.search) plays instead.
+
     Args:
         fen: The current board state string.
         difficulty: 1 (Monkey) to 4 (Grandmaster).
-        
+
     Returns:
         A move string like 'e2e4', or None if the engine crashes/fails. I hope it doesn't.
     """
-    path = get_binary_path()
-    
-    if not os.path.exists(path):
-        # If the binary is missing, we can't really do anything.
-        raise FileNotFoundError(f"Stockfish binary not found at {path}")
-
-    # Start the Engine Process
-    # We open pipes to stdin (to talk to it) and stdout (to listen to it).
-    process = subprocess.Popen(
-        path,
-        text=True, # To actually get text from the output
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT
-    )
+    move = get_instant_move(fen, difficulty)
+    if move is not None:
+        return move
 
-    try:
-        # Configure the Engine
-        # 'uci' tells the engine to wake up. Stockfish recommends it.
-        send_command(process, "uci")
-        
-        # Difficulty Configuration
-        # We limit the engine using 'Skill Level' (0-20) and 'movetime' (ms)
-        # Level 1: Skill 0, Depth 1 (Basically random valid moves)
-        # Level 2: Skill 5, Depth 5
-        # Level 3: Skill 10, 1000ms
-        # Level 4: Skill 20, 2000ms
-        
-        skill_map = {1: 0, 2: 5, 3: 10, 4: 20}
-        movetime_map = {1: 100, 2: 500, 3: 1000, 4: 2000}
-        depth_map = {1: 1, 2: 5, 3: 10, 4: 15}
-        
-        skill = skill_map.get(difficulty, 10)
-        send_command(process, f"setoption name Skill Level value {skill}")
-        send_command(process, "isready")
-        
-        # Wait for the engine to finish loading (it usually replies 'readyok')
-        while True:
-            line = process.stdout.readline().strip()
-            if line == "readyok": break
-
-        # Send the Board
-        send_command(process, f"position fen {fen}")
-        
-        # Ask for the Move
-        if difficulty <= 2:
-            # For low levels, limit depth so it plays bad on purpose
-            send_command(process, f"go depth {depth_map[difficulty]}")
-        else:
-            # For high levels, give it time to think
-            send_command(process, f"go movetime {movetime_map[difficulty]}")
-
-        # Read the Result
-        best_move = None
-        while True:
-            line = process.stdout.readline().strip()
-            # The engine eventually prints 'bestmove e2e4 ponder ...'
-            if line.startswith("bestmove"):
-                best_move = line.split()[1]
-                break
-                
-        return best_move
+    if not has_stockfish():
+        # Worse than Stockfish, but way better than an error message
+        return get_native_move(fen, difficulty)
 
+    try:
+        return get_session().get_best_move(fen, difficulty)
     except Exception as e:
         # Something went wrong. Hopefully it won't.
         print(f"Engine Error: {e}")
         return None
-        
-    finally:
-        # Cleanup
-        # We don't want orphan chess engines eating RAM.
-        process.terminate()
 
+
+def get_best_move_async(fen: str, difficulty: int = 1, played_move: str | None = None) -> Future:
+    """
+    Non-blocking get_best_move. The UI can keep drawing while the engine thinks.
+
+    Args:
+        fen: The current board state string.
+        difficulty: 1 (Monkey) to 4 (Grandmaster).
+        played_move: The human move that led to this position. If the engine was pondering on it, we get a ponderhit.
+    Returns:
+        A Future that resolves to a move string like 'e2e4'. Engine errors come out of future.result().
+    """
+    move = get_instant_move(fen, difficulty)
+    if move is not None:
+        future: Future = Future()
+        future.set_result(move)
+        return future
+
+    if not has_stockfish():
+        return get_native_executor().submit(get_native_move, fen, difficulty)
+
+    return get_session().search_async(fen, difficulty, played_move)
+
+
+def start_pondering(fen: str, difficulty: int = 1) -> bool:
+    """
+    Lets the engine think on the human's time. Call right after the engine's move was played.
+    """
+    session = get_session()
+    if not session.is_alive():
+        return False
+    return session.start_ponder(fen, difficulty)
+
+
+def stop_pondering():
+    """
+    Throws away a running ponder search (undo, quit...).
+    """
+    get_session().stop_ponder()
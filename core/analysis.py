@@ -0,0 +1,224 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from core import ai, pgn, search, storage
+from core.position import Position
+from core.rules import arbiter
+
+# Offline analysis of lots of games: stream them in, evaluate every position, stream JSONL out.
+#
+# Input: a .pgn file, a .tgame archive (core.storage, one game), or a text file with one FEN per line
+# (a game is "FEN moves e2e4 e7e5 ...", UCI style).
+# Output: one JSON object per line. For games, one per move:
+#   {"game", "ply", "move", "fen" (before the move), "eval" (white's point of view, before),
+#    "best", "eval_after", "loss" (centipawns the mover threw away), "blunder"}
+# For bare FEN lines, one per position: {"game", "fen", "eval", "best"}.
+# A game that doesn't replay (illegal move in the file) gets a single {"game", "error"} line.
+
+BLUNDER_THRESHOLD = 200 # Centipawns. Losing two pawns' worth in one move is a blunder by anyone's standards
+DEFAULT_SETTINGS = {"depth": 3, "movetime": 0.2, "threshold": BLUNDER_THRESHOLD}
+
+# One engine per worker process, started by _init_worker
+_worker_engine: ai.EngineSession | None = None
+
+
+def iter_jobs(path: str):
+    """
+    Streams the input file as (game number, game) pairs. Never reads more than one game ahead.
+    PGN games come from pgn.read_games. A FEN line is {'fen': ..., 'uci': [moves]}, 'uci' is empty for a bare FEN.
+    A .tgame archive is one game in the same shape, read straight out of the memory map.
+    """
+    if path.lower().endswith(".tgame"):
+        with storage.GameArchive(path) as archive:
+            game = {"fen": archive.fen_at(0), "uci": archive.get_moves()}
+        yield 0, game
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith(".pgn"):
+            yield from enumerate(pgn.read_games(f))
+            return
+        index = 0
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                fen, _, moves = line.partition(" moves ")
+                yield index, {"fen": fen.strip(), "uci": moves.split()}
+                index += 1
+
+
+def iter_plies(game: dict):
+    """
+    Replays a game, checking every move against the arbiter's legal moves. PGN games go through pgn.iter_positions.
+
+    Yields:
+        (position, move): the position BEFORE the move (shared and mutated, copy it if you keep it) and the move.
+        Raises ValueError at the first move that isn't legal.
+    """
+    if "uci" not in game:
+        yield from pgn.iter_positions(game)
+        return
+    position = Position.from_fen(game["fen"])
+    for move in game["uci"]:
+        if move[:4] not in arbiter.get_legal_move_names(position):
+            raise ValueError(f"Illegal move '{move}' in {position.to_fen()}")
+        yield position, move
+        position.make_move(move)
+
+
+def _init_worker():
+    """
+    Every worker process gets its own Stockfish session (if there is a Stockfish), warm for the whole run.
+    """
+    global _worker_engine
+    if ai.has_stockfish():
+        _worker_engine = ai.EngineSession()
+
+
+def evaluate_position(position: Position, settings: dict) -> tuple[int, str | None]:
+    """
+    Evaluates one position with whatever engine this process has.
+
+    Returns:
+        (score in centipawns from the side to move's point of view, best move or None)
+    """
+    report = arbiter.analyze_position(position)
+    if report["state"] == "CHECKMATE":
+        return -search.MATE_SCORE, None
+    if report["state"] in arbiter.DRAW_STATES:
+        return 0, None
+
+    if _worker_engine is not None:
+        result = _worker_engine.evaluate(position.to_fen(), f"go movetime {int(settings['movetime'] * 1000)}")
+    else:
+        result = search.search_position(position, settings["depth"], settings["movetime"])
+    return result["score"], result["move"]
+
+
+def analyze_game(index: int, game: dict, settings: dict) -> list[dict]:
+    """
+    Everything for one game (or one FEN line). Runs in a worker process.
+
+    Logic:
+        Every position gets evaluated exactly once, then each move is judged by comparing the position
+        before it with the one after: what the mover could have had vs what they got.
+    """
+    if "uci" in game and not game["uci"]:
+        position = Position.from_fen(game["fen"])
+        score, best = evaluate_position(position, settings)
+        white_score = score if position.turn == 'w' else -score
+        return [{"game": index, "fen": game["fen"], "eval": white_score, "best": best}]
+
+    try:
+        # Replay first so a broken game fails before we spend engine time on it
+        plies = [(position.to_fen(), move) for position, move in iter_plies(game)]
+    except ValueError as e:
+        return [{"game": index, "error": str(e)}]
+
+    fens = [fen for fen, _ in plies]
+    if plies:
+        final = Position.from_fen(plies[-1][0])
+        final.make_move(plies[-1][1])
+        fens.append(final.to_fen())
+    else:
+        fens.append(game["fen"] if "uci" in game else pgn.get_start_fen(game))
+
+    # (score for the side to move, best move, side to move) for every position
+    evaluations = []
+    for fen in fens:
+        position = Position.from_fen(fen)
+        score, best = evaluate_position(position, settings)
+        evaluations.append((score, best, position.turn))
+
+    records = []
+    for ply, (fen, move) in enumerate(plies):
+        score, best, turn = evaluations[ply]
+        after = -evaluations[ply + 1][0] # Same point of view as 'score' (the mover's)
+        loss = max(score - after, 0)
+        sign = 1 if turn == 'w' else -1
+        records.append({
+            "game": index,
+            "ply": ply + 1,
+            "move": move,
+            "fen": fen,
+            "eval": sign * score,
+            "best": best,
+            "eval_after": sign * after,
+            "loss": loss,
+            "blunder": loss >= settings["threshold"],
+        })
+    return records
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"games_done": 0, "output_bytes": 0}
+
+
+def save_checkpoint(path: str, games_done: int, output_bytes: int):
+    """
+    Written to a temp file and renamed over the old one, so a crash mid-write never leaves half a checkpoint.
+    """
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump({"games_done": games_done, "output_bytes": output_bytes}, f)
+    os.replace(temp, path)
+
+
+def run_analysis(input_path: str, output_path: str, workers: int = 1, checkpoint_path: str | None = None, settings: dict | None = None, progress=None) -> int:
+    """
+    Analyzes a whole file, in parallel, resumably.
+
+    Process:
+    1. Read the checkpoint (if any): how many games are done and how long the output was at that point.
+       Cut the output back to that length (anything after it is from games that didn't finish) and skip those games.
+    2. Feed games to a process pool, but never more than 2 per worker at once, so memory stays flat
+       no matter how big the input is.
+    3. Write results in input order as they complete, then move the checkpoint forward.
+
+    Args:
+        input_path: A .pgn file or a FEN-per-line file (see the top of this file).
+        output_path: Where the JSONL goes (appended to when resuming).
+        workers: Worker processes, each with its own engine.
+        checkpoint_path: Defaults to output_path + '.checkpoint'.
+        settings: Overrides for DEFAULT_SETTINGS ('depth', 'movetime' in seconds, 'threshold').
+        progress: Optional callback, called with the number of finished games.
+    Returns:
+        The number of games done (including the ones from before a resume).
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    checkpoint = load_checkpoint(checkpoint_path)
+    games_done = checkpoint["games_done"]
+
+    output = open(output_path, "a+b")
+    output.truncate(checkpoint["output_bytes"] if games_done else 0)
+    output.seek(0, os.SEEK_END)
+
+    window: deque = deque()
+    with output, ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker) as pool:
+        def write_oldest():
+            nonlocal games_done
+            records = window.popleft().result()
+            output.write("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+            output.flush()
+            games_done += 1
+            save_checkpoint(checkpoint_path, games_done, output.tell())
+            if progress:
+                progress(games_done)
+
+        for index, game in iter_jobs(input_path):
+            if index < checkpoint["games_done"]:
+                continue
+            window.append(pool.submit(analyze_game, index, game, settings))
+            if len(window) >= max(1, workers) * 2:
+                write_oldest()
+        while window:
+            write_oldest()
+
+    return games_done
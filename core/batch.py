@@ -0,0 +1,366 @@
+try:
+    import numpy as np
+except ImportError: # Optional. Only this module needs it, the game itself never imports it.
+    np = None
+
+from core.rules.tables import KNIGHT_OFFSETS, KING_OFFSETS, STRAIGHT_DIRECTIONS, DIAGONAL_DIRECTIONS
+
+# Legality checks and legal move counts for whole arrays of positions at once, for dataset validation.
+# core.rules walks the squares of ONE board in Python. Here every step is a NumPy operation over ALL the boards:
+# "shift every knight of every board one jump to the upper left" is one array operation, whatever N is.
+#
+# Boards are N x 8 x 8 int8 arrays, indexed [board][row][col] like core.board's lists (row 0 = rank 8).
+# 0 = empty, 1-6 = P N B R Q K for White, negative for Black.
+# Inside, every piece type becomes one uint64 per board (bit row * 8 + col), so a step for every piece on every board
+# is a shift over an N long array. Way less memory to push around than N x 8 x 8 bools.
+#
+# The counts match arbiter.generate_move_list: a pawn reaching the last rank is four moves (Q, R, B, N).
+
+EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(7)
+PIECE_CODES = {"+": EMPTY, "P": PAWN, "N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING,
+               "p": -PAWN, "n": -KNIGHT, "b": -BISHOP, "r": -ROOK, "q": -QUEEN, "k": -KING}
+# FEN placement -> 64 chars: digits become that many '+', slashes go away
+FEN_EXPAND = str.maketrans({**{str(n): "+" * n for n in range(1, 9)}, "/": None})
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("core.batch needs NumPy (pip install numpy).")
+
+
+def get_code_table():
+    """
+    Byte -> piece code. Anything that isn't a piece letter or '+' maps to 127, so bad input can be caught.
+    """
+    table = np.full(256, 127, dtype=np.int8)
+    for char, code in PIECE_CODES.items():
+        table[ord(char)] = code
+    return table
+
+
+def decode_squares(squares: str, count: int):
+    """
+    count * 64 characters of '+'/piece letters -> count x 8 x 8 int8.
+    """
+    if len(squares) != count * 64:
+        raise ValueError("Every board needs exactly 64 squares.")
+    boards = get_code_table()[np.frombuffer(squares.encode("ascii"), dtype=np.uint8)]
+    if (boards == 127).any():
+        raise ValueError("Unknown piece letter.")
+    return boards.reshape(count, 8, 8)
+
+
+def encode_boards(boards: list[list[list[str]]]):
+    """
+    core.board.create_board output (a list of them) -> N x 8 x 8 int8.
+    """
+    require_numpy()
+    return decode_squares("".join("".join(row) for board in boards for row in board), len(boards))
+
+
+def encode_fens(fens: list[str]) -> dict:
+    """
+    Parses a list of FENs straight into arrays. No Position, no board lists.
+
+    Returns:
+        A batch: 'boards' (N x 8 x 8 int8), 'white' (N bool, White to move),
+        'castling' (N x 4 bool, K Q k q), 'en_passant' (N int8 column of the en passant target, -1 if none).
+    """
+    require_numpy()
+    fields = [fen.split() for fen in fens]
+    try:
+        boards = decode_squares("".join(parts[0].translate(FEN_EXPAND) for parts in fields), len(fens))
+    except ValueError as e:
+        bad = next((fen for fen, parts in zip(fens, fields) if len(parts[0].translate(FEN_EXPAND)) != 64), None)
+        raise ValueError(f"Bad FEN placement: {bad!r}" if bad else str(e)) from None
+
+    return {
+        "boards": boards,
+        "white": np.array([parts[1] == "w" for parts in fields], dtype=bool),
+        "castling": np.array([[right in parts[2] for right in "KQkq"] for parts in fields], dtype=bool).reshape(len(fens), 4),
+        "en_passant": np.array([ord(parts[3][0]) - 97 if parts[3] != "-" else -1 for parts in fields], dtype=np.int8),
+    }
+
+
+def get_popcount_table():
+    return np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def popcount(bitboards):
+    """
+    Set bits per board. NumPy 2 does it in one instruction, older ones go through a byte table.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bitboards).astype(np.int64)
+    return get_popcount_table()[bitboards.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int64)
+
+
+def to_bitboards(boards) -> dict:
+    """
+    N x 8 x 8 codes -> piece code -> N uint64, bit (row * 8 + col) set where that piece stands.
+    """
+    flat = boards.reshape(len(boards), 64)
+    return {code: np.packbits(flat == code, axis=1, bitorder="little").view("<u8").reshape(-1).astype(np.uint64)
+            for code in PIECE_CODES.values() if code != EMPTY}
+
+
+def to_masks(bitboards):
+    """
+    N uint64 -> N x 8 x 8 bool. The other way around from to_bitboards.
+    """
+    return np.unpackbits(bitboards.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little").reshape(-1, 8, 8).astype(bool)
+
+
+# COLUMN_MASKS[col]: every square of that column
+COLUMN_MASKS = [sum(1 << (row * 8 + col) for row in range(8)) for col in range(8)]
+FULL = (1 << 64) - 1
+
+
+def get_shift_mask(dc: int) -> int:
+    """
+    After moving dc columns, the columns that can only have come from wrapping around the edge get cleared.
+    """
+    wrapped = range(dc) if dc > 0 else range(8 + dc, 8)
+    return FULL & ~sum(COLUMN_MASKS[col] for col in wrapped)
+
+
+# (dr, dc) -> (bits to shift, left?, mask after). Built once, shift() is on every hot line below.
+SHIFTS = {(dr, dc): (np.uint64(abs(8 * dr + dc)), 8 * dr + dc > 0, np.uint64(get_shift_mask(dc)))
+          for dr in range(-2, 3) for dc in range(-2, 3)} if np is not None else {}
+
+
+def shift(bitboards, dr: int, dc: int):
+    """
+    Moves every piece of every board by (dr, dc). Whatever falls off the edge is gone.
+    One shift = one step for every piece on every board.
+    """
+    amount, left, mask = SHIFTS[(dr, dc)]
+    return ((bitboards << amount) if left else (bitboards >> amount)) & mask
+
+
+def get_axis(direction: tuple[int, int]) -> int:
+    """
+    The line a direction runs along: 0 vertical, 1 horizontal, 2 and 3 the diagonals. A pinned piece can only move along its pin's line.
+    """
+    dr, dc = direction
+    if dc == 0:
+        return 0
+    if dr == 0:
+        return 1
+    return 2 if dr == dc else 3
+
+
+def normalize(batch: dict) -> tuple:
+    """
+    Turns every board so the side to move is White (positive) and pushes its pawns up (towards row 0).
+    Black to move: flip the rows and negate. Then one set of rules covers every board.
+
+    Returns:
+        (boards, our kingside right, our queenside right, en passant column)
+    """
+    white = batch["white"]
+    boards = np.where(white[:, None, None], batch["boards"], -batch["boards"][:, ::-1, :])
+    castling = batch["castling"]
+    king_side = np.where(white, castling[:, 0], castling[:, 2])
+    queen_side = np.where(white, castling[:, 1], castling[:, 3])
+    return boards, king_side, queen_side, batch["en_passant"]
+
+
+def get_enemy_attacks(pieces: dict, empty):
+    """
+    Every square the negative side attacks, on normalized bitboards (its pawns capture downwards).
+
+    Args:
+        pieces: From to_bitboards.
+        empty: What counts as empty for the sliders. Pass the real empties plus our King to see through him.
+    """
+    attacks = shift(pieces[-PAWN], 1, -1) | shift(pieces[-PAWN], 1, 1)
+    for offsets, code in ((KNIGHT_OFFSETS, -KNIGHT), (KING_OFFSETS, -KING)):
+        for dr, dc in offsets:
+            attacks |= shift(pieces[code], dr, dc)
+    for directions, code in ((STRAIGHT_DIRECTIONS, -ROOK), (DIAGONAL_DIRECTIONS, -BISHOP)):
+        sliders = pieces[code] | pieces[-QUEEN]
+        for dr, dc in directions:
+            ray = shift(sliders, dr, dc)
+            for _ in range(7):
+                attacks |= ray
+                ray = shift(ray & empty, dr, dc)
+    return attacks
+
+
+def get_attack_maps(boards, white):
+    """
+    The squares each board's chosen side attacks.
+
+    Args:
+        boards: N x 8 x 8 int8 (real orientation, see encode_boards).
+        white: N bools. True -> White's attacks on that board, False -> Black's.
+    Returns:
+        N x 8 x 8 bool.
+    """
+    require_numpy()
+    # get_enemy_attacks wants the attacker negative and pushing down, which Black already is.
+    # White gets flipped and negated into that shape, and flipped back after.
+    flipped = white[:, None, None]
+    view = np.where(flipped, -boards[:, ::-1, :], boards)
+    pieces = to_bitboards(view)
+    attacks = to_masks(get_enemy_attacks(pieces, ~get_occupied(pieces, 1) & ~get_occupied(pieces, -1)))
+    return np.where(flipped, attacks[:, ::-1, :], attacks)
+
+
+def get_occupied(pieces: dict, sign: int):
+    """
+    Every square of one side: sign 1 for the positive pieces, -1 for the negative ones.
+    """
+    occupied = np.zeros_like(pieces[KING])
+    for code in range(PAWN, KING + 1):
+        occupied |= pieces[sign * code]
+    return occupied
+
+
+def get_squares_bits(*squares: tuple[int, int]):
+    return np.uint64(sum(1 << (row * 8 + col) for row, col in squares))
+
+
+def walk(start, empty, direction: tuple[int, int]):
+    """
+    Slides from every start square until the first occupied square.
+
+    Returns:
+        (empty squares passed, the first occupied square hit) as bitboards.
+    """
+    frontier, path, hit = start, np.zeros_like(start), np.zeros_like(start)
+    for _ in range(7):
+        frontier = shift(frontier, *direction)
+        hit |= frontier & ~empty
+        frontier &= empty
+        path |= frontier
+    return path, hit
+
+
+def analyze(batch: dict) -> dict:
+    """
+    Check status and legal move counts for every position in the batch.
+
+    Process (on normalized boards, all boards at once, one uint64 bitboard per piece type per board):
+    1. Enemy attacks with our King lifted off the board (so he can't step back along a checking line).
+    2. Walk out from the King in all 8 directions: the first piece hit may be a checker,
+       a piece of ours with an enemy slider right behind it is pinned to that line.
+       Knight and pawn checkers are single shifts from the King.
+    3. Count the moves: knights, sliders and pawns land on squares that aren't ours (and block/capture the checker
+       when in check), pinned pieces only along their line. Double check leaves only King moves.
+       Pawns landing on the last rank count four times (every promotion piece).
+    4. En passant can uncover the King sideways, which no mask sees. The few boards that have one play it out for real.
+    5. King steps onto unattacked squares, castling through and onto unattacked ones.
+
+    Args:
+        batch: From encode_fens (or built the same way).
+    Returns:
+        'in_check' (N bool), 'legal_moves' (N int), 'checkmate' (N bool), 'stalemate' (N bool).
+        A board without a King to move has 0 moves and isn't in check (same as the arbiter).
+    """
+    require_numpy()
+    boards, king_side, queen_side, en_passant = normalize(batch)
+    pieces = to_bitboards(boards)
+    ours, theirs = get_occupied(pieces, 1), get_occupied(pieces, -1)
+    empty = ~(ours | theirs)
+    king = pieces[KING]
+    has_king = king != 0
+    danger = get_enemy_attacks(pieces, empty | king)
+    zero = np.uint64(0)
+
+    # 2. Checks and pins
+    checkers = (shift(king, -1, -1) | shift(king, -1, 1)) & pieces[-PAWN]
+    for dr, dc in KNIGHT_OFFSETS:
+        checkers |= shift(king, dr, dc) & pieces[-KNIGHT]
+    check_mask = checkers.copy()
+    pinned = [np.zeros_like(king) for _ in range(4)]
+    for directions, code in ((STRAIGHT_DIRECTIONS, -ROOK), (DIAGONAL_DIRECTIONS, -BISHOP)):
+        sliders = pieces[code] | pieces[-QUEEN]
+        for direction in directions:
+            path, hit = walk(king, empty, direction)
+            checker = hit & sliders
+            checkers |= checker
+            check_mask |= np.where(checker != 0, path | checker, zero)
+
+            shield = hit & ours
+            _, behind = walk(shield, empty, direction)
+            pinned[get_axis(direction)] |= np.where(behind & sliders != 0, shield, zero)
+
+    checker_count = popcount(checkers)
+    in_check = checker_count > 0
+    allowed = np.where(in_check, check_mask, ~zero)
+    target = ~ours & allowed
+    pinned_any = pinned[0] | pinned[1] | pinned[2] | pinned[3]
+
+    def free_along(axis: int):
+        # Not pinned, or pinned along this very line
+        return ~pinned_any | pinned[axis]
+
+    # 3. Everyone but the King
+    moves = np.zeros(len(boards), dtype=np.int64)
+    knights = pieces[KNIGHT] & ~pinned_any
+    for dr, dc in KNIGHT_OFFSETS:
+        moves += popcount(shift(knights, dr, dc) & target)
+    for directions, code in ((STRAIGHT_DIRECTIONS, ROOK), (DIAGONAL_DIRECTIONS, BISHOP)):
+        sliders = pieces[code] | pieces[QUEEN]
+        for direction in directions:
+            frontier = sliders & free_along(get_axis(direction))
+            for _ in range(7):
+                frontier = shift(frontier, *direction) & ~ours
+                moves += popcount(frontier & target)
+                frontier &= empty
+
+    pawns = pieces[PAWN]
+    last_rank = np.uint64(0xFF) # Row 0. Landing there is 4 moves, one per promotion piece.
+    single = shift(pawns & free_along(0), -1, 0) & empty
+    double = shift(single & np.uint64(0xFF << 40), -1, 0) & empty # Only from the start row (row 6, so single lands on row 5)
+    moves += popcount(single & allowed) + 3 * popcount(single & allowed & last_rank) + popcount(double & allowed)
+    for direction in ((-1, -1), (-1, 1)):
+        captures = shift(pawns & free_along(get_axis(direction)), *direction) & theirs & allowed
+        moves += popcount(captures) + 3 * popcount(captures & last_rank)
+    moves[checker_count > 1] = 0
+
+    # 4. En passant, played out on copies of just the boards that have one
+    for side in (-1, 1):
+        column = en_passant.astype(np.int64) + side
+        valid = (en_passant >= 0) & (column >= 0) & (column < 8) & (checker_count < 2)
+        index = np.nonzero(valid)[0]
+        index = index[boards[index, 3, column[index]] == PAWN]
+        if len(index) == 0:
+            continue
+        origin = np.left_shift(np.uint64(1), (24 + column[index]).astype(np.uint64))
+        victim = np.left_shift(np.uint64(1), (24 + en_passant[index]).astype(np.uint64))
+        landing = np.left_shift(np.uint64(1), (16 + en_passant[index]).astype(np.uint64))
+        played = {code: bitboards[index] for code, bitboards in pieces.items()}
+        played[-PAWN] = played[-PAWN] & ~victim
+        played_empty = (empty[index] | origin | victim) & ~landing
+        exposed = get_enemy_attacks(played, played_empty) & king[index] != 0
+        moves[index] += ~exposed
+
+    # 5. The King
+    steps = np.zeros_like(king)
+    for dr, dc in KING_OFFSETS:
+        steps |= shift(king, dr, dc)
+    moves += popcount(steps & ~ours & ~danger)
+    home = (king & get_squares_bits((7, 4)) != 0) & ~in_check
+    king_path, queen_path = get_squares_bits((7, 5), (7, 6)), get_squares_bits((7, 3), (7, 2))
+    queen_gap = queen_path | get_squares_bits((7, 1)) # b1 has to be empty too, the King just doesn't walk over it
+    moves += home & king_side & (~empty & king_path == 0) & (danger & king_path == 0)
+    moves += home & queen_side & (~empty & queen_gap == 0) & (danger & queen_path == 0)
+
+    moves[~has_king] = 0
+    in_check &= has_king
+    return {
+        "in_check": in_check,
+        "legal_moves": moves,
+        "checkmate": in_check & (moves == 0),
+        "stalemate": has_king & ~in_check & (moves == 0),
+    }
+
+
+def analyze_fens(fens: list[str]) -> dict:
+    """
+    encode_fens + analyze, for when all you have is a list of FENs.
+    """
+    return analyze(encode_fens(fens))
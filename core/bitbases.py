@@ -0,0 +1,367 @@
+import itertools
+import mmap
+import os
+
+from core import storage
+from core.move import decode_move
+from core.position import Position
+from core.rules import arbiter, tables
+
+# Endgame tables for the tiny endgames: the strong side has a King plus one or two pieces, the other side a lone King.
+# Built once by retrograde analysis (generate_table), then memory-mapped and looked up in O(1).
+#
+# Layout: the strong side is always stored as White. Black-is-strong positions get flipped upside down (and recolored) first.
+# Index = side * 64^n + (strong king, weak king, pieces...) as base-64 digits, square = row * 8 + col,
+# side 0 = strong side to move, 1 = weak side to move.
+# Value (1 byte): 0 = draw (or an impossible position), otherwise plies to mate + 1.
+# That's a byte instead of a single win/draw bit, but the distance is what lets the AI actually make progress
+# towards mate instead of shuffling around in a won position forever.
+
+TABLE_DIR = os.path.join(storage.DATA_DIR, "endgames")
+TABLE_MAGIC = b"TBBASE\x00\x02" # Bumped when a table's contents change. v1 KPK only knew about queen promotions.
+
+# Table name -> the strong side's pieces besides the King (in index order)
+ENDGAMES = {
+    "kpk": "P",
+    "krk": "R",
+    "kqk": "Q",
+    "kbnk": "BN",
+}
+# KBNK has 64^4 * 2 = 33.5M positions. In pure Python that's a coffee break (several of them), so it's opt-in.
+DEFAULT_ENDGAMES = ["kqk", "krk", "kpk"]
+
+SLIDER_DIRECTIONS = {
+    'R': tables.STRAIGHT_DIRECTIONS,
+    'B': tables.DIAGONAL_DIRECTIONS,
+    'Q': tables.ALL_DIRECTIONS,
+}
+
+# What a lone pawn can promote into, and which table that lands in.
+# Bishop and Knight aren't here: K+B or K+N vs K can't mate, those promotions are draws.
+# Rook matters, some positions only win with c8=R because c8=Q is stalemate.
+PROMOTION_TABLES = {"q": "kqk", "r": "krk"}
+
+
+def get_table_path(name: str) -> str:
+    return os.path.join(TABLE_DIR, f"{name}.tbb")
+
+
+def get_index(side: int, squares: tuple[int, ...]) -> int:
+    index = side
+    for square in squares:
+        index = index * 64 + square
+    return index
+
+
+def are_kings_touching(a: int, b: int) -> bool:
+    return abs((a >> 3) - (b >> 3)) <= 1 and abs((a & 7) - (b & 7)) <= 1
+
+
+def get_origins(board: list[list[str]], piece: str, square: int) -> list[int]:
+    """
+    Squares a White piece could have come from to land on 'square' without capturing anything (an "unmove").
+    For everything except pawns that's just the squares it could move to from here, since moves are symmetric.
+    """
+    row, col = square >> 3, square & 7
+    if piece == 'K':
+        return [r * 8 + c for r, c in tables.KING_MOVES[row][col] if board[r][c] == "+"]
+    if piece == 'N':
+        return [r * 8 + c for r, c in tables.KNIGHT_MOVES[row][col] if board[r][c] == "+"]
+    if piece == 'P':
+        origins = []
+        if row + 1 <= 6 and board[row + 1][col] == "+":
+            origins.append(square + 8)
+            if row == 4 and board[row + 2][col] == "+":
+                origins.append(square + 16) # Double push from rank 2
+        return origins
+    origins = []
+    for direction in SLIDER_DIRECTIONS[piece]:
+        for r, c in tables.RAYS[direction][row][col]:
+            if board[r][c] != "+":
+                break
+            origins.append(r * 8 + c)
+    return origins
+
+
+def generate_table(name: str, promotion_tables: dict[str, bytes] | None = None, progress=None) -> bytearray:
+    """
+    Retrograde analysis: start from the mates and walk backwards.
+
+    Process:
+    1. Look at every placement once. For weak-side-to-move positions, count the King's legal moves.
+       Checkmates (in check, zero moves) are lost in 0 plies.
+       (KPK only: pawn promotions that land in a lost KQK or KRK position are wins, seeded with that distance.
+       Every promotion gets seeded, the bucket walk keeps whichever is fastest.)
+    2. Go through the results in order of distance (one bucket per ply count):
+       - Weak side lost in d: every strong move that could have led here is a win in d + 1.
+       - Strong side wins in d: every weak King move that could have led here takes one escape away.
+         When a position has no escapes left, it's lost in d + 1. Distances come out exact because
+         buckets are processed in order, so the last escape to go is always the longest one.
+    3. Everything never reached is a draw (stalemates, hanging pieces, fortress, you name it).
+
+    Args:
+        name: A key of ENDGAMES.
+        promotion_tables: Promotion piece -> its table (PROMOTION_TABLES, loaded), needed for KPK.
+        progress: Optional callback, called with (phase, count).
+    Returns:
+        The table, as described at the top of this file.
+    """
+    pieces = "K" + "k" + ENDGAMES[name]
+    n = len(pieces)
+    half = 64 ** n
+    values = bytearray(2 * half)
+    escapes = bytearray(half) # Legal King moves left, for weak-side-to-move positions
+    done = bytearray(2 * half)
+    buckets: list[list[int]] = [[] for _ in range(256)]
+    board = [["+"] * 8 for _ in range(8)]
+
+    def place(squares):
+        for piece, square in zip(pieces, squares):
+            board[square >> 3][square & 7] = piece
+
+    def clear(squares):
+        for square in squares:
+            board[square >> 3][square & 7] = "+"
+
+    # 1. Count escapes, find the mates, seed promotions
+    for count, squares in enumerate(itertools.product(range(64), repeat=n)):
+        if progress and count % 100000 == 0:
+            progress("scan", count)
+        if len(set(squares)) != n or are_kings_touching(squares[0], squares[1]):
+            continue
+        if 'P' in pieces and squares[2] >> 3 in (0, 7):
+            continue # Pawns never stand on the first or last rank
+
+        place(squares)
+        weak_king = squares[1]
+        king_pos = (weak_king >> 3, weak_king & 7)
+        moves = sum(
+            1 for r, c in tables.KING_MOVES[king_pos[0]][king_pos[1]]
+            if board[r][c] not in "Kk" and arbiter.is_king_move_safe(board, king_pos, (r, c), 'b')
+        )
+        in_check = arbiter.is_square_under_attack(board, king_pos, 'b')
+        index = get_index(0, squares)
+        escapes[index] = moves
+        if moves == 0 and in_check:
+            values[half + index] = 1
+            buckets[0].append(half + index)
+
+        if promotion_tables and not in_check:
+            pawn = squares[2]
+            if pawn >> 3 == 1 and board[0][pawn & 7] == "+":
+                # Promote and look the result up in the new piece's table (weak side to move there)
+                promoted_index = get_index(1, (squares[0], squares[1], pawn - 8))
+                for promotion_table in promotion_tables.values():
+                    plies = promotion_table[promoted_index]
+                    if plies:
+                        buckets[plies].append(index) # Win in (plies - 1) + 1
+        clear(squares)
+
+    # 2. Walk backwards, one ply at a time
+    for level in range(255):
+        bucket = buckets[level]
+        if progress and bucket:
+            progress(f"ply {level}", len(bucket))
+        for index in bucket:
+            if done[index]:
+                continue
+            if values[index] == 0:
+                values[index] = level + 1 # A promotion seed nobody reached sooner
+            elif values[index] != level + 1:
+                continue
+            done[index] = 1
+
+            side, rest = divmod(index, half)
+            squares = []
+            for _ in range(n):
+                rest, square = divmod(rest, 64)
+                squares.append(square)
+            squares.reverse()
+            place(squares)
+
+            if side == 1:
+                # Weak side is lost here. Whatever strong move led here wins.
+                for i, piece in enumerate(pieces):
+                    if piece == "k":
+                        continue
+                    square = squares[i]
+                    for origin in get_origins(board, piece, square):
+                        if piece == "K" and are_kings_touching(origin, squares[1]):
+                            continue
+                        board[square >> 3][square & 7] = "+"
+                        board[origin >> 3][origin & 7] = piece
+                        # The weak King can't be in check with the strong side to move
+                        if not arbiter.is_square_under_attack(board, (squares[1] >> 3, squares[1] & 7), 'b'):
+                            before = squares[:i] + [origin] + squares[i + 1:]
+                            previous = get_index(0, tuple(before))
+                            if values[previous] == 0:
+                                values[previous] = level + 2
+                                buckets[level + 1].append(previous)
+                        board[origin >> 3][origin & 7] = "+"
+                        board[square >> 3][square & 7] = piece
+            else:
+                # Strong side wins here. The weak King move that led here was one escape that doesn't work.
+                for origin in get_origins(board, "K", squares[1]):
+                    if are_kings_touching(origin, squares[0]):
+                        continue
+                    previous = half + get_index(0, (squares[0], origin) + tuple(squares[2:]))
+                    if values[previous] != 0:
+                        continue
+                    escapes[previous - half] -= 1
+                    if escapes[previous - half] == 0:
+                        values[previous] = level + 2
+                        buckets[level + 1].append(previous)
+            clear(squares)
+        buckets[level] = [] # Free it as we go
+
+    return values
+
+
+def write_table(name: str, values: bytes):
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    with open(get_table_path(name), "wb") as f:
+        f.write(TABLE_MAGIC)
+        f.write(values)
+
+
+def generate_all(names: list[str] | None = None, progress=None) -> list[str]:
+    """
+    Builds and writes the tables (KQK and KRK first, KPK needs them). Returns the names written.
+    """
+    names = names or DEFAULT_ENDGAMES
+    order = sorted(names, key=lambda name: name not in PROMOTION_TABLES.values())
+    if "kpk" in order:
+        for table_name in PROMOTION_TABLES.values():
+            if table_name not in order and get_table(table_name) is None:
+                order.insert(0, table_name)
+
+    for name in order:
+        promotion_tables = None
+        if name == "kpk":
+            promotion_tables = {}
+            for piece, table_name in PROMOTION_TABLES.items():
+                table = get_table(table_name)
+                promotion_tables[piece] = table.map[len(TABLE_MAGIC):]
+        values = generate_table(name, promotion_tables, progress)
+        write_table(name, values)
+        _tables.pop(name, None) # Reopen the fresh file next time
+    return order
+
+
+class EndgameTable:
+    """
+    One memory-mapped table file.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(TABLE_MAGIC)] != TABLE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a tchess endgame table")
+
+    def __getitem__(self, index: int) -> int:
+        return self.map[len(TABLE_MAGIC) + index]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+_tables: dict[str, EndgameTable | None] = {}
+
+
+def get_table(name: str) -> EndgameTable | None:
+    """
+    Opens a table the first time it's needed. None if it hasn't been generated
+    (or was generated by an older version, see TABLE_MAGIC. endgames.py builds it again).
+    """
+    if name not in _tables:
+        path = get_table_path(name)
+        try:
+            _tables[name] = EndgameTable(path) if os.path.exists(path) else None
+        except ValueError:
+            _tables[name] = None
+    return _tables[name]
+
+
+def identify(position: Position) -> tuple[str, str] | None:
+    """
+    Which table covers this position, and who the strong side is.
+
+    Returns:
+        (table name, strong color) or None if it isn't one of our endgames.
+    """
+    material = position.material
+    for strong, weak in (('w', 'b'), ('b', 'w')):
+        weak_pieces = "pnbrq" if weak == 'b' else "PNBRQ"
+        if any(material.get(piece, 0) for piece in weak_pieces):
+            continue
+        extra = "".join(piece.upper() * material.get(piece, 0) for piece in ("PNBRQ" if strong == 'w' else "pnbrq"))
+        for name, pieces in ENDGAMES.items():
+            if sorted(extra) == sorted(pieces):
+                return name, strong
+    return None
+
+
+def probe(position: Position) -> dict | None:
+    """
+    Exact answer for a covered endgame.
+
+    Returns:
+        None if no table covers the position (or it isn't generated).
+        Otherwise {'result': 'WIN'/'LOSS'/'DRAW' for the side to move, 'plies': plies to mate (0 for a draw)}.
+    """
+    found = identify(position)
+    if found is None:
+        return None
+    name, strong = found
+    table = get_table(name)
+    if table is None:
+        return None
+
+    # Find the squares in index order. Black strong -> flip the board so the strong side looks like White.
+    squares: dict[str, int] = {}
+    for color in ('w', 'b'):
+        for r, c in position.piece_squares[color]:
+            piece = position.board[r][c]
+            if strong == 'b':
+                r, piece = 7 - r, piece.swapcase()
+            squares[piece] = r * 8 + c
+    order = (squares['K'], squares['k']) + tuple(squares[piece] for piece in ENDGAMES[name])
+    side = 0 if position.turn == strong else 1
+
+    value = table[get_index(side, order)]
+    if value == 0:
+        return {"result": "DRAW", "plies": 0}
+    return {"result": "WIN" if side == 0 else "LOSS", "plies": value - 1}
+
+
+def get_best_move(position: Position) -> str | None:
+    """
+    Plays a covered endgame perfectly: the fastest mate when winning, the slowest one when losing,
+    and any move that keeps the draw when it's a draw.
+
+    Returns:
+        A move like 'e2e4' (promotions say what they promote to, 'c7c8r'), or None if no table covers the position.
+    """
+    verdict = probe(position)
+    if verdict is None:
+        return None
+
+    best_move, best_rank = None, None
+    for code in arbiter.generate_move_list(position): # Every promotion piece, c8=Q can be stalemate where c8=R mates
+        move = decode_move(code)
+        position.make_packed_move(code)
+        reply = probe(position)
+        position.unmake_move()
+        # Rank from our point of view (lower is better). Positions no table covers (a capture down to KK) are draws.
+        if reply is None or reply["result"] == "DRAW":
+            rank = 0
+        elif reply["result"] == "LOSS":
+            rank = -1000 + reply["plies"] # They lose: the sooner the better
+        else:
+            rank = 1000 - reply["plies"] # They win: make them work for it
+        if best_rank is None or rank < best_rank:
+            best_move, best_rank = move, rank
+    return best_move
@@ -0,0 +1,551 @@
+from core.board import create_board, get_board_data, change_board_to_fen
+from core.move import MOVE_NAMES, PROMOTION_CODES
+from core.utils import change_notations
+
+# Square index = row * 8 + col, so a8 is bit 0 and h1 is bit 63. Same orientation as the list board.
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << (r * 8) for r in range(8))
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+RANK_2 = 0xFF << 48 # Row 6, where white pawns start
+RANK_7 = 0xFF << 8  # Row 1, where black pawns start
+
+PIECES = "PNBRQKpnbrqk"
+PIECE_INDEX = {piece: i for i, piece in enumerate(PIECES)}
+
+# (row change, col change) -> (bit shift, mask that kills wrap-arounds)
+# Moving one column right means the bit has to land anywhere except the A file, and vice versa.
+DIRECTIONS = {
+    (-1, 0): (-8, FULL), (1, 0): (8, FULL), (0, 1): (1, NOT_FILE_A), (0, -1): (-1, NOT_FILE_H),
+    (-1, 1): (-7, NOT_FILE_A), (-1, -1): (-9, NOT_FILE_H), (1, 1): (9, NOT_FILE_A), (1, -1): (7, NOT_FILE_H),
+}
+STRAIGHT = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+DIAGONAL = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def shift(bb: int, direction: tuple[int, int]) -> int:
+    """
+    Moves every bit in a bitboard one step in a direction. Bits that would fall off the board disappear.
+    """
+    amount, mask = DIRECTIONS[direction]
+    if amount > 0:
+        return (bb << amount) & mask
+    return (bb >> -amount) & mask
+
+
+def _build_step_table(steps: list[tuple[int, int]]) -> list[int]:
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for dr, dc in steps:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _build_step_table([(1, 2), (2, 1), (-1, 2), (1, -2), (-1, -2), (-2, -1), (-2, 1), (2, -1)])
+KING_ATTACKS = _build_step_table(STRAIGHT + DIAGONAL)
+
+
+def _build_rays() -> dict[tuple[int, int], list[list[int]]]:
+    rays = {}
+    for dr, dc in STRAIGHT + DIAGONAL:
+        table = []
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append(1 << (r * 8 + c))
+                r, c = r + dr, c + dc
+            table.append(ray)
+        rays[(dr, dc)] = table
+    return rays
+
+
+# RAYS[direction][sq] -> the bits a slider on sq sees in that direction, nearest first (until the board edge)
+RAYS = _build_rays()
+
+
+def iter_bits(bb: int):
+    """
+    Yields the square index of every set bit, lowest first.
+    """
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def sliding_attacks(sliders: int, empty: int, directions: list[tuple[int, int]]) -> int:
+    """
+    Attack set of ALL the given sliders at once (dumb7fill).
+
+    Logic:
+        Flood each direction through empty squares only, then shift once more so the
+        first blocker (friend or enemy) is included. Callers mask out their own pieces.
+    """
+    attacks = 0
+    for direction in directions:
+        flood = sliders
+        gen = sliders
+        for _ in range(6):
+            gen = shift(gen, direction) & empty
+            flood |= gen
+        attacks |= shift(flood, direction)
+    return attacks
+
+
+def ray_attacks(sq: int, occupied: int, directions: list[tuple[int, int]]) -> int:
+    """
+    Attack set of ONE slider: walk each ray until the first piece (included). Cheaper than a flood fill for a single piece.
+    """
+    attacks = 0
+    for direction in directions:
+        for bit in RAYS[direction][sq]:
+            attacks |= bit
+            if bit & occupied:
+                break
+    return attacks
+
+
+def pawn_attacks(pawns: int, color: str) -> int:
+    """
+    Squares attacked by a set of pawns. White attacks upwards (towards row 0).
+    """
+    if color == 'w':
+        return shift(pawns, (-1, -1)) | shift(pawns, (-1, 1))
+    return shift(pawns, (1, -1)) | shift(pawns, (1, 1))
+
+
+def get_occupancy(board: list[list[str]]) -> tuple[int, int]:
+    """
+    (white pieces, black pieces) of a list board, as two bitboards.
+    """
+    white = black = 0
+    for r, row in enumerate(board):
+        for c, piece in enumerate(row):
+            if piece != "+":
+                if piece.isupper():
+                    white |= 1 << (r * 8 + c)
+                else:
+                    black |= 1 << (r * 8 + c)
+    return white, black
+
+
+def square_of(pos: tuple[int, int]) -> int:
+    return pos[0] * 8 + pos[1]
+
+
+def pos_of(sq: int) -> tuple[int, int]:
+    return divmod(sq, 8)
+
+
+class BitboardPosition:
+    """
+    The same position as core.position.Position, stored as 12 integer bitboards (one per piece type and color).
+
+    Logic:
+        Two jobs:
+        1. core.rules' bitboard backend (base.BACKEND). from_position wraps the bitboards a core.position.Position
+           keeps in sync with its list board, and the arbiter asks the wrapper for legal moves and attacks.
+           The list board stays the view main.py and the renderer draw from.
+        2. A standalone position with its own make/unmake, for perft: walking the same positions with two generators
+           that share no code catches bugs in either one.
+        Whole-side attack sets are a handful of shifts and ORs, legal moves come from check and pin masks
+        (get_legal_targets), like the arbiter does, so nothing gets played out except en passant.
+        The 'board' property rebuilds the list[list[str]] view, to_fen goes through it.
+    """
+
+    def __init__(self, bitboards: list[int], turn: str = "w", castling_rights: str = "KQkq", en_passant: str = "-", half_timer: int = 0, full_timer: int = 1):
+        self.bitboards = bitboards
+        self.turn = turn
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.half_timer = half_timer
+        self.full_timer = full_timer
+        self.undo_stack: list[tuple] = []
+
+    @classmethod
+    def from_board(cls, board: list[list[str]], turn: str = "w", castling_rights: str = "KQkq", en_passant: str = "-", half_timer: int = 0, full_timer: int = 1) -> "BitboardPosition":
+        bitboards = [0] * 12
+        for r in range(8):
+            for c in range(8):
+                piece = board[r][c]
+                if piece != "+":
+                    bitboards[PIECE_INDEX[piece]] |= 1 << (r * 8 + c)
+        return cls(bitboards, turn, castling_rights, en_passant, half_timer, full_timer)
+
+    @classmethod
+    def from_position(cls, position) -> "BitboardPosition":
+        """
+        A view of a core.position.Position: shares its bitboards list (Position keeps it up to date), copies nothing.
+        Read only. Playing a move on the view would leave the Position's list board behind.
+        """
+        return cls(position.bitboards, position.turn, position.castling_rights, position.en_passant, position.half_timer, position.full_timer)
+
+    @classmethod
+    def from_fen(cls, fen_string: str) -> "BitboardPosition":
+        data = get_board_data(fen_string)
+        return cls.from_board(
+            create_board(fen_string),
+            turn=str(data["turn"]),
+            castling_rights=str(data["castling_rights"]),
+            en_passant=str(data["en_passant"]),
+            half_timer=int(data["half_timer"]),
+            full_timer=int(data["full_timer"]),
+        )
+
+    @property
+    def board(self) -> list[list[str]]:
+        """
+        The compatibility adapter: a fresh list[list[str]] board, exactly what create_board would give.
+        """
+        board = [["+"] * 8 for _ in range(8)]
+        for index, bb in enumerate(self.bitboards):
+            for sq in iter_bits(bb):
+                board[sq >> 3][sq & 7] = PIECES[index]
+        return board
+
+    def to_fen(self) -> str:
+        return change_board_to_fen(self.board, self.turn, self.castling_rights, self.en_passant, self.half_timer, self.full_timer)
+
+    def occupancy(self, color: str) -> int:
+        bbs = self.bitboards
+        if color == 'w':
+            return bbs[0] | bbs[1] | bbs[2] | bbs[3] | bbs[4] | bbs[5]
+        return bbs[6] | bbs[7] | bbs[8] | bbs[9] | bbs[10] | bbs[11]
+
+    def piece_at(self, sq: int) -> str:
+        bit = 1 << sq
+        for index, bb in enumerate(self.bitboards):
+            if bb & bit:
+                return PIECES[index]
+        return "+"
+
+    def attacks_by(self, color: str, occupied: int | None = None) -> int:
+        """
+        Every square the given side attacks, as one bitboard.
+        'occupied' overrides what blocks the sliders (the move generator lifts the King off so he can't hide behind himself).
+        """
+        offset = 0 if color == 'w' else 6
+        bbs = self.bitboards
+        if occupied is None:
+            occupied = self.occupancy('w') | self.occupancy('b')
+        empty = FULL ^ occupied
+
+        attacks = pawn_attacks(bbs[offset], color)
+        for sq in iter_bits(bbs[offset + 1]):
+            attacks |= KNIGHT_ATTACKS[sq]
+        for sq in iter_bits(bbs[offset + 5]):
+            attacks |= KING_ATTACKS[sq]
+        # Queens are just rooks and bishops in a trench coat, here too.
+        attacks |= sliding_attacks(bbs[offset + 3] | bbs[offset + 4], empty, STRAIGHT)
+        attacks |= sliding_attacks(bbs[offset + 2] | bbs[offset + 4], empty, DIAGONAL)
+        return attacks
+
+    def is_square_attacked(self, sq: int, attacker_color: str) -> bool:
+        """
+        Checks a single square the other way around: pretend to be each piece type standing on it.
+        """
+        offset = 0 if attacker_color == 'w' else 6
+        defender_color = 'b' if attacker_color == 'w' else 'w'
+        bbs = self.bitboards
+        bit = 1 << sq
+
+        if KNIGHT_ATTACKS[sq] & bbs[offset + 1]: return True
+        if KING_ATTACKS[sq] & bbs[offset + 5]: return True
+        if pawn_attacks(bit, defender_color) & bbs[offset]: return True
+
+        empty = FULL ^ (self.occupancy('w') | self.occupancy('b'))
+        if sliding_attacks(bit, empty, STRAIGHT) & (bbs[offset + 3] | bbs[offset + 4]): return True
+        if sliding_attacks(bit, empty, DIAGONAL) & (bbs[offset + 2] | bbs[offset + 4]): return True
+        return False
+
+    def is_king_in_check(self, color: str) -> bool:
+        king = self.bitboards[PIECE_INDEX['K' if color == 'w' else 'k']]
+        if not king:
+            return True # Same convention as the arbiter: no king means the game is over
+        return self.is_square_attacked(king.bit_length() - 1, 'b' if color == 'w' else 'w')
+
+    def get_pseudo_targets(self, sq: int) -> int:
+        """
+        Pseudo-legal target squares for the piece on sq, as a bitboard. Castling included.
+        """
+        piece = self.piece_at(sq)
+        if piece == "+":
+            return 0
+
+        color = "w" if piece.isupper() else "b"
+        p_type = piece.lower()
+        own = self.occupancy(color)
+        enemy = self.occupancy('b' if color == 'w' else 'w')
+        empty = FULL ^ (own | enemy)
+        bit = 1 << sq
+
+        if p_type == 'n':
+            return KNIGHT_ATTACKS[sq] & ~own
+        if p_type == 'b':
+            return sliding_attacks(bit, empty, DIAGONAL) & ~own
+        if p_type == 'r':
+            return sliding_attacks(bit, empty, STRAIGHT) & ~own
+        if p_type == 'q':
+            return sliding_attacks(bit, empty, STRAIGHT + DIAGONAL) & ~own
+
+        if p_type == 'p':
+            forward = (-1, 0) if color == 'w' else (1, 0)
+            targets = shift(bit, forward) & empty
+            if targets and bit & (RANK_2 if color == 'w' else RANK_7):
+                targets |= shift(targets, forward) & empty
+            captures = pawn_attacks(bit, color)
+            targets |= captures & enemy
+            if self.en_passant != "-":
+                targets |= captures & (1 << square_of(change_notations(self.en_passant)))
+            return targets
+
+        # King. Castling needs empty squares AND no check on the start, pass-through or landing square.
+        targets = KING_ATTACKS[sq] & ~own
+        enemy_color = 'b' if color == 'w' else 'w'
+        row = 7 if color == 'w' else 0
+        king_side, queen_side = ('K', 'Q') if color == 'w' else ('k', 'q')
+        if sq == row * 8 + 4 and (king_side in self.castling_rights or queen_side in self.castling_rights):
+            attacked = self.attacks_by(enemy_color)
+            if not attacked & bit:
+                if king_side in self.castling_rights:
+                    between = (1 << (row * 8 + 5)) | (1 << (row * 8 + 6))
+                    if not between & ~empty and not between & attacked:
+                        targets |= 1 << (row * 8 + 6)
+                if queen_side in self.castling_rights:
+                    between = (1 << (row * 8 + 1)) | (1 << (row * 8 + 2)) | (1 << (row * 8 + 3))
+                    path = (1 << (row * 8 + 2)) | (1 << (row * 8 + 3))
+                    if not between & ~empty and not path & attacked:
+                        targets |= 1 << (row * 8 + 2)
+        return targets
+
+    def get_pseudo_moves(self, pos: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Same shape as arbiter.get_pseudo_moves: a list of (row, col) targets.
+        """
+        return [pos_of(sq) for sq in iter_bits(self.get_pseudo_targets(square_of(pos)))]
+
+    def get_checks_and_pins(self, color: str, king_sq: int) -> tuple[int, int, dict[int, int]]:
+        """
+        Same job as arbiter.get_checks_and_pins, on bitboards.
+
+        Returns:
+            (checkers, check_mask, pins): the checking pieces, the squares that stop a single check
+            (the checker plus the line between it and the King), and pinned square -> the line it may still move along.
+        """
+        bbs = self.bitboards
+        offset = 6 if color == 'w' else 0 # The enemy
+        own = self.occupancy(color)
+        occupied = own | self.occupancy('b' if color == 'w' else 'w')
+
+        checkers = (KNIGHT_ATTACKS[king_sq] & bbs[offset + 1]) | (pawn_attacks(1 << king_sq, color) & bbs[offset])
+        check_mask = checkers
+        pins: dict[int, int] = {}
+        for directions, sliders in ((STRAIGHT, bbs[offset + 3] | bbs[offset + 4]), (DIAGONAL, bbs[offset + 2] | bbs[offset + 4])):
+            if not sliders:
+                continue
+            for direction in directions:
+                path = 0
+                shield = 0
+                for bit in RAYS[direction][king_sq]:
+                    path |= bit
+                    if not bit & occupied:
+                        continue
+                    if bit & own:
+                        if shield:
+                            break # Two of ours in the way, nothing to see here
+                        shield = bit
+                        continue
+                    if bit & sliders:
+                        if shield:
+                            pins[shield.bit_length() - 1] = path
+                        else:
+                            checkers |= bit
+                            check_mask |= path
+                    break
+        return checkers, check_mask, pins
+
+    def is_en_passant_safe(self, sq: int, ep_sq: int, color: str, king_sq: int) -> bool:
+        """
+        En passant takes two pieces off one rank, no mask sees what that uncovers. So it gets played out on the bitboards.
+        """
+        bbs = self.bitboards
+        pawn, victim = (0, 6) if color == 'w' else (6, 0)
+        victim_bit = 1 << (ep_sq + (8 if color == 'w' else -8))
+        saved = bbs[pawn], bbs[victim]
+        bbs[pawn] ^= (1 << sq) | (1 << ep_sq)
+        bbs[victim] &= ~victim_bit
+        safe = not self.is_square_attacked(king_sq, 'b' if color == 'w' else 'w')
+        bbs[pawn], bbs[victim] = saved
+        return safe
+
+    def get_legal_targets(self, color: str | None = None) -> dict[int, int]:
+        """
+        Every legal move for one side in a single pass, like arbiter.generate_all_legal_moves.
+
+        Process:
+        1. Checkers and pins (get_checks_and_pins).
+        2. The King steps onto squares the enemy doesn't attack (attacks worked out with him lifted off the board).
+        3. Double check -> done. Otherwise castling, then everyone else: pseudo targets & check mask & pin line.
+        4. En passant is played out (is_en_passant_safe).
+
+        Returns:
+            from square -> bitboard of legal target squares. Squares with no moves are left out.
+        """
+        if color is None:
+            color = self.turn
+        enemy_color = 'b' if color == 'w' else 'w'
+        offset = 0 if color == 'w' else 6
+        bbs = self.bitboards
+        if not bbs[offset + 5]:
+            return {} # No King, no game
+        king_sq = bbs[offset + 5].bit_length() - 1
+        own = self.occupancy(color)
+        enemy = self.occupancy(enemy_color)
+        occupied = own | enemy
+
+        checkers, check_mask, pins = self.get_checks_and_pins(color, king_sq)
+        danger = self.attacks_by(enemy_color, occupied ^ (1 << king_sq))
+        legal: dict[int, int] = {}
+        king_targets = KING_ATTACKS[king_sq] & ~own & ~danger
+
+        if checkers & (checkers - 1):
+            if king_targets:
+                legal[king_sq] = king_targets
+            return legal # Double check. The King is on his own.
+
+        row = 7 if color == 'w' else 0
+        if not checkers and king_sq == row * 8 + 4:
+            king_side, queen_side = ('K', 'Q') if color == 'w' else ('k', 'q')
+            if king_side in self.castling_rights:
+                path = (1 << (row * 8 + 5)) | (1 << (row * 8 + 6))
+                if not path & occupied and not path & danger:
+                    king_targets |= 1 << (row * 8 + 6)
+            if queen_side in self.castling_rights:
+                path = (1 << (row * 8 + 2)) | (1 << (row * 8 + 3))
+                if not (path | (1 << (row * 8 + 1))) & occupied and not path & danger:
+                    king_targets |= 1 << (row * 8 + 2)
+        if king_targets:
+            legal[king_sq] = king_targets
+
+        allowed = check_mask if checkers else FULL
+        targets_mask = ~own & allowed
+        for sq in iter_bits(bbs[offset + 1]):
+            if sq not in pins: # A pinned knight never has a move along the pin
+                targets = KNIGHT_ATTACKS[sq] & targets_mask
+                if targets:
+                    legal[sq] = targets
+        for index, directions in ((offset + 2, DIAGONAL), (offset + 3, STRAIGHT), (offset + 4, STRAIGHT + DIAGONAL)):
+            for sq in iter_bits(bbs[index]):
+                targets = ray_attacks(sq, occupied, directions) & targets_mask & pins.get(sq, FULL)
+                if targets:
+                    legal[sq] = targets
+
+        forward = (-1, 0) if color == 'w' else (1, 0)
+        start_rank = RANK_2 if color == 'w' else RANK_7
+        ep_sq = square_of(change_notations(self.en_passant)) if self.en_passant != "-" else None
+        for sq in iter_bits(bbs[offset]):
+            bit = 1 << sq
+            targets = shift(bit, forward) & ~occupied
+            if targets and bit & start_rank:
+                targets |= shift(targets, forward) & ~occupied
+            captures = pawn_attacks(bit, color)
+            targets = (targets | (captures & enemy)) & allowed & pins.get(sq, FULL)
+            if ep_sq is not None and captures >> ep_sq & 1 and self.is_en_passant_safe(sq, ep_sq, color, king_sq):
+                targets |= 1 << ep_sq
+            if targets:
+                legal[sq] = targets
+        return legal
+
+    def get_legal_moves(self, pos: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Same shape as arbiter.get_legal_moves: the (row, col) targets of one piece.
+        """
+        sq = square_of(pos)
+        piece = self.piece_at(sq)
+        if piece == "+":
+            return []
+        targets = self.get_legal_targets("w" if piece.isupper() else "b").get(sq, 0)
+        return [pos_of(target) for target in iter_bits(targets)]
+
+    def get_all_moves(self) -> list[str]:
+        """
+        Every legal move for the side to move as 'e2e4' strings. Promotions come out once per piece ('e7e8q' ... 'e7e8n').
+        """
+        moves: list[str] = []
+        pawns = self.bitboards[PIECE_INDEX['P' if self.turn == 'w' else 'p']]
+        last_rank = 0xFF if self.turn == 'w' else 0xFF << 56
+        for sq, targets in self.get_legal_targets().items():
+            promotes = pawns >> sq & 1
+            for target in iter_bits(targets):
+                move = MOVE_NAMES[sq | target << 6]
+                if promotes and (1 << target) & last_rank:
+                    moves.extend(move + piece for piece in "qrbn")
+                else:
+                    moves.append(move)
+        return moves
+
+    def make_move(self, move: str) -> None:
+        """
+        Plays a move in place, same rules as Position.make_move (Castling, En Passant, Promotion, Rights Update).
+        The undo record is just the old bitboards and metadata. Twelve ints are cheap to keep around.
+        """
+        bbs = self.bitboards
+        self.undo_stack.append((tuple(bbs), self.turn, self.castling_rights, self.en_passant, self.half_timer, self.full_timer))
+
+        start_pos = change_notations(move[0:2])
+        end_pos = change_notations(move[2:4])
+        start_sq, end_sq = square_of(start_pos), square_of(end_pos)
+        start_bit, end_bit = 1 << start_sq, 1 << end_sq
+
+        piece = self.piece_at(start_sq)
+        captured = self.piece_at(end_sq)
+        color = "w" if piece.isupper() else "b"
+        p_type = piece.lower()
+        index = PIECE_INDEX[piece]
+
+        if captured != "+":
+            bbs[PIECE_INDEX[captured]] &= ~end_bit
+        bbs[index] ^= start_bit | end_bit
+
+        if p_type == 'k' and abs(start_pos[1] - end_pos[1]) > 1:
+            row = start_pos[0]
+            rook_col, rook_dest_col = (7, 5) if end_pos[1] > start_pos[1] else (0, 3)
+            bbs[index - 2] ^= (1 << (row * 8 + rook_col)) | (1 << (row * 8 + rook_dest_col)) # Rook sits 2 slots before the king in PIECES
+
+        if p_type == 'p':
+            if start_pos[1] != end_pos[1] and captured == "+":
+                victim_sq = end_sq + (8 if color == 'w' else -8)
+                bbs[index + 6 if color == 'w' else index - 6] &= ~(1 << victim_sq)
+            if end_pos[0] in (0, 7):
+                bbs[index] &= ~end_bit
+                bbs[index + PROMOTION_CODES.get(move[4:5].lower(), 4)] |= end_bit # N, B, R, Q sit 1-4 slots after the pawn, same as their codes
+
+        rights = self.castling_rights
+        if p_type == 'k':
+            rights = rights.replace("K", "").replace("Q", "") if color == 'w' else rights.replace("k", "").replace("q", "")
+        for square, right in (((7, 0), "Q"), ((7, 7), "K"), ((0, 0), "q"), ((0, 7), "k")):
+            if start_pos == square or end_pos == square:
+                rights = rights.replace(right, "")
+        self.castling_rights = rights or "-"
+
+        if p_type == 'p' and abs(start_pos[0] - end_pos[0]) == 2:
+            self.en_passant = f"{chr(start_pos[1] + 97)}{8 - (start_pos[0] + end_pos[0]) // 2}"
+        else:
+            self.en_passant = "-"
+
+        self.half_timer = 0 if p_type == 'p' or captured != "+" else self.half_timer + 1
+        if color == 'b':
+            self.full_timer += 1
+        self.turn = "b" if self.turn == "w" else "w"
+
+    def unmake_move(self) -> None:
+        bbs, self.turn, self.castling_rights, self.en_passant, self.half_timer, self.full_timer = self.undo_stack.pop()
+        self.bitboards[:] = bbs
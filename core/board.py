@@ -1,5 +1,62 @@
 from core.utils import change_fen_to_row, change_notations
 from core.rules import base 
+from core.cache import BoundedCache
+
+
+class ParsedFEN:
+    """
+    A FEN string, split up once.
+
+    Logic:
+        The same FEN gets asked about over and over: the book, the endgame tables and the search all
+        start from the FEN of the current position, and update_board_state used to split it twice more.
+        Everything in here is immutable (rows are strings), so one ParsedFEN can be shared by all of them
+        through parse_fen's cache. Only the board that someone is going to mutate gets built fresh.
+    """
+    __slots__ = ("rows", "turn", "castling_rights", "en_passant", "half_timer", "full_timer")
+
+    def __init__(self, fen_string: str):
+        fields = fen_string.split()
+        self.rows = tuple(change_fen_to_row(data) for data in fields[0].split("/"))
+        self.turn = fields[1]
+        self.castling_rights = fields[2]
+        self.en_passant = fields[3]
+        self.half_timer = int(fields[4])
+        self.full_timer = int(fields[5])
+
+    def get_board(self) -> list[list[str]]:
+        """
+        A fresh, mutable board list (see create_board).
+        """
+        return [list(row) for row in self.rows]
+
+    def get_data(self) -> dict[str, str | int]:
+        """
+        The metadata, same dictionary as get_board_data.
+        """
+        return {
+            "turn": self.turn,
+            "castling_rights": self.castling_rights,
+            "en_passant": self.en_passant,
+            "half_timer": self.half_timer,
+            "full_timer": self.full_timer
+        }
+
+
+# FEN string -> ParsedFEN. Small: it only has to cover the positions around the current one.
+FEN_CACHE = BoundedCache(1024)
+
+
+def parse_fen(fen_string: str) -> ParsedFEN:
+    """
+    The ParsedFEN for this string, parsed the first time and served from FEN_CACHE after that.
+    """
+    parsed = FEN_CACHE.get(fen_string)
+    if parsed is None:
+        parsed = ParsedFEN(fen_string)
+        FEN_CACHE.put(fen_string, parsed)
+    return parsed
+
 
 def create_board(fen_string: str = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1") -> list[list[str]]:
     """
@@ -16,12 +73,7 @@ def create_board(fen_string: str = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR
     Returns:
         The board list.
     """
-    placement_data = fen_string.split()[0].strip().split("/")
-    board: list[list[str]] = []
-    for data in placement_data:
-        row = change_fen_to_row(data)
-        board.append(list(row)) # Explicitly convert string to list for mutability
-    return board
+    return parse_fen(fen_string).get_board() # Fresh lists every time, the parsing only happens once per FEN
 
 
 def get_board_data(fen_string: str) -> dict[str, str | int]:
@@ -33,16 +85,7 @@ def get_board_data(fen_string: str) -> dict[str, str | int]:
     Result: 
          A dictionary containing different keys corresponding to the different parts of a fen string.
     """
-    placement_data = fen_string.split()[1:]
-    
-    data = {
-        "turn": placement_data[0],
-        "castling_rights": placement_data[1],
-        "en_passant": placement_data[2],
-        "half_timer": int(placement_data[3]),
-        "full_timer": int(placement_data[4])
-    }
-    return data
+    return parse_fen(fen_string).get_data()
 
 
 def change_board_to_fen(board: list[list[str]], turn: str = "w", castling_rights: str = "KQkq", en_passant: str = "-", half_timer: int = 0, full_timer: int = 1) -> str:
@@ -64,28 +107,12 @@ def change_board_to_fen(board: list[list[str]], turn: str = "w", castling_rights
     Returns:
         str: a fen string.
     """
-    fen_string = ""
-    for row in board:
-        spaces = 0
-        for char in row:
-            if char == "+":
-                spaces += 1
-            else:
-                if spaces > 0:
-                    fen_string += str(spaces)
-                    spaces = 0
-                fen_string += char 
-        
-        # Handle remaining spaces in a row
-        if spaces > 0:
-            fen_string += str(spaces)
-        fen_string += r"/"
-    
-    # stripping the last slash and appending metadata
-    fen_string = fen_string[:-1]
-    fen_string += f" {turn} {castling_rights} {en_passant} {half_timer} {full_timer}"
+    placement = "/".join(["".join(row) for row in board])
+    # Runs of empty squares become their length. Longest first, so '++++' becomes '4' and not '22'.
+    for spaces in range(8, 0, -1):
+        placement = placement.replace("+" * spaces, str(spaces))
 
-    return fen_string
+    return f"{placement} {turn} {castling_rights} {en_passant} {half_timer} {full_timer}"
 
 
 def update_board_state(move: str, fen_string: str = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1") -> str:
@@ -93,13 +120,14 @@ def update_board_state(move: str, fen_string: str = "rnbqkbnr/pppppppp/8/8/8/8/P
     Executes a move and handles ALL the side effects (Castling, En Passant, Promotion, Rights Update).
 
     Args:
-        move: a str in the format 'e2e4' (start_pos + end_pos)
+        move: a str in the format 'e2e4' (start_pos + end_pos), plus the promotion piece for promotions ('e7e8n').
         fen_string: the current fen string.
     Returns:
         str: The fully updated FEN string.
     """
-    board = create_board(fen_string)
-    board_data = get_board_data(fen_string)
+    parsed = parse_fen(fen_string) # Once, for both the board and the metadata
+    board = parsed.get_board()
+    board_data = parsed.get_data()
     
     # Parse Coordinates
     start_str, end_str = move[0:2], move[2:4]
@@ -112,6 +140,7 @@ def update_board_state(move: str, fen_string: str = "rnbqkbnr/pppppppp/8/8/8/8/P
     
     p_type = piece.lower()
     color = "w" if piece.isupper() else "b"
+    is_capture = board[end_pos[0]][end_pos[1]] != "+" # Check before moving anything, the board is about to change.
     
     # Castling
     # We detect a castle if the King moves more than 1 column.
@@ -145,8 +174,9 @@ def update_board_state(move: str, fen_string: str = "rnbqkbnr/pppppppp/8/8/8/8/P
     # If a pawn hits the last rank
     if p_type == 'p':
         if (color == 'w' and end_pos[0] == 0) or (color == 'b' and end_pos[0] == 7):
-            # Auto-Promote to Queen for now
-            board[end_pos[0]][end_pos[1]] = "Q" if color == 'w' else "q"
+            # Whatever the move asked for ('e7e8n'), Queen if it didn't say
+            promotion = move[4:5].lower() or "q"
+            board[end_pos[0]][end_pos[1]] = promotion.upper() if color == 'w' else promotion
 
 
     # Fen metadata updates
@@ -201,7 +231,6 @@ def update_board_state(move: str, fen_string: str = "rnbqkbnr/pppppppp/8/8/8/8/P
     next_turn = "w" if board_data["turn"] == "b" else "b"
     
     # Half move clock resets on Pawn Move or Capture. Otherwise +1.
-    is_capture = (base.get_piece_on_position(create_board(fen_string), end_pos) != "+") # Check old board for capture. The new board has already changed so we can't check there.
     if p_type == 'p' or is_capture:
         half_timer = 0
     else:
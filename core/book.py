@@ -0,0 +1,193 @@
+import mmap
+import os
+import random
+import struct
+
+from core import move as packed, pgn, storage
+from core.position import Position
+
+# Polyglot opening books (.bin), the format pretty much every chess GUI can read and write.
+# The file is a list of 16 byte entries sorted by key: key (u64), move (u16), weight (u16), learn (u32), big-endian.
+# The key is the Polyglot Zobrist hash, which is exactly what Position.hash already is (core.zobrist).
+#
+# Move bits: 0-2 to file, 3-5 to rank, 6-8 from file, 9-11 from rank, 12-14 promotion (1-4 = n, b, r, q).
+# Ranks count from White's side (rank 1 = 0). Castling is written as "king takes own rook" (e1h1).
+# That's core.move's layout with from and to swapped and the board flipped (square ^ 56, since core.move has a8 = 0),
+# and the promotion bits are the same. So we convert the squares and let core.move do the rest.
+
+BOOK_FILE = os.path.join(storage.DATA_DIR, "book.bin")
+ENTRY = struct.Struct(">QHHI")
+
+# How many plies into the game each difficulty may follow the book.
+# Short books at the low levels: they still get variety from the random pick, then leave theory fast (like beginners do).
+BOOK_DEPTH = {1: 4, 2: 8, 3: 16, 4: 30}
+
+# Polyglot castling (king onto its own rook) -> the king's real destination
+CASTLING_MOVES = {"e1h1": "e1g1", "e1a1": "e1c1", "e8h8": "e8g8", "e8a8": "e8c8"}
+CASTLING_CODES = {move: book_move for book_move, move in CASTLING_MOVES.items()}
+
+
+def swap_layout(code: int) -> int:
+    """
+    Polyglot move bits <-> core.move bits. Swaps from and to and flips both squares, so it's its own inverse.
+    """
+    return ((code >> 6) & 0x3F ^ 56) | ((code & 0x3F) ^ 56) << 6 | code & 0x7000
+
+
+def decode_move(position: Position, code: int) -> str:
+    """
+    Polyglot move bits -> 'e2e4' (or 'e7e8q').
+    """
+    move = packed.decode_move(swap_layout(code))
+
+    # Only a king standing on its home square can "capture its own rook"
+    row, col = packed.SQUARE_COORDS[packed.SQUARE_INDEX[move[0:2]]]
+    if move in CASTLING_MOVES and position.board[row][col] in "Kk":
+        move = CASTLING_MOVES[move]
+    return move
+
+
+def encode_move(position: Position, move: str) -> int:
+    """
+    'e2e4' -> Polyglot move bits. The other way around from decode_move.
+    """
+    row, col = packed.SQUARE_COORDS[packed.SQUARE_INDEX[move[0:2]]]
+    if move[:4] in CASTLING_CODES and position.board[row][col] in "Kk":
+        move = CASTLING_CODES[move[:4]]
+    return swap_layout(packed.encode_move(move))
+
+
+def get_ply(position: Position) -> int:
+    """
+    Half moves played since the start, from the FEN move counter.
+    """
+    return (position.full_timer - 1) * 2 + (1 if position.turn == 'b' else 0)
+
+
+class OpeningBook:
+    """
+    A memory-mapped Polyglot book. Opening it costs nothing, a lookup is a binary search over the map.
+    The OS only pages in the few entries we actually touch, so big books are fine.
+    """
+
+    def __init__(self, path: str = BOOK_FILE):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // ENTRY.size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def read_entry(self, index: int) -> tuple[int, int, int, int]:
+        return ENTRY.unpack_from(self.map, index * ENTRY.size)
+
+    def find_first(self, key: int) -> int:
+        """
+        Index of the first entry with this key (or where it would be). Plain lower-bound binary search.
+        """
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.read_entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_moves(self, position: Position) -> list[tuple[str, int]]:
+        """
+        Every book move for this position.
+
+        Returns:
+            A list of (move, weight), moves in 'e2e4' style. Empty if the position isn't in the book.
+        """
+        if self.map is None:
+            return []
+        key = position.hash
+        moves = []
+        index = self.find_first(key)
+        while index < self.count:
+            entry_key, code, weight, _ = self.read_entry(index)
+            if entry_key != key:
+                break
+            moves.append((decode_move(position, code), weight))
+            index += 1
+        return moves
+
+    def pick_move(self, position: Position, rng: random.Random | None = None) -> str | None:
+        """
+        A random book move, with each move's chance proportional to its weight.
+        """
+        moves = [(move, weight) for move, weight in self.get_moves(position) if weight > 0]
+        if not moves:
+            return None
+        rng = rng or random
+        return rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+_default_book: OpeningBook | None = None
+_book_checked = False
+
+
+def get_book() -> OpeningBook | None:
+    """
+    The book in data/book.bin, opened once. None if there isn't one.
+    """
+    global _default_book, _book_checked
+    if not _book_checked:
+        _book_checked = True
+        if os.path.exists(BOOK_FILE):
+            _default_book = OpeningBook(BOOK_FILE)
+    return _default_book
+
+
+def get_book_move(fen: str, difficulty: int = 1) -> str | None:
+    """
+    A book move for this position, if we're still within this difficulty's book depth.
+
+    Args:
+        fen: The current board state string.
+        difficulty: 1 (Monkey) to 4 (Grandmaster).
+    Returns:
+        A move like 'e2e4', or None (no book, out of book, or too deep for this level).
+    """
+    book = get_book()
+    if book is None:
+        return None
+    position = Position.from_fen(fen)
+    if get_ply(position) >= BOOK_DEPTH.get(difficulty, 8):
+        return None
+    return book.pick_move(position)
+
+
+def build_book(pgn_path: str, book_path: str = BOOK_FILE, max_ply: int = 30) -> int:
+    """
+    Makes a Polyglot book out of a PGN database. Weight = how often the move was played there.
+    (Weights top out at 65535, the format only has 16 bits for them.)
+
+    Returns:
+        The number of entries written.
+    """
+    counts: dict[tuple[int, int], int] = {}
+    with open(pgn_path, "r", encoding="utf-8") as f:
+        for game in pgn.import_games(f):
+            position = Position.from_fen(game["start_fen"])
+            for move in game["moves"][:max_ply]:
+                entry = (position.hash, encode_move(position, move))
+                counts[entry] = counts.get(entry, 0) + 1
+                position.make_move(move)
+
+    with open(book_path, "wb") as f:
+        for (key, code), count in sorted(counts.items()):
+            f.write(ENTRY.pack(key, code, min(count, 0xFFFF), 0))
+    return len(counts)
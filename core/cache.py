@@ -0,0 +1,43 @@
+from collections import OrderedDict
+
+
+class BoundedCache:
+    """
+    A small least-recently-used cache, meant to be keyed by Zobrist hashes (core.zobrist).
+
+    Logic:
+        Every hit moves the entry to the back. Once max_entries is passed, the front (least recently used) goes.
+        So memory stays flat no matter how long the game is.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the cached value, or None if the key isn't here.
+        """
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
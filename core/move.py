@@ -0,0 +1,117 @@
+from array import array
+
+from core.utils import NOTATIONS
+
+# Moves as 16 bit integers:
+#   bits 0-5 from square, bits 6-11 to square (square = row * 8 + col, so a8 = 0 and h1 = 63)
+#   bits 12-14 promotion piece (0 = none, 1-4 = n, b, r, q)
+#   bit 15 flags. Just FLAG_CAPTURE for now, set by the generator (arbiter.generate_move_list).
+# core.packing (game archives) and core.parallel (shared table) use the same layout.
+# A move string can't know it's a capture, so two codes are the same move when they match under MOVE_MASK.
+#
+# A whole move list is an array('H'): two bytes per move in one buffer, instead of a list of tuples of tuples.
+FLAG_CAPTURE = 1 << 15
+MOVE_MASK = FLAG_CAPTURE - 1
+SQUARES_MASK = 0xFFF # From and to, nothing else
+
+PROMOTION_CODES = {'n': 1, 'b': 2, 'r': 3, 'q': 4}
+PROMOTION_PIECES = {code: piece for piece, code in PROMOTION_CODES.items()}
+PROMOTION_SUFFIXES = ["", "n", "b", "r", "q", "", "", ""] # Indexed by bits 12-14
+PROMOTION_ORDER = [4 << 12, 3 << 12, 2 << 12, 1 << 12] # Queen first, she's the one you want 99% of the time
+
+# The lookup tables. Everything a move turns into is precomputed, nobody does chr/ord math per move.
+SQUARE_NAMES = [f"{chr(sq % 8 + 97)}{8 - sq // 8}" for sq in range(64)] # 0 -> 'a8'
+SQUARE_INDEX = {name: sq for sq, name in enumerate(SQUARE_NAMES)} # 'a8' -> 0
+SQUARE_COORDS = [NOTATIONS[name] for name in SQUARE_NAMES] # 0 -> (0, 0), the same tuples change_notations hands out
+MOVE_NAMES = [SQUARE_NAMES[code & 0x3F] + SQUARE_NAMES[code >> 6] for code in range(4096)] # Code & SQUARES_MASK -> 'e2e4'
+
+
+def encode(start: tuple[int, int], end: tuple[int, int], promotion: str = "", flags: int = 0) -> int:
+    """
+    (row, col) squares (+ promotion letter and flags) -> 16 bit integer.
+    """
+    return (start[0] * 8 + start[1]) | (end[0] * 8 + end[1]) << 6 | PROMOTION_CODES.get(promotion, 0) << 12 | flags
+
+
+def encode_move(move: str) -> int:
+    """
+    'e2e4' (or 'e7e8q') -> 16 bit integer.
+    """
+    return SQUARE_INDEX[move[0:2]] | SQUARE_INDEX[move[2:4]] << 6 | PROMOTION_CODES.get(move[4:5].lower(), 0) << 12
+
+
+def decode_move(code: int) -> str:
+    """
+    16 bit integer -> 'e2e4' (or 'e7e8q'). Flags don't show up in the string.
+    """
+    return MOVE_NAMES[code & SQUARES_MASK] + PROMOTION_SUFFIXES[(code >> 12) & 7]
+
+
+def new_move_list(codes=()) -> array:
+    """
+    An empty (or filled) packed move list.
+    """
+    return array('H', codes)
+
+
+class Move:
+    """
+    A packed move with a readable face, for when you want to pass one move around and still know what it is.
+
+    Logic:
+        The only thing inside is the code (__slots__, no per-object __dict__), everything else is a table lookup.
+        Move lists don't wrap every code in one of these, they stay plain array('H') buffers.
+        Wrap the one you care about: Move(codes[i]).
+    """
+
+    __slots__ = ("code",)
+
+    def __init__(self, code: int):
+        self.code = code
+
+    @classmethod
+    def from_string(cls, move: str) -> "Move":
+        return cls(encode_move(move))
+
+    @classmethod
+    def from_coords(cls, start: tuple[int, int], end: tuple[int, int], promotion: str = "") -> "Move":
+        return cls(encode(start, end, promotion))
+
+    @property
+    def start(self) -> tuple[int, int]:
+        return SQUARE_COORDS[self.code & 0x3F]
+
+    @property
+    def end(self) -> tuple[int, int]:
+        return SQUARE_COORDS[(self.code >> 6) & 0x3F]
+
+    @property
+    def promotion(self) -> str:
+        """
+        'n', 'b', 'r', 'q', or '' if the move doesn't promote.
+        """
+        return PROMOTION_SUFFIXES[(self.code >> 12) & 7]
+
+    @property
+    def is_capture(self) -> bool:
+        """
+        Only known for moves that came out of the generator, see FLAG_CAPTURE.
+        """
+        return bool(self.code & FLAG_CAPTURE)
+
+    def __str__(self) -> str:
+        return decode_move(self.code)
+
+    def __repr__(self) -> str:
+        return f"Move('{decode_move(self.code)}')"
+
+    def __int__(self) -> int:
+        return self.code
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Move):
+            return (self.code ^ other.code) & MOVE_MASK == 0
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.code & MOVE_MASK)
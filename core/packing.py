@@ -0,0 +1,58 @@
+import struct
+
+from core.move import PROMOTION_CODES, PROMOTION_PIECES, decode_move, encode_move # Re-exported, core.storage packs its moves with these
+from core.position import Position
+
+# Compact binary positions.
+# Board: 4 bits per square, 64 squares -> 32 bytes. Two squares per byte, high nibble first, a8 to h1.
+# Nibble: 0 = empty, 1-6 = white PNBRQK, 9-14 = black pnbrqk (bit 3 means black).
+# Metadata: flags (u8: bit 0 = black to move, bits 1-4 = KQkq), en passant file (u8, 0xFF = none),
+# half move clock (u16), full move number (u16). 38 bytes in total, vs ~60 for a FEN string.
+PIECE_TO_NIBBLE = {'+': 0, 'P': 1, 'N': 2, 'B': 3, 'R': 4, 'Q': 5, 'K': 6, 'p': 9, 'n': 10, 'b': 11, 'r': 12, 'q': 13, 'k': 14}
+NIBBLE_TO_PIECE = {nibble: piece for piece, nibble in PIECE_TO_NIBBLE.items()}
+CASTLING_BITS = {'K': 2, 'Q': 4, 'k': 8, 'q': 16}
+METADATA = struct.Struct(">BBHH")
+PACKED_SIZE = 32 + METADATA.size
+
+# Moves are 16 bit integers, see core.move for the layout.
+
+
+def pack_position(position: Position) -> bytes:
+    """
+    Squeezes a Position into PACKED_SIZE bytes.
+    """
+    board = position.board
+    packed = bytearray(32)
+    for i in range(32):
+        sq = i * 2
+        high = PIECE_TO_NIBBLE[board[sq >> 3][sq & 7]]
+        low = PIECE_TO_NIBBLE[board[(sq + 1) >> 3][(sq + 1) & 7]]
+        packed[i] = (high << 4) | low
+
+    flags = 1 if position.turn == 'b' else 0
+    for right in position.castling_rights:
+        flags |= CASTLING_BITS.get(right, 0)
+    ep_file = 0xFF if position.en_passant == "-" else ord(position.en_passant[0]) - 97
+    return bytes(packed) + METADATA.pack(flags, ep_file, position.half_timer, position.full_timer)
+
+
+def unpack_position(data: bytes) -> Position:
+    """
+    The other way around. Only looks at the first PACKED_SIZE bytes.
+    """
+    board = [["+"] * 8 for _ in range(8)]
+    for i in range(32):
+        byte = data[i]
+        sq = i * 2
+        board[sq >> 3][sq & 7] = NIBBLE_TO_PIECE[byte >> 4]
+        board[(sq + 1) >> 3][(sq + 1) & 7] = NIBBLE_TO_PIECE[byte & 0x0F]
+
+    flags, ep_file, half_timer, full_timer = METADATA.unpack_from(data, 32)
+    turn = 'b' if flags & 1 else 'w'
+    castling_rights = "".join(right for right, bit in CASTLING_BITS.items() if flags & bit) or "-"
+    en_passant = "-"
+    if ep_file != 0xFF:
+        # The en passant square is on rank 6 if white is to move (black just pushed), rank 3 otherwise
+        en_passant = f"{chr(ep_file + 97)}{6 if turn == 'w' else 3}"
+    return Position(board, turn, castling_rights, en_passant, half_timer, full_timer)
+
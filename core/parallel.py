@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core import search
+from core.move import decode_move
+from core.position import Position
+from core.rules import arbiter
+
+# Multi-core version of core.search. One Python process = one core, so we use processes, not threads.
+#
+# Root split: the root moves are dealt out round-robin, every worker runs its own iterative deepening on its share.
+# Lazy SMP: all workers read and write ONE transposition table in shared memory, so whatever one worker
+# learns about a position (transpositions between root moves are everywhere) the others get for free.
+# Workers that got no root moves (more workers than moves) just search everything one ply deeper to fill the table.
+
+DEFAULT_TABLE_ENTRIES = 1 << 20 # Two u64s each, 16 MB
+
+# Workers are spawned, never forked. The pool gets created from core.ai's engine thread, and forking a process
+# that has other threads running copies their locks in whatever state they happen to be (Python 3.12+ warns about it).
+# Spawning costs an interpreter start plus the core imports per worker, so ParallelSearcher pays it up front (warm_up).
+START_METHOD = "spawn"
+#
+# What to expect from `bench.py search` (nodes/sec vs one process, same time per move):
+# near-linear up to the number of physical cores, minus the shared table's collisions and the root split's idle tails.
+# More workers than cores only time-slice. The only numbers measured so far are from a 1 CPU box
+# (1, 2 and 4 workers: 1.00x, 0.79x, 0.76x), which is single-core time slicing overhead, NOT a scaling result.
+# bench.py prints the core count next to the numbers, so a run on a real multi-core machine says which case it is.
+
+# Shared table entry layout, packed into one u64 ("data"):
+# bits 0-15 best move (the whole core.move code, flags included), bit 16 'there is a move',
+# bits 17-18 flag, bits 19-26 depth, bits 27+ score + SCORE_OFFSET.
+SCORE_OFFSET = search.INFINITY
+MASK_64 = (1 << 64) - 1
+
+
+class SharedTable:
+    """
+    A transposition table in shared memory that several processes hit at the same time, without locks.
+
+    Logic:
+        Every slot is two u64s: (key XOR data, data). A reader recomputes key XOR data and only trusts the
+        entry if it matches. If two processes wrote the same slot at the same time and we read half of each,
+        the check fails and it just counts as a miss. (The classic "lockless hashing" trick.)
+        Collisions get replaced, always. Simple and good enough.
+
+    Looks like the dict core.search.Searcher uses (get / [] = / len / clear), so it plugs right in.
+    """
+
+    def __init__(self, array, entries: int):
+        self.array = array
+        self.entries = entries
+
+    @classmethod
+    def create(cls, entries: int = DEFAULT_TABLE_ENTRIES) -> "SharedTable":
+        return cls(multiprocessing.RawArray('Q', entries * 2), entries)
+
+    def get(self, key: int):
+        slot = (key % self.entries) * 2
+        check, data = self.array[slot], self.array[slot + 1]
+        if check ^ data != key or (check == 0 and data == 0):
+            return None
+        move = data & 0xFFFF if data & 0x10000 else None
+        return ((data >> 19) & 0xFF, (data >> 27) - SCORE_OFFSET, (data >> 17) & 0x3, move)
+
+    def __setitem__(self, key: int, value: tuple):
+        depth, score, flag, move = value
+        data = (max(depth, 0) & 0xFF) << 19 | flag << 17 | (score + SCORE_OFFSET) << 27
+        if move is not None:
+            data |= move | 0x10000
+        slot = (key % self.entries) * 2
+        self.array[slot] = (key ^ data) & MASK_64
+        self.array[slot + 1] = data
+
+    def __len__(self) -> int:
+        return 0 # Fixed size, so the Searcher never needs to clear it
+
+    def clear(self):
+        for i in range(self.entries * 2):
+            self.array[i] = 0
+
+
+# Set once in every worker process by the pool initializer
+_worker_table: SharedTable | None = None
+
+
+def _init_worker(array, entries: int):
+    global _worker_table
+    _worker_table = SharedTable(array, entries)
+
+
+def _warm_up() -> int:
+    return os.getpid() # Getting here means the worker is up and has imported everything
+
+
+def _search_share(fen: str, moves: list, max_depth: int, time_limit: float, store_root: bool) -> dict:
+    """
+    What one worker does: iterative deepening over its share of the root moves, on the shared table.
+    """
+    position = Position.from_fen(fen)
+    searcher = search.Searcher(position, max_depth, time_limit, table=_worker_table)
+    iterations = searcher.iterate(moves, store_root)
+    return {"iterations": iterations, "nodes": searcher.nodes}
+
+
+class ParallelSearcher:
+    """
+    A pool of search processes plus their shared transposition table. Keep one around,
+    starting processes costs way more than a search at the easy levels.
+    """
+
+    def __init__(self, workers: int = 2, table_entries: int = DEFAULT_TABLE_ENTRIES):
+        self.workers = max(1, workers)
+        self.table = SharedTable.create(table_entries)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=_init_worker,
+            initargs=(self.table.array, self.table.entries),
+        )
+        self.warm_up()
+
+    def warm_up(self):
+        """
+        Starts every worker now instead of inside the first search's time budget.
+        Workers are spawned on demand, and nobody is idle yet, so each of these submits starts one.
+        """
+        for future in [self.executor.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def search(self, fen: str, max_depth: int = 4, time_limit: float = 1.0) -> dict:
+        """
+        Parallel version of search.search_position.
+
+        Process:
+        1. Deal the root moves out to the workers (round robin, after a cheap ordering so every worker gets some good ones).
+        2. Every worker deepens on its own share. Spare workers search everything, one ply deeper, as table fillers.
+        3. Take the deepest depth that EVERY root-split worker finished, and the best move at that depth.
+           Comparing scores from different depths would be comparing apples to slightly deeper apples.
+
+        Returns:
+            Same dictionary as search.search_position, plus 'workers'.
+        """
+        start = time.perf_counter()
+        position = Position.from_fen(fen)
+        moves = arbiter.generate_move_list(position)
+        result = {"move": None, "score": 0, "depth": 0, "nodes": 0, "seconds": 0.0, "nps": 0, "workers": self.workers}
+
+        if len(moves) <= 1:
+            result["move"] = decode_move(moves[0]) if moves else None
+        else:
+            moves = search.Searcher(position, 1, time_limit).order_moves(moves, 0, None)
+            shares = [moves[i::self.workers] for i in range(self.workers)]
+            futures = []
+            for share in shares:
+                if share:
+                    futures.append((True, self.executor.submit(_search_share, fen, share, max_depth, time_limit, False)))
+                else:
+                    futures.append((False, self.executor.submit(_search_share, fen, moves, max_depth + 1, time_limit, True)))
+
+            reports = [(is_split, future.result()) for is_split, future in futures]
+            result["nodes"] = sum(report["nodes"] for _, report in reports)
+            split = [report["iterations"] for is_split, report in reports if is_split]
+            common_depth = min((len(iterations) for iterations in split), default=0)
+
+            best_move, best_score = moves[0], -search.INFINITY
+            if common_depth > 0:
+                for iterations in split:
+                    depth, move, score = iterations[common_depth - 1]
+                    if score > best_score:
+                        best_move, best_score = move, score
+            else:
+                best_score = 0
+            result.update(move=decode_move(best_move), score=best_score, depth=common_depth)
+
+        seconds = time.perf_counter() - start
+        result["seconds"] = seconds
+        result["nps"] = int(result["nodes"] / seconds) if seconds > 0 else 0
+        return result
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def search_parallel(fen: str, workers: int = 2, max_depth: int = 4, time_limit: float = 1.0) -> dict:
+    """
+    One-off parallel search. Spins up and tears down a pool, so prefer a ParallelSearcher for repeated use.
+    """
+    searcher = ParallelSearcher(workers)
+    try:
+        return searcher.search(fen, max_depth, time_limit)
+    finally:
+        searcher.close()
@@ -0,0 +1,213 @@
+import time
+from array import array
+
+from core.bitboard import BitboardPosition
+from core.move import decode_move
+from core.position import Position
+from core.rules import arbiter
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# What perft walks with. 'list' is the game's own Position through core.rules, on whichever backend
+# arbiter.set_backend picked (list board walks, or bitboard masks). 'bitboard' is a standalone core.bitboard
+# BitboardPosition with its own make/unmake, sharing no move code with Position: same counts from both, or one has a bug.
+GENERATORS = {"list": Position, "bitboard": BitboardPosition}
+
+# The standard perft positions (chessprogramming.org "Perft Results") plus a few edge cases of our own.
+# 'counts' are the published leaf counts for depth 1, 2, 3...
+# 'depth' is how deep the suite goes by default, 'baseline_nps' is what this tree did at that depth when the suite was added.
+# If a speedup is real, nps goes up. If a count changes, something broke (or got fixed).
+STANDARD_POSITIONS: list[dict] = [
+    {
+        "name": "start",
+        "fen": START_FEN,
+        "counts": [20, 400, 8902, 197281],
+        "depth": 3,
+        "baseline_nps": 25000,
+    },
+    {
+        "name": "kiwipete",
+        "fen": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "counts": [48, 2039, 97862],
+        "depth": 3,
+        "baseline_nps": 27000,
+    },
+    {
+        "name": "rook-endgame",
+        "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "counts": [14, 191, 2812, 43238],
+        "depth": 3,
+        "baseline_nps": 17000,
+    },
+    {
+        "name": "promotions",
+        "fen": "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "counts": [6, 264, 9467],
+        "depth": 3,
+        "baseline_nps": 21000,
+    },
+    {
+        "name": "middlegame",
+        "fen": "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        "counts": [44, 1486, 62379],
+        "depth": 3,
+        "baseline_nps": 23000,
+    },
+    {
+        "name": "quiet-middlegame",
+        "fen": "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        "counts": [46, 2079, 89890],
+        "depth": 3,
+        "baseline_nps": 34000,
+    },
+    {
+        "name": "underpromotion",
+        "fen": "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",
+        "counts": [24, 496, 9483],
+        "depth": 3,
+        "baseline_nps": 12000,
+    },
+    {
+        "name": "en-passant-pin",
+        "fen": "8/8/8/K2pP2r/8/8/8/7k w - d6 0 1",
+        "counts": [6, 78, 528, 8288],
+        "depth": 3,
+        "baseline_nps": 10000,
+    },
+    {
+        "name": "castling",
+        "fen": "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1",
+        "counts": [26, 568, 13744],
+        "depth": 3,
+        "baseline_nps": 19000,
+    },
+]
+
+
+def get_all_moves(position: Position | BitboardPosition) -> array | list[str]:
+    """
+    Lists every legal move for the side to move, promotions once per piece.
+
+    Args:
+        position: The position to generate for.
+    Returns:
+        array('H') of core.move codes for a Position, 'e2e4' strings for a BitboardPosition.
+        Either way, hand them to get_player(position).
+    """
+    if isinstance(position, BitboardPosition):
+        return position.get_all_moves()
+    return arbiter.generate_move_list(position)
+
+
+def get_player(position: Position | BitboardPosition):
+    """
+    The make_move that takes what get_all_moves gives out.
+    """
+    return position.make_move if isinstance(position, BitboardPosition) else position.make_packed_move
+
+
+def count_nodes(position: Position | BitboardPosition, depth: int) -> int:
+    """
+    The actual perft walk. Moves are made and unmade on the same Position, so no FEN is ever built.
+
+    Logic:
+        Walk every legal move, play it, and recurse until depth runs out.
+        At depth 1 we don't bother playing the moves, we just count them (bulk counting).
+    """
+    if depth <= 0:
+        return 1
+
+    moves = get_all_moves(position)
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    play = get_player(position)
+    for move in moves:
+        play(move)
+        nodes += count_nodes(position, depth - 1)
+        position.unmake_move()
+    return nodes
+
+
+def perft(fen_string: str, depth: int, generator: str = "list") -> int:
+    """
+    Counts the leaf nodes of the legal move tree from a position.
+
+    Args:
+        fen_string: The root position.
+        depth: How many plies deep to walk.
+        generator: 'list' (core.rules on a core.position Position, what the game plays with)
+            or 'bitboard' (core.bitboard, the independent cross-check).
+    Returns:
+        int: The number of leaf nodes.
+    """
+    return count_nodes(GENERATORS[generator].from_fen(fen_string), depth)
+
+
+def divide(fen_string: str, depth: int, generator: str = "list") -> dict[str, int]:
+    """
+    Perft, but broken down per root move. The go-to tool for finding which move a bug hides behind.
+
+    Args:
+        fen_string: The root position.
+        depth: How many plies deep to walk (including the root move).
+        generator: 'list' or 'bitboard'.
+    Returns:
+        dict[str, int]: Move string -> leaf nodes under that move.
+    """
+    position = GENERATORS[generator].from_fen(fen_string)
+    breakdown: dict[str, int] = {}
+    play = get_player(position)
+    for move in get_all_moves(position):
+        play(move)
+        breakdown[move if isinstance(move, str) else decode_move(move)] = count_nodes(position, depth - 1)
+        position.unmake_move()
+    return breakdown
+
+
+def run_perft(fen_string: str, depth: int, generator: str = "list") -> dict:
+    """
+    Runs perft and times it.
+
+    Returns:
+        A dictionary with 'nodes', 'seconds' and 'nps' (nodes per second).
+    """
+    start = time.perf_counter()
+    nodes = perft(fen_string, depth, generator)
+    seconds = time.perf_counter() - start
+    return {
+        "nodes": nodes,
+        "seconds": seconds,
+        "nps": int(nodes / seconds) if seconds > 0 else 0,
+    }
+
+
+def run_suite(positions: list[dict] | None = None, depth: int | None = None, generator: str = "list") -> list[dict]:
+    """
+    Runs perft over the standard positions and compares against the known counts.
+
+    Args:
+        positions: The positions to run. Defaults to STANDARD_POSITIONS.
+        depth: Overrides every position's default depth (capped at the deepest known count).
+        generator: 'list' or 'bitboard'.
+    Returns:
+        A list of result dictionaries, one per position.
+    """
+    if positions is None:
+        positions = STANDARD_POSITIONS
+
+    results: list[dict] = []
+    for entry in positions:
+        run_depth = min(depth or entry["depth"], len(entry["counts"]))
+        result = run_perft(entry["fen"], run_depth, generator)
+        expected = entry["counts"][run_depth - 1]
+        result.update({
+            "name": entry["name"],
+            "depth": run_depth,
+            "expected": expected,
+            "passed": result["nodes"] == expected,
+            "baseline_nps": entry["baseline_nps"],
+        })
+        results.append(result)
+    return results
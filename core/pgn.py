@@ -0,0 +1,291 @@
+import re
+
+from core import storage
+from core.position import Position
+from core.rules import arbiter
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+# Movetext tokens: comments, variations, NAGs, move numbers, results, and finally SAN moves.
+TOKEN_PATTERN = re.compile(r'\{[^}]*\}|;[^\n]*|\(|\)|\$\d+|\d+\.(?:\.\.)?|1-0|0-1|1/2-1/2|\*|[^\s(){};$]+')
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+# The Seven Tag Roster. Every PGN game has these, in this order.
+ROSTER_TAGS = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+LINE_WIDTH = 80
+
+
+def read_games(stream):
+    """
+    Streams games out of a PGN file, one at a time. Only the current game is ever in memory.
+
+    Args:
+        stream: Anything you can iterate lines out of (an open file, usually).
+    Yields:
+        A dictionary per game: 'headers' (tag -> value), 'moves' (list of SAN strings, main line only), 'result'.
+    """
+    headers: dict[str, str] = {}
+    movetext: list[str] = []
+    for line in stream:
+        stripped = line.strip()
+        if stripped.startswith("["):
+            if movetext:
+                # A tag after movetext means the previous game is over (some files forget the result token)
+                yield parse_movetext(headers, " ".join(movetext))
+                headers, movetext = {}, []
+            match = TAG_PATTERN.match(stripped)
+            if match:
+                headers[match.group(1)] = match.group(2).replace('\\"', '"')
+            continue
+        if stripped:
+            movetext.append(stripped)
+            if stripped.split()[-1] in RESULTS:
+                yield parse_movetext(headers, " ".join(movetext))
+                headers, movetext = {}, []
+    if movetext or headers:
+        yield parse_movetext(headers, " ".join(movetext))
+
+
+def parse_movetext(headers: dict[str, str], text: str) -> dict:
+    """
+    Pulls the main line SAN moves out of movetext, skipping comments, variations, NAGs and move numbers.
+    """
+    moves: list[str] = []
+    result = headers.get("Result", "*")
+    depth = 0 # Variation nesting. We only want depth 0.
+    for token in TOKEN_PATTERN.findall(text):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth = max(depth - 1, 0)
+        elif depth or token[0] in "{;$" or token[0].isdigit() and token.endswith("."):
+            continue
+        elif token in RESULTS:
+            result = token
+        else:
+            moves.append(token)
+    return {"headers": headers, "moves": moves, "result": result}
+
+
+def get_start_fen(game: dict) -> str:
+    """
+    Where the game starts. Games from a set-up position carry a FEN tag.
+    """
+    return game["headers"].get("FEN", START_FEN)
+
+
+def parse_san(position: Position, san: str) -> str:
+    """
+    Turns a SAN move ('Nbd7', 'exd5', 'O-O', 'e8=Q+') into our 'e2e4' style move.
+
+    Logic:
+        Strip the decorations, figure out the piece, the target square and any disambiguation,
+        then pick the one legal move (from the cached arbiter report) that fits.
+
+    Args:
+        position: The position the move is played in.
+        san: The move in Standard Algebraic Notation.
+    Returns:
+        The move string, with the promotion piece added ('e7e8q') if there is one.
+    Raises:
+        ValueError: If no legal move (or more than one) matches.
+    """
+    text = san.rstrip("+#!?")
+    color = position.turn
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        # The King's two-square step, if the arbiter says castling is on (rights, empty squares, no check)
+        row = 7 if color == 'w' else 0
+        castle = ((row, 4), (row, 6 if len(text) == 3 else 2))
+        if castle not in arbiter.analyze_position(position)["moves"] or position.board[row][4] not in "Kk":
+            raise ValueError(f"Illegal SAN move '{san}' in {position.to_fen()}")
+        return f"e{8 - row}{'g' if castle[1][1] == 6 else 'c'}{8 - row}"
+
+    promotion = ""
+    if "=" in text:
+        text, promotion = text.split("=", 1)
+        promotion = promotion[:1].lower()
+    elif len(text) > 2 and text[-1] in "QRBNqrbn" and text[-2].isdigit():
+        promotion = text[-1].lower() # 'e8Q' without the '='
+        text = text[:-1]
+
+    piece = text[0] if text[0] in "NBRQK" else "P"
+    if piece != "P":
+        text = text[1:]
+    text = text.replace("x", "").replace("-", "")
+    if len(text) < 2:
+        raise ValueError(f"Can't read SAN move '{san}'")
+
+    target = (8 - int(text[-1]), ord(text[-2]) - 97)
+    hint = text[:-2] # Disambiguation: a file, a rank, or both
+    hint_col = ord(hint[0]) - 97 if hint and hint[0].isalpha() else None
+    hint_row = 8 - int(hint[-1]) if hint and hint[-1].isdigit() else None
+
+    piece_char = piece if color == 'w' else piece.lower()
+    board = position.board
+    matches = [
+        (start, end) for start, end in arbiter.analyze_position(position)["moves"]
+        if end == target and board[start[0]][start[1]] == piece_char
+        and (hint_col is None or start[1] == hint_col) and (hint_row is None or start[0] == hint_row)
+    ]
+    if len(matches) != 1:
+        raise ValueError(f"{'Ambiguous' if matches else 'Illegal'} SAN move '{san}' in {position.to_fen()}")
+
+    (sr, sc), (er, ec) = matches[0]
+    return f"{chr(sc + 97)}{8 - sr}{chr(ec + 97)}{8 - er}{promotion}"
+
+
+def iter_positions(game: dict):
+    """
+    Replays a parsed game.
+
+    Yields:
+        (position, move) for every move: the position BEFORE the move (shared and mutated, copy it if you keep it)
+        and the move in 'e2e4' style. Raises ValueError at the first move that doesn't make sense.
+    """
+    position = Position.from_fen(get_start_fen(game))
+    for san in game["moves"]:
+        move = parse_san(position, san)
+        yield position, move
+        position.make_move(move)
+
+
+def get_san(position: Position, move: str) -> str:
+    """
+    Turns our 'e2e4' style move into SAN ('e4', 'Nbd7', 'exd5', 'O-O', 'e8=Q#').
+
+    Logic:
+        Disambiguation only needs the legal moves of THIS position, and the +/# suffix only needs the legal
+        moves of the NEXT one. Both come from arbiter.analyze_position, which caches by hash,
+        so when writing a whole game every position gets its moves generated exactly once:
+        the 'next position' lookup for move n is the 'this position' lookup for move n + 1.
+
+    Args:
+        position: The position the move is played in. Left exactly as it was.
+        move: The move, like 'e2e4' (or 'e7e8n' for a promotion).
+    Returns:
+        The SAN string.
+    """
+    board = position.board
+    start = (8 - int(move[1]), ord(move[0]) - 97)
+    end = (8 - int(move[3]), ord(move[2]) - 97)
+    piece = board[start[0]][start[1]]
+    p_type = piece.upper()
+    is_capture = board[end[0]][end[1]] != "+"
+
+    if p_type == "K" and abs(start[1] - end[1]) == 2:
+        san = "O-O" if end[1] > start[1] else "O-O-O"
+    elif p_type == "P":
+        if start[1] != end[1]:
+            san = f"{move[0]}x{move[2:4]}" # Covers en passant too, which lands on an empty square
+        else:
+            san = move[2:4]
+        if end[0] in (0, 7):
+            san += "=" + (move[4:5] or "q").upper()
+    else:
+        # Other pieces of the same kind that could also go there
+        rivals = [other for other, target in arbiter.analyze_position(position)["moves"]
+                  if target == end and other != start and board[other[0]][other[1]] == piece]
+        hint = ""
+        if rivals:
+            if all(other[1] != start[1] for other in rivals):
+                hint = move[0] # The file is enough
+            elif all(other[0] != start[0] for other in rivals):
+                hint = move[1] # The rank is enough
+            else:
+                hint = move[0:2] # Three queens. It happens.
+        san = f"{p_type}{hint}{'x' if is_capture else ''}{move[2:4]}"
+
+    position.make_move(move)
+    report = arbiter.analyze_position(position)
+    position.unmake_move()
+    if report["state"] == "CHECKMATE":
+        san += "#"
+    elif report["in_check"]:
+        san += "+"
+    return san
+
+
+def get_movetext(start_fen: str, moves: list[str], result: str = "*") -> str:
+    """
+    Builds the numbered movetext ('1. e4 e5 2. Nf3 ...'), wrapped at LINE_WIDTH like PGN wants.
+    """
+    position = Position.from_fen(start_fen)
+    tokens = []
+    for i, move in enumerate(moves):
+        if position.turn == 'w':
+            tokens.append(f"{position.full_timer}.")
+        elif i == 0:
+            tokens.append(f"{position.full_timer}...") # Black starts (set-up position)
+        tokens.append(get_san(position, move))
+        position.make_move(move)
+    tokens.append(result)
+
+    lines, line = [], ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_WIDTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def write_game(stream, moves: list[str], headers: dict[str, str] | None = None, start_fen: str = START_FEN):
+    """
+    Writes one game as PGN. Call it once per game on the same stream to write a whole database.
+
+    Args:
+        stream: Anything with .write (an open file, usually).
+        moves: The moves in 'e2e4' style.
+        headers: Tag pairs. Missing Seven Tag Roster tags are filled with '?'.
+        start_fen: Where the game started. Non-standard starts get the FEN/SetUp tags.
+    """
+    headers = dict(headers or {})
+    headers.setdefault("Result", "*")
+    if start_fen != START_FEN:
+        headers.setdefault("SetUp", "1")
+        headers.setdefault("FEN", start_fen)
+
+    for tag in ROSTER_TAGS:
+        value = headers.get(tag, "?").replace('"', '\\"')
+        stream.write(f'[{tag} "{value}"]\n')
+    for tag, value in headers.items():
+        if tag not in ROSTER_TAGS:
+            stream.write(f'[{tag} "{value}"]\n')
+    stream.write("\n" + get_movetext(start_fen, moves, headers["Result"]) + "\n\n")
+
+
+def import_games(stream):
+    """
+    read_games + SAN conversion in one go, for bulk imports.
+    Each game is replayed on a single Position with make_move, so no FEN gets parsed or built per move.
+
+    Yields:
+        A dictionary per game: 'headers', 'start_fen', 'moves' ('e2e4' style), 'result',
+        and 'error' (None, or why the game stopped replaying. 'moves' then has everything up to that point).
+    """
+    for game in read_games(stream):
+        moves, error = [], None
+        try:
+            for _, move in iter_positions(game):
+                moves.append(move)
+        except ValueError as e:
+            error = str(e)
+        yield {"headers": game["headers"], "start_fen": get_start_fen(game), "moves": moves, "result": game["result"], "error": error}
+
+
+def export_history(path: str, headers: dict[str, str] | None = None) -> int:
+    """
+    Writes the current game (the history log, see core.storage) as a PGN file.
+
+    Returns:
+        The number of moves written.
+    """
+    history = storage.read_history()
+    if not history:
+        return 0
+    moves = [str(move) for move, _ in history[1:]]
+    with open(path, "w", encoding="utf-8") as f:
+        write_game(f, moves, headers, history[0][1])
+    return len(moves)
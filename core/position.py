@@ -0,0 +1,263 @@
+from core.bitboard import PIECE_INDEX
+from core.board import parse_fen, change_board_to_fen
+from core.move import PROMOTION_PIECES, SQUARE_COORDS
+from core.utils import change_notations
+from core import profiler, zobrist
+
+# Rook squares whose piece leaving (or dying) kills a castling right.
+CASTLING_ROOK_SQUARES = {(7, 0): "Q", (7, 7): "K", (0, 0): "q", (0, 7): "k"}
+
+
+class Position:
+    """
+    A mutable board plus all the FEN metadata.
+
+    Logic:
+        update_board_state takes a FEN and gives back a FEN, which means parsing and serializing on every single move.
+        A Position instead changes its board in place with make_move and remembers just enough
+        (an undo record) to put everything back with unmake_move. A FEN is only built when someone asks for it.
+
+        It also keeps track of where everything is, so nobody has to scan 64 squares for it:
+        king_squares: 'w'/'b' -> the King's (row, col), or None if he is missing.
+        piece_squares: 'w'/'b' -> set of (row, col) occupied by that side.
+        material: piece char -> how many of them are on the board.
+        bitboards: one int per piece type and color (core.bitboard order), for core.rules' bitboard backend.
+            The list board is still the real thing (main.py and the renderer read it), these just follow it around.
+        hash: the Polyglot-compatible Zobrist key (core.zobrist), XORed along as pieces come and go.
+        hash_counts: hash -> how many times that position has been on the board (this one included).
+            make_move counts the new position in, unmake_move counts it back out,
+            so "is this a threefold repetition?" is one dict lookup instead of replaying the game.
+    """
+
+    def __init__(self, board: list[list[str]], turn: str = "w", castling_rights: str = "KQkq", en_passant: str = "-", half_timer: int = 0, full_timer: int = 1):
+        self.board = board
+        self.turn = turn
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.half_timer = half_timer
+        self.full_timer = full_timer
+        self.undo_stack: list[tuple] = []
+
+        # One scan now, incremental updates from here on
+        self.king_squares: dict[str, tuple[int, int] | None] = {'w': None, 'b': None}
+        self.piece_squares: dict[str, set[tuple[int, int]]] = {'w': set(), 'b': set()}
+        self.material: dict[str, int] = {piece: 0 for piece in "PNBRQKpnbrqk"}
+        self.bitboards: list[int] = [0] * 12
+        # Same bookkeeping as _track_add, inlined: this loop runs for every Position.from_fen
+        piece_keys = zobrist.PIECE_KEYS
+        material = self.material
+        bitboards = self.bitboards
+        white_squares, black_squares = self.piece_squares['w'], self.piece_squares['b']
+        key = 0
+        for r, row in enumerate(board):
+            for c, piece in enumerate(row):
+                if piece == "+":
+                    continue
+                key ^= piece_keys[piece][r][c]
+                material[piece] += 1
+                bitboards[PIECE_INDEX[piece]] |= 1 << (r * 8 + c)
+                if piece.isupper():
+                    white_squares.add((r, c))
+                else:
+                    black_squares.add((r, c))
+                if piece == "K":
+                    self.king_squares['w'] = (r, c)
+                elif piece == "k":
+                    self.king_squares['b'] = (r, c)
+        self.hash = key
+        self.hash ^= self._metadata_key()
+        self.hash_counts: dict[int, int] = {self.hash: 1}
+
+    @classmethod
+    def from_fen(cls, fen_string: str) -> "Position":
+        """
+        Builds a Position from a complete FEN string. The parsing comes out of core.board's FEN cache.
+        """
+        parsed = parse_fen(fen_string)
+        return cls(
+            parsed.get_board(),
+            turn=parsed.turn,
+            castling_rights=parsed.castling_rights,
+            en_passant=parsed.en_passant,
+            half_timer=parsed.half_timer,
+            full_timer=parsed.full_timer,
+        )
+
+    def to_fen(self) -> str:
+        """
+        Serializes the position back into a FEN string. Only call this when you actually need a string.
+        """
+        return change_board_to_fen(
+            self.board,
+            turn=self.turn,
+            castling_rights=self.castling_rights,
+            en_passant=self.en_passant,
+            half_timer=self.half_timer,
+            full_timer=self.full_timer,
+        )
+
+    def copy(self) -> "Position":
+        """
+        Returns an independent copy (without the undo history, but with the repetition counts).
+        """
+        profiler.COUNTERS["board_copies"] += 1
+        position = Position([row[:] for row in self.board], self.turn, self.castling_rights, self.en_passant, self.half_timer, self.full_timer)
+        position.hash_counts = dict(self.hash_counts)
+        return position
+
+    def get_repetitions(self) -> int:
+        """
+        How many times the current position has occurred (1 = first time). 3 means it's a draw.
+        """
+        return self.hash_counts.get(self.hash, 0)
+
+    def _metadata_key(self) -> int:
+        return (zobrist.get_castling_key(self.castling_rights)
+                ^ zobrist.get_en_passant_key(self.board, self.en_passant, self.turn)
+                ^ zobrist.get_turn_key(self.turn))
+
+    def _track_add(self, pos: tuple[int, int], piece: str) -> None:
+        color = "w" if piece.isupper() else "b"
+        self.hash ^= zobrist.PIECE_KEYS[piece][pos[0]][pos[1]]
+        self.bitboards[PIECE_INDEX[piece]] ^= 1 << (pos[0] * 8 + pos[1])
+        self.piece_squares[color].add(pos)
+        self.material[piece] = self.material.get(piece, 0) + 1
+        if piece in "Kk":
+            self.king_squares[color] = pos
+
+    def _track_remove(self, pos: tuple[int, int], piece: str) -> None:
+        color = "w" if piece.isupper() else "b"
+        self.hash ^= zobrist.PIECE_KEYS[piece][pos[0]][pos[1]]
+        self.bitboards[PIECE_INDEX[piece]] ^= 1 << (pos[0] * 8 + pos[1])
+        self.piece_squares[color].discard(pos)
+        self.material[piece] -= 1
+        if piece in "Kk" and self.king_squares[color] == pos:
+            self.king_squares[color] = None
+
+    def _put(self, pos: tuple[int, int], piece: str) -> None:
+        """
+        Puts a piece on an EMPTY square, keeping the trackers in sync.
+        """
+        self.board[pos[0]][pos[1]] = piece
+        self._track_add(pos, piece)
+
+    def _take(self, pos: tuple[int, int]) -> str:
+        """
+        Lifts whatever is on a square (returns '+' if nothing), keeping the trackers in sync.
+        """
+        piece = self.board[pos[0]][pos[1]]
+        if piece != "+":
+            self.board[pos[0]][pos[1]] = "+"
+            self._track_remove(pos, piece)
+        return piece
+
+    def make_move(self, move: str) -> tuple:
+        """
+        Plays a move in place and handles ALL the side effects (Castling, En Passant, Promotion, Rights Update).
+        The move is NOT checked for legality, that is the arbiter's job.
+
+        Args:
+            move: a str in the format 'e2e4' (start_pos + end_pos), plus the promotion piece for promotions ('e7e8n').
+                A promotion without one becomes a Queen.
+        Returns:
+            tuple: The undo record, which is also pushed onto undo_stack.
+        """
+        return self._play(change_notations(move[0:2]), change_notations(move[2:4]), move[4:5].lower() or "q")
+
+    def make_packed_move(self, code: int) -> tuple:
+        """
+        make_move for a 16 bit core.move code (what arbiter.generate_move_list hands out). No strings involved.
+        """
+        return self._play(SQUARE_COORDS[code & 0x3F], SQUARE_COORDS[(code >> 6) & 0x3F], PROMOTION_PIECES.get((code >> 12) & 7, "q"))
+
+    def _play(self, start_pos: tuple[int, int], end_pos: tuple[int, int], promotion: str) -> tuple:
+        """
+        The actual move, shared by make_move and make_packed_move.
+        'promotion' is the lowercase piece a pawn reaching the last rank turns into. Ignored for every other move.
+        """
+        sr, sc = start_pos
+        er, ec = end_pos
+        old_hash = self.hash
+        self.hash ^= self._metadata_key() # Out with the old rights/en passant/turn, the new ones go in at the end
+
+        piece = self._take(start_pos)
+        captured = self._take(end_pos)
+        captured_pos = end_pos
+        rook_move = None
+        p_type = piece.lower()
+        color = "w" if piece.isupper() else "b"
+
+        # Castling. The king moving two columns drags the rook along.
+        if p_type == 'k' and abs(sc - ec) > 1:
+            rook_col, rook_dest_col = (7, 5) if ec > sc else (0, 3)
+            self._put((sr, rook_dest_col), self._take((sr, rook_col)))
+            rook_move = ((sr, rook_col), (sr, rook_dest_col))
+
+        # En Passant. A pawn moving diagonally into an empty square kills the pawn behind it.
+        if p_type == 'p' and sc != ec and captured == "+":
+            captured_pos = (er + (1 if color == 'w' else -1), ec)
+            captured = self._take(captured_pos)
+
+        # Promotion, to whatever the move asked for (Queen if it didn't say). Same as update_board_state.
+        if p_type == 'p' and er in (0, 7):
+            self._put(end_pos, promotion.upper() if color == 'w' else promotion)
+        else:
+            self._put(end_pos, piece)
+
+        # Everything we need to put the metadata back, plus what happened on the board.
+        record = (start_pos, end_pos, piece, captured, captured_pos, rook_move,
+                  self.castling_rights, self.en_passant, self.half_timer, self.full_timer, old_hash)
+
+        # Castling rights
+        rights = self.castling_rights
+        if p_type == 'k':
+            rights = rights.replace("K", "").replace("Q", "") if color == 'w' else rights.replace("k", "").replace("q", "")
+        for square in (start_pos, end_pos): # A rook leaving or dying on its home square
+            if square in CASTLING_ROOK_SQUARES:
+                rights = rights.replace(CASTLING_ROOK_SQUARES[square], "")
+        self.castling_rights = rights or "-"
+
+        # En Passant target
+        if p_type == 'p' and abs(sr - er) == 2:
+            self.en_passant = f"{chr(sc + 97)}{8 - (sr + er) // 2}"
+        else:
+            self.en_passant = "-"
+
+        # Timers & Turn
+        if p_type == 'p' or captured != "+":
+            self.half_timer = 0
+        else:
+            self.half_timer += 1
+        if color == 'b':
+            self.full_timer += 1
+        self.turn = "b" if self.turn == "w" else "w"
+        self.hash ^= self._metadata_key()
+        self.hash_counts[self.hash] = self.hash_counts.get(self.hash, 0) + 1
+
+        self.undo_stack.append(record)
+        return record
+
+    def unmake_move(self) -> None:
+        """
+        Takes back the last move made with make_move, using its undo record.
+        """
+        count = self.hash_counts[self.hash] - 1
+        if count:
+            self.hash_counts[self.hash] = count
+        else:
+            del self.hash_counts[self.hash] # Keeps the table as small as the game (the search makes and unmakes a LOT)
+
+        (start_pos, end_pos, piece, captured, captured_pos, rook_move,
+         self.castling_rights, self.en_passant, self.half_timer, self.full_timer, old_hash) = self.undo_stack.pop()
+
+        self._take(end_pos) # Whatever is standing there now (might be a freshly promoted queen)
+        self._put(start_pos, piece)
+        if captured != "+":
+            self._put(captured_pos, captured) # Same as end_pos unless it was en passant
+
+        if rook_move:
+            rook_home, rook_dest = rook_move
+            self._put(rook_home, self._take(rook_dest))
+
+        self.turn = "b" if self.turn == "w" else "w"
+        self.hash = old_hash # The XORs above cancel out anyway, but the stored key is cheaper than recomputing metadata
@@ -0,0 +1,116 @@
+import cProfile
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+# Where the time of a turn goes: the engine, the rules code or the terminal.
+# Off by default. main.py --profile turns it on and writes the report when the game ends.
+#
+# Phases are timed with timed("name") around the interesting calls (main.py, core.ai).
+# Counters are plain dict increments in the move generator, cheap enough to always run:
+#   generations: generate_all_legal_moves calls
+#   moves_generated: legal moves those calls produced
+#   board_simulations: king steps / en passant captures tried on the board and taken back
+#   board_copies: Position.copy calls (full 8x8 board copies)
+
+ENABLED = False
+COUNTERS = {"generations": 0, "moves_generated": 0, "board_simulations": 0, "board_copies": 0}
+
+TURNS: list[dict] = [] # One per game loop iteration: label, phase -> seconds, counter deltas
+STARTUP_LABEL = "startup" # Whatever gets timed before the first turn (engine spawn behind the menu, mostly)
+
+_phases: dict[str, float] = {}
+_label = STARTUP_LABEL
+_counters_at_start: dict[str, int] = dict(COUNTERS)
+_profile: cProfile.Profile | None = None
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Adds the time spent inside the with block to the current turn's phase. Does nothing when profiling is off.
+    """
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases[phase] = _phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+def start():
+    """
+    Turns the timers on and starts cProfile (on the calling thread, which should be the game loop).
+    """
+    global ENABLED, _profile
+    ENABLED = True
+    _profile = cProfile.Profile()
+    _profile.enable()
+
+
+def begin_turn(label: str):
+    """
+    Closes the running turn (if anything happened in it) and starts a new one.
+    """
+    global _label, _phases, _counters_at_start
+    end_turn()
+    _label = label
+    _phases = {}
+    _counters_at_start = dict(COUNTERS)
+
+
+def end_turn():
+    if not ENABLED or not _phases:
+        return
+    counters = {name: COUNTERS[name] - _counters_at_start[name] for name in COUNTERS}
+    TURNS.append({"label": _label, "phases": dict(_phases), "counters": counters})
+    _phases.clear()
+
+
+def get_summary() -> str:
+    """
+    Every turn on one line (milliseconds per phase + the counters), then min/median/max per phase over the game.
+    """
+    phases = sorted({phase for turn in TURNS for phase in turn["phases"]})
+    lines = [f"{'TURN':<14}" + "".join(f"{phase:>16}" for phase in phases) + "".join(f"{name:>18}" for name in COUNTERS)]
+    for turn in TURNS:
+        line = f"{turn['label']:<14}"
+        line += "".join(f"{turn['phases'][phase] * 1000:>14.2f}ms" if phase in turn["phases"] else f"{'-':>16}" for phase in phases)
+        line += "".join(f"{turn['counters'][name]:>18}" for name in COUNTERS)
+        lines.append(line)
+
+    lines.append("")
+    lines.append(f"{'PHASE':<18}{'TURNS':>6}{'MIN MS':>10}{'MEDIAN MS':>11}{'MAX MS':>10}{'TOTAL MS':>11}")
+    for phase in phases:
+        samples = [turn["phases"][phase] * 1000 for turn in TURNS if phase in turn["phases"]]
+        lines.append(f"{phase:<18}{len(samples):>6}{min(samples):>10.2f}{statistics.median(samples):>11.2f}{max(samples):>10.2f}{sum(samples):>11.2f}")
+    return "\n".join(lines)
+
+
+def stop(prefix: str) -> tuple[str, str]:
+    """
+    Stops everything and writes the report.
+
+    Args:
+        prefix: Path without extension. Writes prefix.txt (the per-turn summary) and prefix.prof (the cProfile dump).
+    Returns:
+        The two paths.
+
+    The .prof file is standard pstats: `python -m pstats`, snakeviz, or flameprof / gprof2dot for a flamegraph.
+    """
+    global ENABLED
+    end_turn()
+    ENABLED = False
+    if _profile is not None:
+        _profile.disable()
+
+    os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+    summary_path, profile_path = prefix + ".txt", prefix + ".prof"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(get_summary() + "\n")
+    if _profile is not None:
+        _profile.dump_stats(profile_path)
+    return summary_path, profile_path
@@ -1,4 +1,29 @@
-from core.rules import base, pawn, rook, knight, bishop, queen, king
+from array import array
+
+from core.rules import base, pawn, rook, knight, bishop, queen, king, tables
+from core import bitbases, profiler
+from core.bitboard import BitboardPosition, iter_bits
+from core.cache import BoundedCache
+from core.move import FLAG_CAPTURE, MOVE_NAMES, PROMOTION_ORDER, SQUARE_COORDS
+from core.position import Position
+from core.utils import change_notations
+
+# Position-derived results, keyed by Zobrist hash. The same position always has the same answers.
+POSITION_CACHE = BoundedCache(4096)
+
+# Every way a game can end without a winner.
+DRAW_STATES = {"STALEMATE", "REPETITION", "FIFTY_MOVES", "INSUFFICIENT_MATERIAL"}
+
+def set_backend(name: str):
+    """
+    Picks the board representation core.rules works with (see base.BACKENDS). Same answers either way.
+    POSITION_CACHE gets emptied too, so a benchmark of the new backend doesn't just read the old one's results.
+    """
+    if name not in base.BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', pick one of {', '.join(base.BACKENDS)}")
+    base.BACKEND = name
+    POSITION_CACHE.clear()
+
 
 def get_pseudo_moves(board: list[list[str]], pos: tuple[int, int], en_passant_target: str = "-", castling_rights: str = "-") -> list[tuple[int, int]]:
     """
@@ -37,6 +62,7 @@ def is_square_under_attack(board: list[list[str]], pos: tuple[int, int], defende
     Instead of checking every enemy piece, we sit at 'pos' and pretend to be different pieces.
     - If we pretend to be a Knight and land on an enemy Knight, we are under attack by a Knight.
     - If we pretend to be a Rook and see an enemy Rook, we are under attack by a Rook.
+    All the pretending is done with the precomputed tables, so nothing gets built on the fly.
     
     Args:
         board: The 2D board list.
@@ -47,73 +73,58 @@ def is_square_under_attack(board: list[list[str]], pos: tuple[int, int], defende
     Returns:
         True if the square is being attacked, False otherwise.
     """
-    
+    if base.BACKEND == "bitboard":
+        return BitboardPosition.from_board(board).is_square_attacked(pos[0] * 8 + pos[1], 'b' if defender_color == 'w' else 'w')
+
+    row, col = pos
+    enemy_is_white = defender_color != 'w'
+    knight_char, rook_char, bishop_char, queen_char, pawn_char, king_char = "NRBQPK" if enemy_is_white else "nrbqpk"
+
     # Check for Knights
-    for test_pos in knight.get_pseudo_legal_moves(board, pos):
-        p = base.get_piece_on_position(board, test_pos)
-        if p and p.lower() == 'n' and base.is_enemy(board, test_pos, defender_color): 
+    for r, c in tables.KNIGHT_MOVES[row][col]:
+        if board[r][c] == knight_char:
             return True
 
     # Queens don't get their own check because they are just rooks and bishops in a trench coat
-    # Check for Rooks/Queens
-    for test_pos in rook.get_pseudo_legal_moves(board, pos):
-        p = base.get_piece_on_position(board, test_pos)
-        if p and p.lower() in ['r', 'q'] and base.is_enemy(board, test_pos, defender_color):
-            return True
-
-    # Check for Bishops/Queens
-    for test_pos in bishop.get_pseudo_legal_moves(board, pos):
-        p = base.get_piece_on_position(board, test_pos)
-        if p and p.lower() in ['b', 'q'] and base.is_enemy(board, test_pos, defender_color):
-            return True
+    # Check for Rooks/Queens, then Bishops/Queens. The first piece on each ray is the only one that matters.
+    for directions, slider_char in ((tables.STRAIGHT_DIRECTIONS, rook_char), (tables.DIAGONAL_DIRECTIONS, bishop_char)):
+        for direction in directions:
+            for r, c in tables.RAYS[direction][row][col]:
+                piece = board[r][c]
+                if piece == "+":
+                    continue
+                if piece == slider_char or piece == queen_char:
+                    return True
+                break
 
     # Check for Pawns
-    row, col = pos
-    # If Defender is White, Enemy is Above (Row - 1). 
-    # If Defender is Black, Enemy is Below (Row + 1).
-    pawn_direction = -1 if defender_color == 'w' else 1 
-
-    attack_positions = [
-        (row + pawn_direction, col - 1),
-        (row + pawn_direction, col + 1)
-    ]
-    
-    for attack_pos in attack_positions:
-        if base.is_on_board(attack_pos):
-            p = base.get_piece_on_position(board, attack_pos)
-            if p and p.lower() == 'p' and base.is_enemy(board, attack_pos, defender_color):
-                return True
+    # An enemy pawn attacks us from exactly the squares our own pawn would attack from here.
+    for r, c in tables.PAWN_ATTACKS[defender_color][row][col]:
+        if board[r][c] == pawn_char:
+            return True
                 
     # Check for King
-    for test_pos in king.get_pseudo_legal_moves(board, pos):
-        p = base.get_piece_on_position(board, test_pos)
-        if p and p.lower() == 'k' and base.is_enemy(board, test_pos, defender_color):
+    for r, c in tables.KING_MOVES[row][col]:
+        if board[r][c] == king_char:
             return True
 
     return False
 
 
-def is_king_in_check(board: list[list[str]], color: str) -> bool:
+def is_king_in_check(board: list[list[str]], color: str, king_pos: tuple[int, int] | None = None) -> bool:
     """
     Wrapper function that finds the King and checks if his square is under attack.
 
     Args:
         board: The 2D board list.
         color: The color of the King ('w' or 'b').
+        king_pos: Where the King is, if you already know (Position.king_squares does). Saves a board scan.
 
     Returns:
         True if the King is in check, False otherwise.
     """
-    king_pos = None
-    target_char = 'K' if color == 'w' else 'k'
-    
-    # Find the King's coordinates
-    for r in range(8):
-        for c in range(8):
-            if board[r][c] == target_char:
-                king_pos = (r, c)
-                break
-        if king_pos: break # Prevents looping needlessly once the king is found
+    if king_pos is None:
+        king_pos = find_king(board, color)
         
     # If King is not found somehow, lets just say the game is over 
     if not king_pos:
@@ -123,83 +134,414 @@ def is_king_in_check(board: list[list[str]], color: str) -> bool:
     return is_square_under_attack(board, king_pos, color)
 
 
-def get_legal_moves(board: list[list[str]], pos: tuple[int, int], en_passant_target: str = "-", castling_rights: str = "-") -> list[tuple[int, int]]:
+def is_in_check(position: Position, color: str | None = None) -> bool:
+    """
+    is_king_in_check for a Position (side to move by default).
+    The bitboard backend reads Position.bitboards here, instead of building them again from the board.
+    """
+    if color is None:
+        color = position.turn
+    if base.BACKEND == "bitboard":
+        return BitboardPosition.from_position(position).is_king_in_check(color)
+    return is_king_in_check(position.board, color, position.king_squares[color])
+
+
+def find_king(board: list[list[str]], color: str) -> tuple[int, int] | None:
+    """
+    Finds the King's coordinates, or None if he has wandered off the board somehow.
+    """
+    target_char = 'K' if color == 'w' else 'k'
+    for r in range(8):
+        for c in range(8):
+            if board[r][c] == target_char:
+                return (r, c)
+    return None
+
+
+def get_checks_and_pins(board: list[list[str]], king_pos: tuple[int, int], color: str) -> tuple[list[tuple[int, int]], set[tuple[int, int]] | None, dict[tuple[int, int], set[tuple[int, int]]]]:
+    """
+    Looks outwards from the King ONCE and works out everything that restricts the other pieces.
+
+    Logic:
+        Walk the 8 rays from the King.
+        - First piece on the ray is an enemy slider that can move along it -> that's a checker.
+          Blocking anywhere between, or capturing it, stops the check.
+        - First piece is ours and the second is such an enemy slider -> our piece is pinned.
+          It can only move along the ray (including capturing the pinner).
+        Knights and pawns can't be blocked, so they just get added as checkers.
+
+    Args:
+        board: The 2D board list.
+        king_pos: Where the King is.
+        color: The King's color.
+    Returns:
+        (checkers, check_mask, pins)
+        checkers: positions of every piece giving check.
+        check_mask: squares a non-King move must land on to deal with the check. None if not in check.
+        pins: pinned piece position -> squares it is still allowed to move to.
+    """
+    checkers: list[tuple[int, int]] = []
+    check_mask: set[tuple[int, int]] | None = None
+    pins: dict[tuple[int, int], set[tuple[int, int]]] = {}
+    row, col = king_pos
+    is_white = color == 'w'
+
+    for directions, sliders in ((tables.STRAIGHT_DIRECTIONS, 'rq'), (tables.DIAGONAL_DIRECTIONS, 'bq')):
+        for direction in directions:
+            full_ray = tables.RAYS[direction][row][col]
+            blocker = None
+            for i, (r, c) in enumerate(full_ray):
+                piece = board[r][c]
+                if piece == "+":
+                    continue
+                if piece.isupper() == is_white:
+                    if blocker is not None:
+                        break # Two of ours in a row, nothing to see here
+                    blocker = (r, c)
+                    continue
+                if piece.lower() in sliders:
+                    ray = set(full_ray[:i + 1])
+                    if blocker is None:
+                        checkers.append((r, c))
+                        check_mask = ray if check_mask is None else check_mask & ray
+                    else:
+                        pins[blocker] = ray
+                break
+
+    enemy_knight = 'n' if is_white else 'N'
+    for r, c in tables.KNIGHT_MOVES[row][col]:
+        if board[r][c] == enemy_knight:
+            checkers.append((r, c))
+            check_mask = {(r, c)} if check_mask is None else check_mask & {(r, c)}
+
+    # Enemy pawns stand exactly where our own pawn would attack from the King's square.
+    enemy_pawn = 'p' if is_white else 'P'
+    for r, c in tables.PAWN_ATTACKS[color][row][col]:
+        if board[r][c] == enemy_pawn:
+            checkers.append((r, c))
+            check_mask = {(r, c)} if check_mask is None else check_mask & {(r, c)}
+
+    return checkers, check_mask, pins
+
+
+def is_king_move_safe(board: list[list[str]], start: tuple[int, int], target: tuple[int, int], color: str) -> bool:
+    """
+    Checks one King step by actually standing on the target square for a moment.
+    Standing there (instead of just asking about the square) matters: the King can't hide from a rook behind himself.
+    """
+    profiler.COUNTERS["board_simulations"] += 1
+    king_char = board[start[0]][start[1]]
+    captured = board[target[0]][target[1]]
+    board[start[0]][start[1]] = "+"
+    board[target[0]][target[1]] = king_char
+    safe = not is_square_under_attack(board, target, color)
+    board[target[0]][target[1]] = captured
+    board[start[0]][start[1]] = king_char
+    return safe
+
+
+def is_en_passant_safe(board: list[list[str]], start: tuple[int, int], target: tuple[int, int], color: str, king_pos: tuple[int, int]) -> bool:
+    """
+    En passant removes TWO pieces from a rank, which can expose the King sideways. Masks can't see that, so we just simulate it.
+    """
+    profiler.COUNTERS["board_simulations"] += 1
+    pawn_char = board[start[0]][start[1]]
+    victim_pos = (start[0], target[1])
+    victim = board[victim_pos[0]][victim_pos[1]]
+    board[start[0]][start[1]] = "+"
+    board[victim_pos[0]][victim_pos[1]] = "+"
+    board[target[0]][target[1]] = pawn_char
+    safe = not is_king_in_check(board, color, king_pos)
+    board[target[0]][target[1]] = "+"
+    board[victim_pos[0]][victim_pos[1]] = victim
+    board[start[0]][start[1]] = pawn_char
+    return safe
+
+
+def generate_all_legal_moves(position: Position, color: str | None = None) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """
+    Generates every legal move for one side in a single pass.
+
+    Process:
+    1. Find the King and work out checkers and pins once (get_checks_and_pins).
+    2. Double check -> only the King may move.
+    3. Every other piece: pseudo moves, filtered by its pin ray and the check mask. No board copies.
+    4. King steps and en passant are the only moves that get simulated, since masks can't handle them.
+    5. Castling is only allowed out of, through and into squares that aren't attacked.
+
+    Args:
+        position: The Position to generate for.
+        color: Whose moves? Defaults to the side to move.
+    Returns:
+        A list of (start_pos, end_pos) tuples.
+    """
+    if base.BACKEND == "bitboard":
+        return generate_bitboard_moves(position, color)
+
+    board = position.board
+    if color is None:
+        color = position.turn
+    king_pos = position.king_squares[color]
+    if king_pos is None:
+        return [] # No King, no game
+
+    checkers, check_mask, pins = get_checks_and_pins(board, king_pos, color)
+    ep_target = change_notations(position.en_passant) if position.en_passant != "-" else None
+    moves: list[tuple[tuple[int, int], tuple[int, int]]] = []
+
+    # King moves first (pseudo moves without castling, we do castling ourselves)
+    for target in king.get_pseudo_legal_moves(board, king_pos):
+        if is_king_move_safe(board, king_pos, target, color):
+            moves.append((king_pos, target))
+
+    if len(checkers) > 1:
+        profiler.COUNTERS["generations"] += 1
+        profiler.COUNTERS["moves_generated"] += len(moves)
+        return moves # Double check. Nothing can block two pieces at once, so the King is on his own.
+
+    # Castling: never out of check, through check or into check.
+    home_row = 7 if color == 'w' else 0
+    if not checkers and king_pos == (home_row, 4):
+        king_side, queen_side = ('K', 'Q') if color == 'w' else ('k', 'q')
+        if king_side in position.castling_rights and board[home_row][5] == "+" and board[home_row][6] == "+":
+            if not is_square_under_attack(board, (home_row, 5), color) and is_king_move_safe(board, king_pos, (home_row, 6), color):
+                moves.append((king_pos, (home_row, 6)))
+        if queen_side in position.castling_rights and board[home_row][3] == "+" and board[home_row][2] == "+" and board[home_row][1] == "+":
+            if not is_square_under_attack(board, (home_row, 3), color) and is_king_move_safe(board, king_pos, (home_row, 2), color):
+                moves.append((king_pos, (home_row, 2)))
+
+    # Everyone else. The piece list means we only visit our own pieces, not 64 squares.
+    for pos in position.piece_squares[color]:
+        if pos == king_pos:
+            continue
+
+        is_pawn = board[pos[0]][pos[1]] in "Pp"
+        pin_ray = pins.get(pos)
+        for target in get_pseudo_moves(board, pos, position.en_passant):
+            if pin_ray is not None and target not in pin_ray:
+                continue
+            if is_pawn and target == ep_target and pos[1] != target[1]:
+                # En passant can also answer a check by removing the checking pawn
+                if is_en_passant_safe(board, pos, target, color, king_pos):
+                    moves.append((pos, target))
+                continue
+            if check_mask is not None and target not in check_mask:
+                continue
+            moves.append((pos, target))
+
+    counters = profiler.COUNTERS
+    counters["generations"] += 1
+    counters["moves_generated"] += len(moves)
+    return moves
+
+
+def generate_bitboard_moves(position: Position, color: str | None = None) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """
+    generate_all_legal_moves for the bitboard backend: BitboardPosition.get_legal_targets on a view of
+    Position.bitboards, handed back as the same (start_pos, end_pos) tuples.
+    """
+    moves: list[tuple[tuple[int, int], tuple[int, int]]] = []
+    for start, targets in BitboardPosition.from_position(position).get_legal_targets(color).items():
+        start_pos = SQUARE_COORDS[start]
+        moves.extend([(start_pos, SQUARE_COORDS[end]) for end in iter_bits(targets)])
+
+    counters = profiler.COUNTERS
+    counters["generations"] += 1
+    counters["moves_generated"] += len(moves)
+    return moves
+
+
+def generate_move_list(position: Position, color: str | None = None) -> array:
+    """
+    generate_all_legal_moves, packed: one 16 bit core.move code per move, all in one array('H').
+
+    Logic:
+        The tuple list says "this pawn can go to e8" once. Here that's four moves (Q, R, B, N),
+        so this is the real legal move list, underpromotions included (perft counts them).
+        Captures (en passant too) get FLAG_CAPTURE, the board is right there anyway.
+
+    Args:
+        position: The Position to generate for.
+        color: Whose moves? Defaults to the side to move.
+    Returns:
+        array('H'): The codes. Play one with Position.make_packed_move, read one with core.move.Move.
+    """
+    board = position.board
+    codes = array('H')
+    append = codes.append
+    for (sr, sc), (er, ec) in generate_all_legal_moves(position, color):
+        code = (sr * 8 + sc) | (er * 8 + ec) << 6
+        is_pawn = board[sr][sc] in "Pp"
+        if board[er][ec] != "+" or (is_pawn and sc != ec):
+            code |= FLAG_CAPTURE
+        if is_pawn and er in (0, 7):
+            for promotion in PROMOTION_ORDER:
+                append(code | promotion)
+        else:
+            append(code)
+    return codes
+
+def get_legal_moves(board: list[list[str]], pos: tuple[int, int], en_passant_target: str = "-", castling_rights: str = "-", position: Position | None = None) -> list[tuple[int, int]]:
     """
     Returns the FINAL list of moves a piece can make.
 
     Process:
-    1. Get all pseudo-legal moves (geometry only).
-    2. Simulate each move on a temporary board.
-    3. Check if the move leaves the King in check.
-    4. If King is safe, the move is Legal.
-    5. Cry that this logic might be too heavy.
+    1. Get the legal moves for the piece's whole side from the hash-cached analyze_position report,
+       so asking piece after piece costs one generation. Pass the live Position if you have one,
+       otherwise a throwaway one gets built from the board (its hash still finds the cached report).
+    2. Keep the ones that start on pos.
+    Used to be simulate-and-test per move. Used to make me cry. No more.
     
     Args:
         board: The 2D board list.
         pos: The starting position.
         en_passant_target: Metadata for pawn.
         castling_rights: Metadata for king.
+        position: The live Position for this board, if the caller has one. The other args are ignored then.
     Returns:
         List of valid target tuples.
     """
-    # Get the pseudo moves ready for testing
-    pseudo_moves = get_pseudo_moves(board, pos, en_passant_target, castling_rights)
-    legal_moves: list[tuple[int, int]] = []
-    
     color = base.get_piece_color(board, pos)
     if not color: return []
-    
-    # Simulate each move
-    for target in pseudo_moves:
-        # Lists are dumb. They need deep copy otherwise my board would be messed up. And I will definitely not use an extra import for no reason
-        temp_board = [row[:] for row in board] # Creates a list and populates it with the rows inside board. row[:] prevents a shallow copy.
-        
-        piece = temp_board[pos[0]][pos[1]]
-        temp_board[target[0]][target[1]] = piece
-        temp_board[pos[0]][pos[1]] = "+"
-        
-        # Check Safety
-        if not is_king_in_check(temp_board, color):
-            legal_moves.append(target)
-            
-    return legal_moves
 
-def get_game_state(board: list[list[str]], color: str, en_passant_target: str, castling_rights: str) -> str:
+    if position is None:
+        position = Position(board, color, castling_rights, en_passant_target)
+    if position.turn == color:
+        moves = analyze_position(position)["moves"]
+    else:
+        moves = generate_all_legal_moves(position, color) # Not their turn, nothing cached for that side
+    return [end for start, end in moves if start == pos]
+
+
+def is_insufficient_material(position: Position) -> bool:
+    """
+    Can nobody mate anymore, whatever happens?
+
+    Logic:
+        Any pawn, rook or queen on the board can still mate (a pawn can become one).
+        Without them: bare kings, or a single knight or bishop, can't mate.
+        Neither can any number of bishops if they all live on the same square color.
+        Everything else (two knights, bishop + knight, bishops on both colors) keeps playing.
+    """
+    material = position.material
+    if any(material[piece] for piece in "PpRrQq"):
+        return False
+    knights = material["N"] + material["n"]
+    bishops = material["B"] + material["b"]
+    if knights + bishops <= 1:
+        return True
+    if knights:
+        return False
+
+    board = position.board
+    square_colors = {(r + c) % 2 for color in "wb" for r, c in position.piece_squares[color] if board[r][c] in "Bb"}
+    return len(square_colors) == 1
+
+
+def get_draw_state(position: Position) -> str | None:
+    """
+    The draws that don't depend on the legal moves. All three checks are O(1).
+
+    Logic:
+        None of this can live in POSITION_CACHE: the same board (same hash) can be a fresh position or a third repetition,
+        and the fifty move clock isn't part of the hash either. So analyze_position asks this on every call.
+        Repetition comes from Position.hash_counts, which make_move/unmake_move keep up to date.
+
+    Returns:
+        "REPETITION" (the third time), "FIFTY_MOVES" (100 half moves without a pawn move or a capture),
+        "INSUFFICIENT_MATERIAL", or None.
+    """
+    if position.get_repetitions() >= 3:
+        return "REPETITION"
+    if position.half_timer >= 100:
+        return "FIFTY_MOVES"
+    if is_insufficient_material(position):
+        return "INSUFFICIENT_MATERIAL"
+    return None
+
+
+def get_game_state(board: list[list[str]], color: str, en_passant_target: str, castling_rights: str, half_timer: int = 0) -> str:
     """
     Checks the current state of the game for the given color.
 
     Logic:
-        We loop through EVERY piece belonging to 'color'. Heavy.
-        We calculate their legal moves.
+        One pass of generate_all_legal_moves for the whole team.
         If the total number of legal moves for the entire team is 0:
             - If King is in check -> CHECKMATE
             - If King is NOT in check -> STALEMATE
-        Otherwise -> PLAYING
+        Otherwise it's PLAYING, unless it's a draw by the fifty move rule or insufficient material.
+        (Repetitions need the game's history, which a bare board doesn't have. analyze_position can see those.)
     
     Args:
         board: The board list.
         color: Who's turn is it?
         en_passant_target, castling_rights: Needed for move generation.
+        half_timer: Half moves since the last capture or pawn move.
     Returns:
-        str: "CHECKMATE", "STALEMATE", or "PLAYING"
+        str: "CHECKMATE", "STALEMATE", "FIFTY_MOVES", "INSUFFICIENT_MATERIAL" or "PLAYING"
     """
-    has_legal_moves = False
-    
-    # Loop through the board to find all friendly pieces
-    for r in range(8):
-        for c in range(8):
-            if base.is_friendly(board, (r, c), color):
-                moves = get_legal_moves(board, (r, c), en_passant_target, castling_rights)
-                if len(moves) > 0:
-                    has_legal_moves = True
-                    break # We found at least one move, so game continues
-        if has_legal_moves: break # Prevents useless looping
-        
-    if has_legal_moves:
-        return "PLAYING"
+    position = Position(board, color, castling_rights, en_passant_target, half_timer)
+    if generate_all_legal_moves(position, color):
+        return get_draw_state(position) or "PLAYING"
     
     # If no moves, check why
-    if is_king_in_check(board, color):
+    if is_in_check(position, color):
         return "CHECKMATE"
     else:
         return "STALEMATE"
+
+
+def analyze_position(position: Position) -> dict:
+    """
+    Everything the game loop wants to know about a position, computed once and cached by its Zobrist hash.
+
+    Logic:
+        The main loop asks again after every invalid input, every '?' hint and every undo.
+        The position hasn't changed in any of those, so the answer comes straight out of POSITION_CACHE.
+        Draws by repetition, fifty moves or material are checked on top of that every time (see get_draw_state).
+        Mate still beats them: a mate on the 100th half move counts.
+
+    Args:
+        position: The Position to look at (for the side to move).
+    Returns:
+        A dictionary:
+        'moves': tuple of legal (start_pos, end_pos) moves.
+        'in_check': is the side to move in check?
+        'state': "CHECKMATE", "PLAYING", or one of DRAW_STATES
+        'tablebase': the exact endgame verdict (core.bitbases.probe) for tiny endgames, None otherwise.
+    """
+    report = POSITION_CACHE.get(position.hash)
+    if report is None:
+        report = get_position_report(position)
+        POSITION_CACHE.put(position.hash, report)
+
+    if report["state"] == "PLAYING":
+        draw = get_draw_state(position)
+        if draw:
+            return {**report, "state": draw, "tablebase": None} # A copy, the cached one is still right for the next visit
+    return report
+
+
+def get_legal_move_names(position: Position) -> set[str]:
+    """
+    The side to move's legal moves as 'e2e4' strings, straight from the cached analyze_position report.
+    No promotion letters: check a move with move[:4] (any piece is fine, they're all legal if the push is).
+    """
+    return {MOVE_NAMES[(sr * 8 + sc) | (er * 8 + ec) << 6] for (sr, sc), (er, ec) in analyze_position(position)["moves"]}
+
+
+def get_position_report(position: Position) -> dict:
+    """
+    The cacheable part of analyze_position: everything that only depends on the hash.
+    """
+    color = position.turn
+    moves = tuple(generate_all_legal_moves(position, color))
+    with profiler.timed("check"):
+        in_check = is_in_check(position, color)
+    if moves:
+        state = "PLAYING"
+    else:
+        state = "CHECKMATE" if in_check else "STALEMATE"
+
+    tablebase = bitbases.probe(position) if state == "PLAYING" else None
+    return {"moves": moves, "in_check": in_check, "state": state, "tablebase": tablebase}
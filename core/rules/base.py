@@ -1,3 +1,13 @@
+from core.rules import tables
+
+# Which board representation core.rules generates moves and attacks with.
+# "list" walks the list board with the precomputed tables. "bitboard" answers the same questions with core.bitboard masks,
+# using the bitboards Position keeps next to its list board (the list board stays, it's what main.py and the renderer read).
+# Both give the same answers (perft --backend checks that), so the switch is purely about speed. Flip it with arbiter.set_backend.
+BACKENDS = ("list", "bitboard")
+BACKEND = "list"
+
+
 def is_on_board(pos: tuple[int, int]) -> bool:
     """
     Checks if the coordinates are within the 8x8 grid.
@@ -60,30 +70,35 @@ def get_sliding_moves(board: list[list[str]], pos: tuple[int, int], directions:
     Returns:
         list[tuple[int, int]]: Basically a list of all sliding moves. 
     """
+    if BACKEND == "bitboard":
+        return get_sliding_moves_bitboard(board, pos, directions)
+
     moves: list[tuple[int, int]] = []
-    color = str(get_piece_color(board, pos))
+    is_white = board[pos[0]][pos[1]].isupper()
+    row, col = pos
     
-    for dr, dc in directions:
-        row, col = pos
-        
-        # Keep walking in this direction
-        while True:
-            row += dr
-            col += dc
-            target = (row, col)
-            
-            # 1. Check if the ray is leaking out
-            if not is_on_board(target):
-                break
-            
-            # 2. Check Obstacles
-            if is_friendly(board, target, color):
-                break # Blocked by friendly piece
+    for direction in directions:
+        # Keep walking in this direction. The ray table already stops at the edge, so no leaking out.
+        for target in tables.RAYS[direction][row][col]:
+            piece = board[target[0]][target[1]]
+            if piece == "+":
+                moves.append(target) # Valid Move
+                continue
             
-            # 3. Valid Move
-            moves.append(target)
-            
-            if is_enemy(board, target, color):
-                break # Capture enemy, then stop (can't jump over)
+            if piece.isupper() != is_white:
+                moves.append(target) # Capture enemy, then stop (can't jump over)
+            break # Blocked either way
                 
     return moves
+
+
+def get_sliding_moves_bitboard(board: list[list[str]], pos: tuple[int, int], directions: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    get_sliding_moves for the bitboard backend: the rays come from core.bitboard.ray_attacks against the board's occupancy.
+    """
+    from core import bitboard # core.bitboard imports core.board, which imports us. Only this backend needs it anyway
+
+    white, black = bitboard.get_occupancy(board)
+    own = white if board[pos[0]][pos[1]].isupper() else black
+    targets = bitboard.ray_attacks(pos[0] * 8 + pos[1], white | black, directions) & ~own
+    return [divmod(sq, 8) for sq in bitboard.iter_bits(targets)]
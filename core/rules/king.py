@@ -1,4 +1,4 @@
-from core.rules import base
+from core.rules import base, tables
 
 def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int], castling_rights: str = "-") -> list[tuple[int, int]]:
     """
@@ -13,16 +13,12 @@ def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int], castlin
     """
     moves: list[tuple[int, int]] = []
     color = str(base.get_piece_color(board, pos)) 
-    row, col = pos
+    is_white = color == 'w'
     
     # Normal King Moves
-    possible_positions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-
-    for pr, pc in possible_positions:
-        test_pos = (row + pr, col + pc)
-        if not base.is_on_board(test_pos): 
-            continue
-        if base.is_friendly(board, test_pos, color): 
+    for test_pos in tables.KING_MOVES[pos[0]][pos[1]]:
+        piece = board[test_pos[0]][test_pos[1]]
+        if piece != "+" and piece.isupper() == is_white: 
             continue
         moves.append(test_pos)
         
@@ -1,4 +1,4 @@
-from core.rules import base
+from core.rules import tables
 
 def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int]) -> list[tuple[int, int]]:
     """
@@ -12,23 +12,16 @@ def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int]) -> list
         List of target tuples [(r, c), ...].
     """
     moves: list[tuple[int, int]] = []
-    color = str(base.get_piece_color(board, pos)) 
-    row, col = pos
-    possible_positions = [(1, 2), (2, 1), (-1, 2), (1, -2), (-1, -2), (-2, -1), (-2, 1), (2, -1)]
+    is_white = board[pos[0]][pos[1]].isupper()
 
-    for pr, pc in possible_positions:
-        test_pos = (row + pr, col + pc)
-
-        # Check if the test position is even on board
-        if not base.is_on_board(test_pos):
-            continue
+    for test_pos in tables.KNIGHT_MOVES[pos[0]][pos[1]]: # Only squares that are on the board
+        piece = board[test_pos[0]][test_pos[1]]
 
         # Check if a friendly piece is hogging space on the test position 
-        if base.is_friendly(board, test_pos, color):
+        if piece != "+" and piece.isupper() == is_white:
             continue
 
-        # If neither of the two, the move is legal
+        # If not, the move is legal
         moves.append(test_pos)
         
     return moves
-    
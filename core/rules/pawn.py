@@ -1,5 +1,5 @@
-from core.rules import base
-from core.utils import *
+from core.rules import base, tables
+from core.utils import change_notations
 
 def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int], en_passant_target: str = "-") -> list[tuple[int, int]]:
     """
@@ -29,33 +29,28 @@ def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int], en_pass
     # Check 1 Step Ahead
     forward_one = (row + direction, col) # Direction is automatically handled by the variable setting above.
     
-    if base.is_on_board(forward_one) and base.get_piece_on_position(board, forward_one) == "+":
+    if 0 <= forward_one[0] < 8 and board[forward_one[0]][col] == "+":
         moves.append(forward_one)
 
         # Check 2 Steps Ahead 
-        # (Only allowed if 1st step was valid AND we are at start rank)
+        # (Only allowed if 1st step was valid AND we are at start rank, which means it can't leave the board)
         if row == start_row:
             forward_two = (row + (direction * 2), col)
-            if base.is_on_board(forward_two) and base.get_piece_on_position(board, forward_two) == "+":
+            if board[forward_two[0]][col] == "+":
                 moves.append(forward_two)
 
     # Capture Logic (Diagonals)
-    # The two squares diagonally in front (or back)
-    left_diag = (row + direction, col - 1)
-    right_diag = (row + direction, col + 1)
-    
-    potential_captures = [left_diag, right_diag]
+    # The two squares diagonally in front (or back), straight from the table
+    potential_captures = tables.PAWN_ATTACKS[color][row][col]
+    ep_coords = change_notations(en_passant_target) if en_passant_target != "-" else None
 
     for target in potential_captures:
-        if base.is_on_board(target) and base.is_enemy(board, target, color):
-            moves.append(target)
-
-    # En Passant Logic
-    if en_passant_target != "-":
-        ep_coords = change_notations(en_passant_target)
-
-        for target in potential_captures: # The kill check works exactly like normal pawn capture. The front two diagonal squares. 
-            if base.is_on_board(target) and base.get_piece_on_position(board, target) == "+" and target == ep_coords: # Only works on empty squares. Well logically its impossible but whatever.
+        piece = board[target[0]][target[1]]
+        if piece == "+":
+            # En Passant Logic. The kill check works exactly like normal pawn capture, but only on the empty ep square.
+            if target == ep_coords:
                 moves.append(target)
+        elif piece.isupper() != (color == "w"):
+            moves.append(target)
 
     return moves
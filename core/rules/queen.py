@@ -1,4 +1,4 @@
-from core.rules import base
+from core.rules import base, tables
 
 def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int]) -> list[tuple[int, int]]:
     """
@@ -16,6 +16,4 @@ def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int]) -> list
     Returns:
         List of target tuples [(r, c), ...].
     """
-    straight = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    diagonal =   [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-    return base.get_sliding_moves(board, pos, straight + diagonal)
+    return base.get_sliding_moves(board, pos, tables.ALL_DIRECTIONS)
@@ -1,4 +1,4 @@
-from core.rules import base
+from core.rules import base, tables
 
 def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int]) -> list[tuple[int, int]]:
     """
@@ -15,5 +15,4 @@ def get_pseudo_legal_moves(board: list[list[str]], pos: tuple[int, int]) -> list
     Returns:
         List of target tuples [(r, c), ...].
     """
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    return base.get_sliding_moves(board, pos, directions)
+    return base.get_sliding_moves(board, pos, tables.STRAIGHT_DIRECTIONS)
@@ -0,0 +1,103 @@
+import marshal
+import os
+
+# Lookup tables for the move generators, built once and then cached on disk (data/cache/tables.bin).
+# Every table is indexed [row][col] and holds ready-made (row, col) tuples that are already on the board,
+# so the hot loops never build offset lists or call base.is_on_board again.
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "cache", "tables.bin")
+# Bump it whenever the shape of the tables changes. The cache also goes stale on its own when this file is edited.
+CACHE_VERSION = 1
+
+KNIGHT_OFFSETS = [(1, 2), (2, 1), (-1, 2), (1, -2), (-1, -2), (-2, -1), (-2, 1), (2, -1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+STRAIGHT_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+DIAGONAL_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+ALL_DIRECTIONS = STRAIGHT_DIRECTIONS + DIAGONAL_DIRECTIONS
+
+
+def _build_step_table(offsets: list[tuple[int, int]]) -> list[list[list[tuple[int, int]]]]:
+    """
+    For every square, the squares one jump away for each offset (dropping the ones off the board).
+    """
+    table = []
+    for row in range(8):
+        table_row = []
+        for col in range(8):
+            table_row.append([(row + dr, col + dc) for dr, dc in offsets if 0 <= row + dr < 8 and 0 <= col + dc < 8])
+        table.append(table_row)
+    return table
+
+
+def _build_ray_table(direction: tuple[int, int]) -> list[list[list[tuple[int, int]]]]:
+    """
+    For every square, the squares a slider passes through in one direction, nearest first, until the edge.
+    """
+    dr, dc = direction
+    table = []
+    for row in range(8):
+        table_row = []
+        for col in range(8):
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append((r, c))
+                r += dr
+                c += dc
+            table_row.append(ray)
+        table.append(table_row)
+    return table
+
+
+def build_tables() -> dict:
+    return {
+        "KNIGHT_MOVES": _build_step_table(KNIGHT_OFFSETS),
+        "KING_MOVES": _build_step_table(KING_OFFSETS),
+        # The two diagonal squares a pawn of that color attacks. White attacks upwards (row - 1), black downwards.
+        # Flip it around and it is also where an ENEMY pawn has to stand to attack this square.
+        "PAWN_ATTACKS": {
+            'w': _build_step_table([(-1, -1), (-1, 1)]),
+            'b': _build_step_table([(1, -1), (1, 1)]),
+        },
+        # RAYS[direction][row][col]
+        "RAYS": {direction: _build_ray_table(direction) for direction in ALL_DIRECTIONS},
+    }
+
+
+def load_tables() -> dict:
+    """
+    The tables, from the cache file when it is there and fresh, freshly built (and cached) when it isn't.
+
+    Logic:
+        marshal reads nested lists/tuples/dicts back several times faster than the loops above can build them,
+        and startup is exactly where those milliseconds show. The cache is keyed on CACHE_VERSION and
+        this file's mtime, so editing the builders can never leave us with old tables.
+        Any problem with the file (missing, truncated, read-only disk) just means building them like before.
+    """
+    stamp = (CACHE_VERSION, os.stat(__file__).st_mtime_ns)
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            cached_stamp, cached_tables = marshal.loads(f.read())
+        if tuple(cached_stamp) == stamp:
+            return cached_tables
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    built = build_tables()
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        temp_path = CACHE_FILE + ".tmp"
+        with open(temp_path, "wb") as f:
+            marshal.dump((stamp, built), f)
+        os.replace(temp_path, CACHE_FILE) # Never leave a half written cache behind
+    except OSError:
+        pass # No cache then. Next startup just builds them again.
+    return built
+
+
+_tables = load_tables()
+KNIGHT_MOVES = _tables["KNIGHT_MOVES"]
+KING_MOVES = _tables["KING_MOVES"]
+PAWN_ATTACKS = _tables["PAWN_ATTACKS"]
+RAYS = _tables["RAYS"]
@@ -0,0 +1,410 @@
+import time
+
+from core.move import FLAG_CAPTURE, decode_move
+from core.position import Position
+from core.rules import arbiter
+
+# A built-in engine for when Stockfish isn't around. Much weaker, but it plays real chess and needs nothing but this repo.
+# Alpha-beta (negamax) + iterative deepening + quiescence, on top of the arbiter's legal move generator.
+# Moves are 16 bit core.move codes (arbiter.generate_move_list), so every promotion piece is a move of its own.
+
+# Difficulty level (same 1-4 as the menu) -> (max depth, seconds to think)
+DEPTH_LIMITS = {1: 1, 2: 2, 3: 4, 4: 64}
+TIME_LIMITS = {1: 0.1, 2: 0.5, 3: 1.0, 4: 2.0}
+
+PIECE_VALUES = {'p': 100, 'n': 320, 'b': 330, 'r': 500, 'q': 900, 'k': 0}
+# What a capture takes. An empty target square on a capture is en passant, which always takes a pawn.
+VICTIM_VALUES = {**PIECE_VALUES, '+': 100}
+PROMOTION_VALUES = [0, 320, 330, 500, 900, 0, 0, 0] # Indexed by the code's promotion bits, like core.move.PROMOTION_SUFFIXES
+
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000 # Anything past this is a mate score. No search gets 1000 plies deep
+INFINITY = 1000000
+TT_MAX_ENTRIES = 200000
+TIME_CHECK_INTERVAL = 512 # Nodes between clock checks. time.perf_counter() isn't free either
+
+# Transposition table flags: the stored score is exact, a lower bound (fail high) or an upper bound (fail low)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Piece-square tables from White's point of view, rank 8 first (so they line up with board rows).
+# Numbers are the classic "Simplified Evaluation Function" ones. Black reads them upside down.
+PIECE_SQUARE_TABLES = {
+    'p': [
+        0,   0,   0,   0,   0,   0,   0,   0,
+        50,  50,  50,  50,  50,  50,  50,  50,
+        10,  10,  20,  30,  30,  20,  10,  10,
+        5,   5,  10,  25,  25,  10,   5,   5,
+        0,   0,   0,  20,  20,   0,   0,   0,
+        5,  -5, -10,   0,   0, -10,  -5,   5,
+        5,  10,  10, -20, -20,  10,  10,   5,
+        0,   0,   0,   0,   0,   0,   0,   0,
+    ],
+    'n': [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    'b': [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    'r': [
+        0,   0,   0,   0,   0,   0,   0,   0,
+        5,  10,  10,  10,  10,  10,  10,   5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        0,   0,   0,   5,   5,   0,   0,   0,
+    ],
+    'q': [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+        -5,   0,   5,   5,   5,   5,   0,  -5,
+        0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+    ],
+    'k': [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20,  20,   0,   0,   0,   0,  20,  20,
+        20,  30,  10,   0,   0,  10,  30,  20,
+    ],
+}
+
+# Stats of the last get_best_move call, for the UI to show off with ('depth', 'nodes', 'nps'...).
+LAST_RESULT: dict = {}
+
+
+class SearchTimeout(Exception):
+    """
+    The clock ran out in the middle of an iteration. Caught by search(), never escapes it.
+    """
+
+
+def evaluate(position: Position) -> int:
+    """
+    Static evaluation in centipawns, from the side to move's point of view (positive = good for them).
+
+    Logic:
+        Material + where the pieces stand (PIECE_SQUARE_TABLES).
+        The piece lists mean we only look at occupied squares.
+    """
+    board = position.board
+    score = 0
+    for r, c in position.piece_squares['w']:
+        p_type = board[r][c].lower()
+        score += PIECE_VALUES[p_type] + PIECE_SQUARE_TABLES[p_type][r * 8 + c]
+    for r, c in position.piece_squares['b']:
+        p_type = board[r][c]
+        score -= PIECE_VALUES[p_type] + PIECE_SQUARE_TABLES[p_type][(7 - r) * 8 + c]
+    return score if position.turn == 'w' else -score
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """
+    Mate scores count plies from the root, but a table entry gets reused at other plies (and in later searches).
+    So the table stores mates counted from the entry's own position: "mate in 3 from here", not "mate at ply 7".
+    """
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    """
+    The other way around from score_to_table: a stored mate score, counted from the root again.
+    """
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """
+    One search (and the tables it learns along the way).
+
+    Move ordering, best first, because alpha-beta cuts more the sooner it sees the best move:
+    1. The transposition table move (best move from an earlier, shallower search of the same position).
+    2. Captures, Most Valuable Victim - Least Valuable Attacker (pawn takes queen before queen takes pawn).
+    3. Killer moves: quiet moves that caused a cutoff at the same ply in a sibling branch.
+    4. Everything else, by history score (how often that piece-to-square caused cutoffs anywhere).
+    """
+
+    def __init__(self, position: Position, max_depth: int, time_limit: float, table=None):
+        self.position = position
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.deadline = 0.0
+        self.nodes = 0
+        # hash -> (depth, score, flag, best move). A dict by default, core.parallel passes a shared one.
+        self.table = table if table is not None else {}
+        self.killers: list[list] = [[None, None] for _ in range(max_depth + 1)]
+        self.history: dict[tuple, int] = {}
+
+    def check_time(self):
+        if time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+
+    def order_moves(self, moves, ply: int, tt_move) -> list:
+        board = self.position.board
+        killers = self.killers[ply] if ply < len(self.killers) else (None, None)
+        scored = []
+        for move in moves:
+            start, end = move & 0x3F, (move >> 6) & 0x3F
+            piece = board[start >> 3][start & 7]
+            if move == tt_move:
+                score = 10000000
+            elif move & FLAG_CAPTURE:
+                score = 1000000 + VICTIM_VALUES[board[end >> 3][end & 7].lower()] * 10 - PIECE_VALUES[piece.lower()] // 100 + PROMOTION_VALUES[(move >> 12) & 7]
+            elif move & 0x7000:
+                score = 950000 + PROMOTION_VALUES[(move >> 12) & 7] # Queen first, the underpromotions still before the quiet moves
+            elif move == killers[0]:
+                score = 900000
+            elif move == killers[1]:
+                score = 800000
+            else:
+                score = self.history.get((piece, end), 0)
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def quiescence(self, alpha: int, beta: int) -> int:
+        """
+        Keeps searching captures only, so we never stop right in the middle of an exchange
+        (and think we won a queen when it's about to be taken back).
+        En passant counts (the generator flags it as a capture). Capturing underpromotions don't, a Queen is always worth more there.
+        """
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            self.check_time()
+
+        stand_pat = evaluate(self.position)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        board = self.position.board
+        captures = []
+        for move in arbiter.generate_move_list(self.position):
+            promotion = (move >> 12) & 7
+            if move & FLAG_CAPTURE and promotion in (0, 4):
+                start, end = move & 0x3F, (move >> 6) & 0x3F
+                captures.append((VICTIM_VALUES[board[end >> 3][end & 7].lower()] * 10 - PIECE_VALUES[board[start >> 3][start & 7].lower()] // 100
+                                 + PROMOTION_VALUES[promotion], move))
+        captures.sort(key=lambda item: item[0], reverse=True)
+
+        for _, move in captures:
+            self.position.make_packed_move(move)
+            score = -self.quiescence(-beta, -alpha)
+            self.position.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            self.check_time()
+
+        position = self.position
+        if ply > 0 and (position.half_timer >= 100 or position.hash_counts[position.hash] > 1):
+            return 0 # Fifty move rule, or a repetition. Repeating once is enough: whatever worked the first time works again.
+
+        original_alpha = alpha
+        entry = self.table.get(position.hash)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, flag, tt_move = entry
+            entry_score = score_from_table(entry_score, ply)
+            if ply > 0 and entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER and entry_score >= beta:
+                    return entry_score
+                if flag == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        if depth <= 0:
+            return self.quiescence(alpha, beta)
+
+        moves = arbiter.generate_move_list(position)
+        if not moves:
+            if arbiter.is_in_check(position):
+                return -MATE_SCORE + ply # Sooner mates score higher
+            return 0 # Stalemate
+
+        board = position.board
+        best_score = -INFINITY
+        best_move = None
+        for move in self.order_moves(moves, ply, tt_move):
+            start = move & 0x3F
+            piece = board[start >> 3][start & 7]
+            is_quiet = not move & (FLAG_CAPTURE | 0x7000) # Promotions already get ordered early, killers are for the rest
+            position.make_packed_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if is_quiet and ply < len(self.killers):
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    key = (piece, (move >> 6) & 0x3F)
+                    self.history[key] = self.history.get(key, 0) + depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if len(self.table) >= TT_MAX_ENTRIES:
+            self.table.clear() # Crude, but it keeps memory flat. Iterative deepening refills the important bits fast
+        self.table[position.hash] = (depth, score_to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def search_root(self, depth: int, moves: list, store_root: bool = True) -> tuple:
+        """
+        One iteration at the root. Returns (best move, score).
+        store_root=False when only some of the root moves are searched (core.parallel), since that best move isn't THE best move.
+        """
+        alpha, beta = -INFINITY, INFINITY
+        best_move, best_score = None, -INFINITY
+        for move in moves:
+            self.position.make_packed_move(move)
+            score = -self.negamax(depth - 1, -beta, -alpha, 1)
+            self.position.unmake_move()
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+        if store_root:
+            self.table[self.position.hash] = (depth, best_score, EXACT, best_move)
+        return best_move, best_score
+
+    def iterate(self, moves: list, store_root: bool = True) -> list[tuple]:
+        """
+        Iterative deepening over the given root moves: depth 1, 2, 3... until max_depth or the clock runs out.
+
+        Logic:
+            Every finished iteration gives a complete answer, so when time is up we just play
+            the best move of the last finished one. The earlier iterations aren't wasted either:
+            they fill the transposition table and killers, which makes the next one's move ordering much better.
+
+        Returns:
+            One (depth, best move, score) per FINISHED iteration.
+        """
+        self.deadline = time.perf_counter() + self.time_limit
+        root_stack = len(self.position.undo_stack)
+        iterations = []
+        best_move = moves[0] if moves else None
+
+        for depth in range(1, self.max_depth + 1):
+            ordered = self.order_moves(moves, 0, best_move)
+            try:
+                best_move, score = self.search_root(depth, ordered, store_root)
+            except SearchTimeout:
+                # The timeout came from deep inside the tree. Take back every move still on the board.
+                while len(self.position.undo_stack) > root_stack:
+                    self.position.unmake_move()
+                break
+            iterations.append((depth, best_move, score))
+            if abs(score) >= MATE_SCORE - self.max_depth:
+                break # Found a forced mate, thinking longer won't find a better one
+        return iterations
+
+    def search(self) -> dict:
+        """
+        Searches every legal move (see iterate).
+
+        Returns:
+            A dictionary: 'move' (like 'e2e4', None if there are no legal moves), 'score' (centipawns, side to move),
+            'depth' (deepest finished iteration), 'nodes', 'seconds' and 'nps'.
+        """
+        start = time.perf_counter()
+        self.nodes = 0
+
+        moves = arbiter.generate_move_list(self.position)
+        best_move = moves[0] if moves else None
+        best_score = 0
+        finished_depth = 0
+
+        if len(moves) > 1:
+            iterations = self.iterate(moves)
+            if iterations:
+                finished_depth, best_move, best_score = iterations[-1]
+
+        seconds = time.perf_counter() - start
+        return {
+            "move": decode_move(best_move) if best_move is not None else None,
+            "score": best_score,
+            "depth": finished_depth,
+            "nodes": self.nodes,
+            "seconds": seconds,
+            "nps": int(self.nodes / seconds) if seconds > 0 else 0,
+        }
+
+
+def search_position(position: Position, max_depth: int = 4, time_limit: float = 1.0) -> dict:
+    """
+    Finds a move for the side to move. The position is left exactly as it was.
+
+    Args:
+        position: The Position to search.
+        max_depth: Stop after this many plies (plus quiescence).
+        time_limit: Hard limit in seconds. The search returns the best move found so far when it runs out.
+    Returns:
+        See Searcher.search.
+    """
+    return Searcher(position, max_depth, time_limit).search()
+
+
+def get_best_move(fen: str, difficulty: int = 1) -> str | None:
+    """
+    Same contract as ai.get_best_move, but with the built-in engine.
+
+    Args:
+        fen: The current board state string.
+        difficulty: 1 (Monkey) to 4 (Grandmaster). Picks the depth and time limits.
+    Returns:
+        A move string like 'e2e4', or None if there are no legal moves.
+    """
+    position = Position.from_fen(fen)
+    result = search_position(position, DEPTH_LIMITS.get(difficulty, 2), TIME_LIMITS.get(difficulty, 1.0))
+    LAST_RESULT.clear()
+    LAST_RESULT.update(result)
+    return result["move"]
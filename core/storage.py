@@ -1,55 +1,342 @@
-import pickle
 import os
+import mmap
+import struct
+import time
+import zlib
+
+from core import packing
+from core.position import Position
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 DATA_DIR = os.path.join(BASE_DIR, "data")
 HISTORY_FILE = os.path.join(DATA_DIR, "history.dat")
 
+# The history file is an append-only log.
+# Header: magic (8 bytes), version (u16), committed size (u64). The committed size is where the last COMPLETE record ends.
+# Record: payload length (u16), crc32 of payload (u32), payload, payload length again (u16).
+# The length at the end is what lets undo walk backwards without reading the whole file.
+# Payload: "<move>\t<fen>" in utf-8. The move is empty for the starting position.
+LOG_MAGIC = b"TCHSLOG\x00"
+LOG_VERSION = 1
+HEADER_FORMAT = ">8sHQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_HEAD = struct.Struct(">HI")
+RECORD_TAIL = struct.Struct(">H")
+RECORD_OVERHEAD = RECORD_HEAD.size + RECORD_TAIL.size
+
+
+def encode_record(fen: str, move: str | None = None) -> bytes:
+    payload = f"{move or ''}\t{fen}".encode("utf-8")
+    return RECORD_HEAD.pack(len(payload), zlib.crc32(payload)) + payload + RECORD_TAIL.pack(len(payload))
+
+
+def decode_payload(payload: bytes) -> tuple[str | None, str]:
+    move, fen = payload.decode("utf-8").split("\t", 1)
+    return (move or None), fen
+
+
+def write_header(f, committed: int):
+    f.seek(0)
+    f.write(struct.pack(HEADER_FORMAT, LOG_MAGIC, LOG_VERSION, committed))
+
+
+def read_header(f) -> int | None:
+    """
+    Returns the committed size, or None if this isn't a history log (missing, empty, or an old pickle file).
+    """
+    f.seek(0)
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        return None
+    magic, version, committed = struct.unpack(HEADER_FORMAT, raw)
+    if magic != LOG_MAGIC or version != LOG_VERSION:
+        return None
+    return committed
+
+
+def read_record_ending_at(f, end: int) -> tuple[int, bytes]:
+    """
+    Reads the record that ends at byte 'end'.
+
+    Returns:
+        (start offset of that record, its payload)
+    """
+    f.seek(end - RECORD_TAIL.size)
+    (length,) = RECORD_TAIL.unpack(f.read(RECORD_TAIL.size))
+    start = end - RECORD_OVERHEAD - length
+    f.seek(start + RECORD_HEAD.size)
+    return start, f.read(length)
+
+
 def init_history(initial_fen: str):
     """
     Resets the history file and saves the starting position.
     """
-    # Overwrite file with initial state list
+    record = encode_record(initial_fen)
+    os.makedirs(DATA_DIR, exist_ok=True) # data/ only holds runtime files, a fresh clone doesn't have it
     with open(HISTORY_FILE, "wb") as f:
-        pickle.dump([initial_fen], f)
+        write_header(f, HEADER_SIZE + len(record))
+        f.write(record)
 
-def save_snapshot(fen: str):
+
+def save_snapshot(fen: str, move: str | None = None):
     """
     Appends the new FEN state to the history.
+
+    Logic:
+        Write the record after the committed end, then move the committed size in the header.
+        If we crash in between, the header still points at the old end and the half-written record just gets ignored.
+        Two small writes, no matter how long the game is.
+
+    Args:
+        fen: The position after the move.
+        move: The move that got us there (e.g. 'e2e4'). Optional, but replay tools like having it.
     """
     try:
-        with open(HISTORY_FILE, "rb") as f:
-            history = pickle.load(f)
-    except (FileNotFoundError, EOFError):
-        history = []
+        f = open(HISTORY_FILE, "r+b")
+    except FileNotFoundError:
+        init_history(fen)
+        return
 
-    history.append(fen)
+    with f:
+        committed = read_header(f)
+        if committed is None:
+            # Not a log (or an old pickled history). Start a fresh one from here.
+            f.close()
+            init_history(fen)
+            return
+
+        record = encode_record(fen, move)
+        f.seek(committed)
+        f.write(record)
+        f.truncate() # Anything after this is leftovers from a crash or an undo
+        f.flush()
+        write_header(f, committed + len(record))
 
-    # Write back
-    with open(HISTORY_FILE, "wb") as f:
-        pickle.dump(history, f)
 
 def undo_move() -> str | None:
     """
     Removes the latest state and returns the previous FEN.
     Returns None if undo is not possible (at start).
+
+    Logic:
+        The last record's length sits right before the committed end, so we can step back
+        over it and truncate. The file never gets read front to back.
     """
     try:
-        with open(HISTORY_FILE, "rb") as f:
-            history = pickle.load(f)
-    except (FileNotFoundError, EOFError):
+        f = open(HISTORY_FILE, "r+b")
+    except FileNotFoundError:
         return None
 
-    if len(history) <= 1:
-        return None # Cannot undo start state
+    with f:
+        committed = read_header(f)
+        if committed is None or committed <= HEADER_SIZE:
+            return None
 
-    # Remove the last move
-    history.pop()
+        last_start, _ = read_record_ending_at(f, committed)
+        if last_start <= HEADER_SIZE:
+            return None # Cannot undo start state
 
-    # Save new history
-    with open(HISTORY_FILE, "wb") as f:
-        pickle.dump(history, f)
+        # Remove the last move
+        write_header(f, last_start)
+        f.truncate(last_start)
+
+        # Return the new 'current' state (the record that now sits at the end)
+        _, payload = read_record_ending_at(f, last_start)
+        return decode_payload(payload)[1]
+
+
+def read_history() -> list[tuple[str | None, str]]:
+    """
+    Reads the whole log front to back, for tools that want the full game (export, replay).
+
+    Returns:
+        A list of (move, fen) pairs. The first move is None (the starting position).
+    """
+    try:
+        f = open(HISTORY_FILE, "rb")
+    except FileNotFoundError:
+        return []
+
+    history: list[tuple[str | None, str]] = []
+    with f:
+        committed = read_header(f)
+        if committed is None:
+            return []
+        offset = HEADER_SIZE
+        f.seek(offset)
+        while offset < committed:
+            head = f.read(RECORD_HEAD.size)
+            if len(head) < RECORD_HEAD.size:
+                break # File is shorter than the header claims
+            length, crc = RECORD_HEAD.unpack(head)
+            payload = f.read(length)
+            f.read(RECORD_TAIL.size)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break # Everything from a bad record onwards is untrustworthy
+            history.append(decode_payload(payload))
+            offset += RECORD_OVERHEAD + length
+    return history
+
+
+def recover_history() -> int:
+    """
+    Checks every committed record's checksum and cuts the log off at the first broken one.
+    main.py runs it on every start, before offering to resume the game in the log. Costs one full read, unlike everything else here.
+
+    Returns:
+        The number of good records left.
+    """
+    history = read_history()
+    try:
+        f = open(HISTORY_FILE, "r+b")
+    except FileNotFoundError:
+        return 0
+
+    with f:
+        if read_header(f) is None:
+            return 0
+        good_end = HEADER_SIZE + sum(len(encode_record(fen, move)) for move, fen in history)
+        write_header(f, good_end)
+        f.truncate(good_end)
+    return len(history)
+
+
+def load_history_position() -> Position | None:
+    """
+    The game in the log, replayed move by move onto one Position (so it knows which positions repeated).
+
+    Returns:
+        The Position after the last logged move, or None if there's no log.
+    """
+    history = read_history()
+    if not history:
+        return None
+    position = Position.from_fen(history[0][1])
+    for move, _ in history[1:]:
+        position.make_move(move)
+    return position
+
+
+# Game archives (.tgame) for replay and analysis: jump to any ply with one seek.
+# main.py writes one into ARCHIVE_DIR for every game that ends on the board, analyze.py reads them.
+# Header: magic (8 bytes), keyframe interval K (u16), number of plies (u32).
+# Then fixed-size blocks: a packed keyframe position (core.packing) followed by the K packed moves (u16 each) played from it.
+# Ply n lives in block n // K, so reading it is one slice: unpack the keyframe, replay at most K - 1 moves.
+# The block's last move is only there so the archive has every move of the game (v1 left it out).
+ARCHIVE_MAGIC = b"TGAME\x00\x00\x02"
+ARCHIVE_DIR = os.path.join(DATA_DIR, "games")
+ARCHIVE_HEADER = struct.Struct(">8sHI")
+ARCHIVE_MOVE = struct.Struct(">H")
+DEFAULT_KEYFRAME_INTERVAL = 16
+
+
+def get_block_size(keyframe_interval: int) -> int:
+    return packing.PACKED_SIZE + ARCHIVE_MOVE.size * keyframe_interval
+
+
+def write_archive(path: str, start_fen: str, moves: list[str], keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
+    """
+    Writes a whole game as a .tgame archive.
+
+    Args:
+        path: Where to write.
+        start_fen: The starting position.
+        moves: Every move of the game in order ('e2e4' style).
+        keyframe_interval: A full position every this many plies. Bigger = smaller file, more replaying per seek.
+    """
+    position = Position.from_fen(start_fen)
+    with open(path, "wb") as f:
+        f.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, keyframe_interval, len(moves)))
+        for ply in range(len(moves) + 1):
+            if ply % keyframe_interval == 0:
+                f.write(packing.pack_position(position))
+            if ply < len(moves):
+                f.write(ARCHIVE_MOVE.pack(packing.encode_move(moves[ply])))
+                position.make_move(moves[ply])
+
+
+def export_history_archive(path: str | None = None, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> str | None:
+    """
+    Turns the live history log into a .tgame archive. main.py calls it when a game ends.
+
+    Args:
+        path: Where to write. Defaults to ARCHIVE_DIR/game-<date>-<time>.tgame.
+    Returns:
+        The archive's path, or None if the log has no moves to archive.
+    """
+    history = read_history()
+    if len(history) < 2:
+        return None
+    if path is None:
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        path = os.path.join(ARCHIVE_DIR, time.strftime("game-%Y%m%d-%H%M%S.tgame"))
+    write_archive(path, history[0][1], [str(move) for move, _ in history[1:]], keyframe_interval)
+    return path
+
+
+class GameArchive:
+    """
+    A memory-mapped .tgame file. archive.position_at(ply) reads one block, nothing else.
+    Use it as a context manager (or call close()) so the map gets released.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.keyframe_interval, self.plies = ARCHIVE_HEADER.unpack_from(self.map, 0)
+        if magic != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a tchess game archive")
+        self.block_size = get_block_size(self.keyframe_interval)
+
+    def __len__(self) -> int:
+        return self.plies + 1 # Positions, counting the start
+
+    def position_at(self, ply: int) -> Position:
+        """
+        The position after 'ply' half moves (0 = starting position).
+        """
+        if not 0 <= ply <= self.plies:
+            raise IndexError(f"ply {ply} out of range (0-{self.plies})")
+
+        block, step = divmod(ply, self.keyframe_interval)
+        start = ARCHIVE_HEADER.size + block * self.block_size
+        data = self.map[start:start + self.block_size]
+
+        position = packing.unpack_position(data)
+        for i in range(step):
+            (code,) = ARCHIVE_MOVE.unpack_from(data, packing.PACKED_SIZE + i * ARCHIVE_MOVE.size)
+            position.make_move(packing.decode_move(code))
+        return position
+
+    def fen_at(self, ply: int) -> str:
+        return self.position_at(ply).to_fen()
+
+    def move_at(self, ply: int) -> str:
+        """
+        The move played from ply 'ply' (0 = the first move of the game).
+        """
+        if not 0 <= ply < self.plies:
+            raise IndexError(f"move {ply} out of range (0-{self.plies - 1})")
+        block, step = divmod(ply, self.keyframe_interval)
+        offset = ARCHIVE_HEADER.size + block * self.block_size + packing.PACKED_SIZE + step * ARCHIVE_MOVE.size
+        return packing.decode_move(ARCHIVE_MOVE.unpack_from(self.map, offset)[0])
+
+    def get_moves(self) -> list[str]:
+        """
+        Every move of the game, in order. Skips over the keyframes, never unpacks one.
+        """
+        return [self.move_at(ply) for ply in range(self.plies)]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
 
-    # Return the new 'current' state (the one at the end of the list)
-    return history[-1]
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,173 @@
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from core import ai, pgn, search, storage
+from core.position import Position
+from core.rules import arbiter
+
+# Headless engine-vs-engine games, many at once. No UI, no history file: each game lives on one Position.
+#
+# Output directory:
+#   results.jsonl: one line per game {"game", "white", "black", "opening", "result", "termination", "plies", "seconds"}
+#   games.pgn: every game, in game order
+#   timings.csv: one row per move (game, ply, side, level, move, milliseconds, source)
+# 'source' says who answered: "book", "tablebase", "stockfish" or "native" (core.search).
+
+DEFAULT_OUTPUT_DIR = os.path.join(storage.DATA_DIR, "tournament")
+MAX_PLIES = 300 # Nobody is getting mated anymore after this. Called unfinished ('*').
+TIMING_COLUMNS = ["game", "ply", "side", "level", "move", "ms", "source"]
+# The PGN Termination tag only has a few standard values. Games that ended on the board are "normal",
+# games cut off at MAX_PLIES are "unterminated" (they really are, the result is '*'),
+# and an engine that fell over loses by "adjudication". The exact reason goes in a TerminationDetails tag.
+TERMINATIONS = {"max plies": "unterminated", "engine failure": "adjudication"}
+
+
+def get_pairings(levels: list[int], games_per_pairing: int, openings: list[str]) -> list[dict]:
+    """
+    Everyone plays everyone, every opening, colors alternating. A single level plays itself.
+
+    Returns:
+        A list of games: {'game', 'white', 'black', 'opening' (number), 'start_fen'}.
+    """
+    pairs = list(itertools.combinations(levels, 2)) if len(set(levels)) > 1 else [(levels[0], levels[0])]
+    games = []
+    for (first, second), (opening, fen) in itertools.product(pairs, enumerate(openings)):
+        for round_number in range(games_per_pairing):
+            white, black = (first, second) if round_number % 2 == 0 else (second, first)
+            games.append({"game": len(games), "white": white, "black": black, "opening": opening, "start_fen": fen})
+    return games
+
+
+def get_source() -> str:
+    """
+    Who came up with the last core.ai move, going by what it left in search.LAST_RESULT.
+    """
+    stats = search.LAST_RESULT
+    if stats.get("book"):
+        return "book"
+    if stats.get("tablebase"):
+        return "tablebase"
+    return "stockfish" if ai.has_stockfish() else "native"
+
+
+def play_game(game: dict, max_plies: int = MAX_PLIES) -> dict:
+    """
+    Plays one game to the end with core.ai on both sides. Runs in a worker process.
+
+    Logic:
+        One Position for the whole game (make_move only), so repetitions count (arbiter.get_draw_state)
+        and no FEN gets parsed on our side. core.ai still wants a FEN per move, that's its API.
+        A worker plays game after game on the same engine, so it gets told a new one started (ai.new_game).
+
+    Returns:
+        The game dict plus 'moves', 'result', 'termination', 'plies', 'seconds' and 'timings' (one per move).
+    """
+    ai.new_game()
+    position = Position.from_fen(game["start_fen"])
+    moves, timings = [], []
+    termination = "max plies"
+    start = time.perf_counter()
+
+    while len(moves) < max_plies:
+        report = arbiter.analyze_position(position)
+        if report["state"] != "PLAYING":
+            termination = report["state"].lower().replace("_", " ")
+            break
+
+        side = position.turn
+        level = game["white"] if side == 'w' else game["black"]
+        move_start = time.perf_counter()
+        move = ai.get_best_move(position.to_fen(), level)
+        elapsed = time.perf_counter() - move_start
+        if move is None or move[:4] not in arbiter.get_legal_move_names(position):
+            termination = "engine failure" # Counts as a loss for whoever failed, like a flag fall
+            break
+
+        timings.append({"game": game["game"], "ply": len(moves) + 1, "side": side, "level": level,
+                        "move": move, "ms": round(elapsed * 1000, 3), "source": get_source()})
+        moves.append(move)
+        position.make_move(move)
+
+    if termination == "checkmate" or termination == "engine failure":
+        result = "0-1" if position.turn == 'w' else "1-0" # The side to move lost
+    elif termination == "max plies":
+        result = "*"
+    else:
+        result = "1/2-1/2"
+
+    return {**game, "moves": moves, "result": result, "termination": termination,
+            "plies": len(moves), "seconds": round(time.perf_counter() - start, 3), "timings": timings}
+
+
+def _play_game_job(job: tuple[dict, int]) -> dict:
+    return play_game(*job)
+
+
+def run_tournament(levels: list[int], games_per_pairing: int = 2, workers: int = 1, output_dir: str = DEFAULT_OUTPUT_DIR,
+                   openings: list[str] | None = None, max_plies: int = MAX_PLIES, progress=None) -> dict:
+    """
+    Plays all the games on a process pool and writes everything to output_dir.
+
+    Process:
+    1. Build the pairings (get_pairings). Every game is independent, so they just go to the pool.
+    2. pool.map hands results back in game order, so the files come out in order too,
+       while the workers keep playing the games after the one being written.
+    3. Score table and games per minute at the end.
+
+    Args:
+        levels: Difficulty levels (1-4) taking part.
+        games_per_pairing: Games per pair of levels per opening, colors alternating.
+        workers: Worker processes. Each has its own engine (core.ai keeps one per process).
+        output_dir: Where results.jsonl, games.pgn and timings.csv go (overwritten).
+        openings: Start FENs. Without a book, engines are deterministic, so this is where variety comes from.
+        max_plies: Games still going after this many plies stop unfinished.
+        progress: Optional callback, called with (games done, total games).
+    Returns:
+        A summary: 'games', 'seconds', 'games_per_minute', 'scores' (level -> points), 'results' (result -> count).
+    """
+    openings = openings or [pgn.START_FEN]
+    games = get_pairings(levels, games_per_pairing, openings)
+    os.makedirs(output_dir, exist_ok=True)
+
+    scores = {level: 0.0 for level in levels}
+    results = {"1-0": 0, "0-1": 0, "1/2-1/2": 0, "*": 0}
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, "results.jsonl"), "w", encoding="utf-8") as results_file, \
+         open(os.path.join(output_dir, "games.pgn"), "w", encoding="utf-8") as pgn_file, \
+         open(os.path.join(output_dir, "timings.csv"), "w", encoding="utf-8", newline="") as timings_file, \
+         ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        timings_writer = csv.DictWriter(timings_file, fieldnames=TIMING_COLUMNS)
+        timings_writer.writeheader()
+
+        for done, played in enumerate(pool.map(_play_game_job, [(game, max_plies) for game in games]), 1):
+            record = {key: played[key] for key in ("game", "white", "black", "opening", "result", "termination", "plies", "seconds")}
+            results_file.write(json.dumps(record) + "\n")
+            pgn.write_game(pgn_file, played["moves"], {
+                "Event": "tchess tournament",
+                "Round": str(played["game"] + 1),
+                "White": f"tchess AI (level {played['white']})",
+                "Black": f"tchess AI (level {played['black']})",
+                "Result": played["result"],
+                "Termination": TERMINATIONS.get(played["termination"], "normal"),
+                "TerminationDetails": played["termination"],
+            }, played["start_fen"])
+            timings_writer.writerows(played["timings"])
+
+            results[played["result"]] += 1
+            if played["result"] == "1-0":
+                scores[played["white"]] += 1
+            elif played["result"] == "0-1":
+                scores[played["black"]] += 1
+            elif played["result"] == "1/2-1/2":
+                scores[played["white"]] += 0.5
+                scores[played["black"]] += 0.5
+            if progress:
+                progress(done, len(games))
+
+    seconds = time.perf_counter() - start
+    return {"games": len(games), "seconds": seconds, "games_per_minute": len(games) / seconds * 60 if seconds else 0.0,
+            "scores": scores, "results": results}
@@ -1,3 +1,10 @@
+# FEN row -> board row: every digit becomes that many '+'. str.translate does the whole row in one C call.
+ROW_EXPAND = str.maketrans({str(n): "+" * n for n in range(1, 9)})
+
+# 'e4' -> (4, 4) for all 64 squares, worked out once. Every move string goes through here (twice).
+NOTATIONS = {f"{chr(col + 97)}{8 - row}": (row, col) for row in range(8) for col in range(8)}
+
+
 def change_fen_to_row(data: str) -> str:
     """
     Expands a FEN row string into a full board row string.
@@ -8,13 +15,7 @@ def change_fen_to_row(data: str) -> str:
     Returns:
         str: And expanded string where space numbers are replaced with accurate amounts of + symbols.
     """
-    row = ""
-    for char in data:
-        if char.isdigit():
-            row += "+" * int(char)
-        else:
-            row += char
-    return row
+    return data.translate(ROW_EXPAND)
 
 
 def change_notations(position: str) -> tuple[int, int]:
@@ -27,4 +28,8 @@ def change_notations(position: str) -> tuple[int, int]:
     Returns:
         tuple[int, int]: (row_index, col_index).
     """
-    return (8 - int(position[1]), ord(position[0]) - 97)
+    coords = NOTATIONS.get(position)
+    if coords is None:
+        # Not a square ('e9', 'z1'). Same math as always, the caller decides what to make of it (main.py says 'Out of bounds.')
+        return (8 - int(position[1]), ord(position[0]) - 97)
+    return coords
@@ -0,0 +1,31 @@
+import argparse
+import sys
+import time
+
+from core import bitbases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the endgame tables (data/endgames).")
+    parser.add_argument("tables", nargs="*", choices=sorted(bitbases.ENDGAMES), help=f"Which ones (default: {' '.join(bitbases.DEFAULT_ENDGAMES)}).")
+    args = parser.parse_args()
+
+    def progress(phase: str, count: int):
+        sys.stderr.write(f"\r  {phase}: {count}        ")
+        sys.stderr.flush()
+
+    for name in args.tables or bitbases.DEFAULT_ENDGAMES:
+        print(f"{name.upper()}...")
+        start = time.perf_counter()
+        for written in bitbases.generate_all([name], progress):
+            table = bitbases.get_table(written)
+            positions = 2 * 64 ** (len(bitbases.ENDGAMES[written]) + 2)
+            seconds = time.perf_counter() - start
+            longest = max(table.map[len(bitbases.TABLE_MAGIC):]) - 1
+            sys.stderr.write("\n")
+            print(f"  {written}: {positions} positions in {seconds:.1f}s ({int(positions / seconds)} positions/sec), longest mate {longest} plies")
+            start = time.perf_counter()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,153 @@
-from colorama import init
+import os
+import sys
+import threading
+import types
 
-# Core
-from core.board import create_board, update_board_state, get_board_data
-from core.rules import arbiter
-from core.utils import change_notations
-from core import storage, ai
+from colorama import init
 
 # UI
 from ui import renderer, menu
 
-init() # For colorama
+# The game itself (rules, engine, storage) is imported inside main(), once the menu is done:
+# nobody needs it to pick a mode, and warm_up_engine has been loading the engine in the background meanwhile.
+
+init() # For colorama. The only call, everyone else just prints the colors.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARGS = {"renderer": "full", "profile": None, "backend": "list"}
+
+
+def parse_args():
+    # argparse alone costs about as much as drawing the menu, so a plain `python main.py` skips it
+    if len(sys.argv) == 1:
+        return types.SimpleNamespace(**DEFAULT_ARGS)
+
+    import argparse
+    parser = argparse.ArgumentParser(description="tchess: chess in your terminal.")
+    parser.add_argument("--renderer", choices=renderer.RENDER_MODES,
+                        help="'diff' only repaints what changed (smoother over SSH), 'full' redraws everything.")
+    parser.add_argument("--profile", nargs="?", const=os.path.join(BASE_DIR, "data", "profile"), metavar="PREFIX",
+                        help="Time every turn. Writes PREFIX.txt (per-turn summary) and PREFIX.prof (cProfile dump). Default PREFIX: data/profile")
+    from core.rules import base
+    parser.add_argument("--backend", choices=base.BACKENDS,
+                        help="Board representation the rules engine works on. The board on screen is the same either way.")
+    parser.set_defaults(**DEFAULT_ARGS)
+    return parser.parse_args()
+
+
+def warm_up_engine():
+    """
+    Imports the engine (and the rules and storage with it) and starts Stockfish, off the main thread.
+    By the time someone picked a mode on the menu it is all done.
+    Waits for the handshake too, so once this thread is joined the session is either up or known to be missing.
+    """
+    from core import ai
+    ai.warm_up().join()
+
 
 def main():
+    args = parse_args()
+    if not args.profile:
+        play(args)
+        return
+
+    from core import profiler
+    profiler.start()
+    try:
+        play(args)
+    finally:
+        summary_path, profile_path = profiler.stop(args.profile)
+        print(f"Profile written to {summary_path} and {profile_path}")
+        renderer.invalidate_frame()
+
+
+def play(args):
+    renderer.set_render_mode(args.renderer)
+
+    # Load the engine in the background while the menu is on screen
+    loader = threading.Thread(target=warm_up_engine, daemon=True)
+    loader.start()
+
     # Main Menu
     config = menu.show_main_menu()
-    
+
+    # Two threads importing the same (circular) modules at once is asking for trouble, so let the loader finish first.
+    # Usually it is long done, people don't pick a mode in 60ms.
+    loader.join()
+    from core.position import Position
+    from core.rules import arbiter
+    from core.utils import change_notations
+    from core import storage, ai, search, pgn, profiler
+    if config['mode'] != 'pve':
+        ai.close_session() # Warmed up for nothing, nobody is playing the engine
+    arbiter.set_backend(args.backend)
+
     # Game Init
     start_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
-    storage.init_history(start_fen)
-    current_fen = start_fen
+    # The one Position for the whole game. Moves and undos go through it, so it knows which positions repeated.
+    position = None
+    # Whatever is in the log (minus a torn last record, if we crashed mid-write) is a game somebody didn't finish.
+    if storage.recover_history() > 1:
+        position = storage.load_history_position()
+        if arbiter.analyze_position(position)["state"] != "PLAYING" or not menu.ask_resume(len(position.undo_stack)):
+            position = None
+    if position is None:
+        storage.init_history(start_fen)
+        position = Position.from_fen(start_fen)
+    current_fen = position.to_fen()
     
     # AI Setup
     ai_color = None
     if config['mode'] == 'pve':
         # If Player is White, AI is Black.
         ai_color = 'b' if config['color'] == 'w' else 'w'
+        ai.set_workers(config['workers'])
 
     # UI State
     highlights = []
     error_pos = None
     last_move_coords = [] # Tracks [start_pos, end_pos]
+    last_human_move = None # Lets the engine cash in its ponder search
     message = f"Mode: {config['mode'].upper()}"
 
     while True:
-        board = create_board(current_fen)
-        board_data = get_board_data(current_fen)
-        turn = board_data["turn"]
+        board = position.board
+        turn = position.turn
+        profiler.begin_turn(f"{position.full_timer}{turn}")
         
-        # Check Game Status
-        game_status = arbiter.get_game_state(
-            board, turn, board_data["en_passant"], board_data["castling_rights"]
-        )
+        # Check Game Status (cached by position hash, so re-asking after a typo costs nothing)
+        with profiler.timed("rules"):
+            report = arbiter.analyze_position(position)
+        game_status = report["state"]
+        if game_status in arbiter.DRAW_STATES:
+            message = f"Draw ({game_status.replace('_', ' ').lower()})."
+        if game_status != "PLAYING":
+            # Over on the board, so it goes into the archive (analyze.py takes .tgame files)
+            archive_path = storage.export_history_archive()
+            if archive_path:
+                message = f"{message} Saved to {os.path.relpath(archive_path, BASE_DIR)}".strip()
+
+        # Tiny endgames have an exact answer. Might as well tell everyone.
+        verdict = report["tablebase"]
+        if verdict and not message:
+            if verdict["result"] == "DRAW":
+                message = "Endgame table: draw with best play."
+            else:
+                winner = turn if verdict["result"] == "WIN" else ('b' if turn == 'w' else 'w')
+                message = f"Endgame table: {'White' if winner == 'w' else 'Black'} mates in {(verdict['plies'] + 1) // 2}."
 
         # Check for King Check. We will use it to mark check position in renderer.
         check_pos = None
-        if arbiter.is_king_in_check(board, turn):
-            target = 'K' if turn == 'w' else 'k'
-            for r in range(8):
-                for c in range(8):
-                    if board[r][c] == target:
-                        check_pos = (r, c)
-                        break
+        if report["in_check"]:
+            check_pos = position.king_squares[turn]
 
         # Render
-        renderer.draw_game_state(
-            board, turn, game_status, 
-            highlights, error_pos, check_pos, last_move_coords, message
-        )
+        with profiler.timed("render"):
+            renderer.draw_game_state(
+                board, turn, game_status, 
+                highlights, error_pos, check_pos, last_move_coords, message,
+                material=position.material
+            )
         
         # Reset the highlights
         highlights = []
@@ -69,23 +160,45 @@ def main():
 
         # AI TURN
         if config['mode'] == 'pve' and turn == ai_color:
-            print(f"  AI is thinking...")
             try:
-                best_move = ai.get_best_move(current_fen)
+                with profiler.timed("ai_move"):
+                    if profiler.ENABLED:
+                        # cProfile only sees this thread, so while profiling the engine thinks right here (no spinner)
+                        best_move = ai.get_best_move(current_fen, config['difficulty'])
+                    else:
+                        # The engine thinks on a background thread, we just keep the spinner going
+                        future = ai.get_best_move_async(current_fen, config['difficulty'], last_human_move)
+                        best_move = renderer.wait_with_spinner(future)
+                last_human_move = None
                 if best_move:
-                    current_fen = update_board_state(best_move, current_fen)
-                    storage.save_snapshot(current_fen)
+                    position.make_move(best_move)
+                    with profiler.timed("fen"):
+                        current_fen = position.to_fen()
+                    storage.save_snapshot(current_fen, best_move)
+
+                    # Let it think about our reply while we type
+                    ai.start_pondering(current_fen, config['difficulty'])
                     
                     # Update Last Move Highlight
                     ai_start = change_notations(best_move[0:2])
                     ai_end = change_notations(best_move[2:4])
                     last_move_coords = [ai_start, ai_end]
+
+                    stats = search.LAST_RESULT
+                    if stats.get("book"):
+                        message = "Book move."
+                    elif stats.get("tablebase"):
+                        message = "Endgame table move."
+                    elif not ai.has_stockfish():
+                        message = f"Built-in engine: depth {stats.get('depth', 0)}, {stats.get('nps', 0)} nodes/s"
                     continue
+                renderer.invalidate_frame() # No move means core.ai printed an 'Engine Error:' over our frame
             except Exception as e:
                 message = f"AI Error: {e}"
 
         # HUMAN TURN
-        user_input = renderer.get_player_input(turn)
+        with profiler.timed("input"): # Thinking time of the human. Not our fault, but good to see it apart.
+            user_input = renderer.get_player_input(turn)
 
         # Helpful commands you can use.
         # 1. Quit
@@ -94,29 +207,44 @@ def main():
         
         # 2. Undo
         if user_input.lower() in ['u', 'undo']:
+            if config['mode'] == 'pve':
+                ai.stop_pondering() # It was pondering a position that is about to disappear
             steps = 2 if config['mode'] == 'pve' else 1
             for _ in range(steps):
                 prev = storage.undo_move()
-                if prev: current_fen = prev
+                if prev and position.undo_stack:
+                    position.unmake_move()
+                    current_fen = prev
             message = "Undid move."
             last_move_coords = [] # Clear highlight on undo
+            last_human_move = None
             continue
 
-        # 3. Help
+        # 3. Save the game as PGN, so other chess programs can read it
+        if user_input.lower() in ['s', 'save']:
+            pgn_path = os.path.join(storage.DATA_DIR, "game.pgn")
+            players = {'w': "Player", 'b': "Player"}
+            if ai_color:
+                players[ai_color] = f"tchess AI (level {config['difficulty']})"
+            count = pgn.export_history(pgn_path, {"Event": "tchess game", "White": players['w'], "Black": players['b']})
+            message = f"Saved {count} moves to {pgn_path}"
+            continue
+
+        # 4. Help
         if user_input.startswith("?"):
             query = user_input[1:]
             # Help Position (?e2)
             if len(query) == 2 and query[1].isdigit():
                 try:
                     pos = change_notations(query)
-                    moves = arbiter.get_legal_moves(board, pos, board_data["en_passant"], board_data["castling_rights"])
+                    moves = [end for start, end in report["moves"] if start == pos]
                     highlights = moves
                     message = f"Found {len(moves)} legal moves."
                 except: message = "Invalid coord."
             continue
 
-        # 4. Move Execution
-        if len(user_input) != 4:
+        # 5. Move Execution
+        if len(user_input) not in (4, 5) or user_input[4:].lower() not in ("", "q", "r", "b", "n"):
             message = "Invalid format."
             continue
 
@@ -128,14 +256,15 @@ def main():
                 message = "Out of bounds."
                 continue
 
-            legal_moves = arbiter.get_legal_moves(
-                board, start_pos, board_data["en_passant"], board_data["castling_rights"]
-            )
+            legal_moves = [end for start, end in report["moves"] if start == start_pos]
 
             if end_pos in legal_moves:
-                current_fen = update_board_state(user_input, current_fen)
-                storage.save_snapshot(current_fen)
+                position.make_move(user_input)
+                with profiler.timed("fen"):
+                    current_fen = position.to_fen()
+                storage.save_snapshot(current_fen, user_input)
                 last_move_coords = [start_pos, end_pos]
+                last_human_move = user_input
             else:
                 # Auto-Assist if the player makes an illegal move
                 highlights = legal_moves
@@ -0,0 +1,58 @@
+import argparse
+
+from core import perft
+from core.rules import arbiter, base
+
+
+def print_suite(depth: int | None, generator: str):
+    print(f"{'POSITION':<18} {'DEPTH':>5} {'NODES':>10} {'EXPECTED':>10} {'SECONDS':>8} {'NPS':>9} {'BASELINE':>9}  RESULT")
+    failures = 0
+    for result in perft.run_suite(depth=depth, generator=generator):
+        status = "ok" if result["passed"] else "MISMATCH"
+        if not result["passed"]:
+            failures += 1
+        print(
+            f"{result['name']:<18} {result['depth']:>5} {result['nodes']:>10} {result['expected']:>10} "
+            f"{result['seconds']:>8.2f} {result['nps']:>9} {result['baseline_nps']:>9}  {status}"
+        )
+    print(f"\n{failures} mismatch(es).")
+    return failures
+
+
+def print_divide(fen: str, depth: int, generator: str):
+    breakdown = perft.divide(fen, depth, generator)
+    for move in sorted(breakdown):
+        print(f"{move}: {breakdown[move]}")
+    print(f"\nMoves: {len(breakdown)}")
+    print(f"Nodes: {sum(breakdown.values())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft / divide for the tchess move generator.")
+    parser.add_argument("--fen", default=perft.START_FEN, help="Root position (defaults to the start position).")
+    parser.add_argument("--depth", type=int, default=None, help="Plies to walk.")
+    parser.add_argument("--divide", action="store_true", help="Print the node count under every root move.")
+    parser.add_argument("--suite", action="store_true", help="Run the standard position suite.")
+    parser.add_argument("--generator", choices=sorted(perft.GENERATORS), default="list", help="Move generator to walk with (bitboard = the independent cross-check).")
+    parser.add_argument("--backend", choices=base.BACKENDS, default=base.BACKEND, help="core.rules backend the 'list' generator runs on.")
+    args = parser.parse_args()
+    arbiter.set_backend(args.backend)
+
+    if args.suite:
+        failures = print_suite(args.depth, args.generator)
+        raise SystemExit(1 if failures else 0)
+
+    depth = args.depth or 3
+    if args.divide:
+        print_divide(args.fen, depth, args.generator)
+        return
+
+    result = perft.run_perft(args.fen, depth, args.generator)
+    print(f"Depth:   {depth}")
+    print(f"Nodes:   {result['nodes']}")
+    print(f"Time:    {result['seconds']:.3f}s")
+    print(f"Speed:   {result['nps']} nodes/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import pytest
+
+from core import perft
+from core.rules import arbiter, base
+
+# Depth 3 is where castling, en passant and promotions all show up in the counts, and it still runs in about a second.
+MAX_DEPTH = 3
+
+
+@pytest.fixture(params=base.BACKENDS)
+def backend(request):
+    """
+    Runs a test once per core.rules backend, and puts the default back afterwards.
+    """
+    arbiter.set_backend(request.param)
+    yield request.param
+    arbiter.set_backend("list")
+
+
+@pytest.mark.parametrize("position", perft.STANDARD_POSITIONS, ids=lambda position: position["name"])
+def test_list_generator(position, backend):
+    depth = min(position["depth"], MAX_DEPTH)
+    assert perft.perft(position["fen"], depth, "list") == position["counts"][depth - 1]
+
+
+@pytest.mark.parametrize("position", perft.STANDARD_POSITIONS, ids=lambda position: position["name"])
+def test_bitboard_generator(position):
+    depth = min(position["depth"], MAX_DEPTH)
+    assert perft.perft(position["fen"], depth, "bitboard") == position["counts"][depth - 1]
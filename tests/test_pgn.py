@@ -0,0 +1,56 @@
+import io
+import random
+
+from core import perft, pgn
+from core.move import decode_move
+from core.position import Position
+from core.rules import arbiter
+
+
+def play_random_game(fen: str, rng: random.Random, max_plies: int = 120) -> list[str]:
+    position = Position.from_fen(fen)
+    moves = []
+    for _ in range(max_plies):
+        codes = arbiter.generate_move_list(position)
+        if not codes:
+            break
+        move = decode_move(rng.choice(codes))
+        moves.append(move)
+        position.make_move(move)
+    return moves
+
+
+def test_write_read_round_trip():
+    """
+    Random games from every suite position (castling, en passant, underpromotions, mates, non-standard starts)
+    go out as PGN and have to come back as the exact same moves.
+    """
+    rng = random.Random(2024)
+    games = []
+    for position in perft.STANDARD_POSITIONS:
+        for _ in range(3):
+            games.append((position["fen"], play_random_game(position["fen"], rng)))
+
+    stream = io.StringIO()
+    for index, (fen, moves) in enumerate(games):
+        pgn.write_game(stream, moves, {"Event": "round trip", "Round": str(index + 1)}, fen)
+
+    stream.seek(0)
+    imported = list(pgn.import_games(stream))
+    assert len(imported) == len(games)
+    for (fen, moves), game in zip(games, imported):
+        assert game["error"] is None
+        assert game["start_fen"] == fen
+        assert game["moves"] == moves
+
+
+def test_san_and_tags():
+    stream = io.StringIO()
+    pgn.write_game(stream, ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "e1g1"], {"White": "A \"quoted\" name"})
+    text = stream.getvalue()
+    assert "1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. O-O *" in text
+    assert '[Black "?"]' in text
+
+    game = next(pgn.read_games(io.StringIO(text)))
+    assert game["headers"]["White"] == 'A "quoted" name'
+    assert game["moves"] == ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6", "O-O"]
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from core import perft
+from core.move import decode_move
+from core.position import Position
+from core.rules import arbiter
+
+
+def get_state(position: Position) -> tuple:
+    """
+    Everything make_move touches, copied, so a later unmake_move can be held against it.
+    """
+    return (
+        [row[:] for row in position.board],
+        position.turn, position.castling_rights, position.en_passant, position.half_timer, position.full_timer,
+        position.hash, dict(position.hash_counts),
+        dict(position.king_squares), {color: set(squares) for color, squares in position.piece_squares.items()},
+        dict(position.material), list(position.bitboards),
+    )
+
+
+@pytest.mark.parametrize("fen", [position["fen"] for position in perft.STANDARD_POSITIONS])
+def test_every_root_move_unmakes(fen):
+    position = Position.from_fen(fen)
+    before = get_state(position)
+    for code in arbiter.generate_move_list(position):
+        position.make_packed_move(code)
+        # The incremental trackers have to agree with a Position built from scratch
+        fresh = Position.from_fen(position.to_fen())
+        assert position.hash == fresh.hash, decode_move(code)
+        assert position.bitboards == fresh.bitboards, decode_move(code)
+        assert position.material == fresh.material, decode_move(code)
+        position.unmake_move()
+        assert get_state(position) == before, decode_move(code)
+
+
+@pytest.mark.parametrize("fen", [position["fen"] for position in perft.STANDARD_POSITIONS])
+def test_random_game_unwinds(fen):
+    """
+    Plays a random game forward, then takes it all back, checking every position on the way down.
+    """
+    rng = random.Random(fen)
+    position = Position.from_fen(fen)
+    states = []
+    for _ in range(60):
+        moves = arbiter.generate_move_list(position)
+        if not moves:
+            break
+        states.append(get_state(position))
+        position.make_move(decode_move(rng.choice(moves)))
+
+    while states:
+        position.unmake_move()
+        assert get_state(position) == states.pop()
+    assert not position.undo_stack
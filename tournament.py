@@ -0,0 +1,35 @@
+import argparse
+import sys
+
+from core import tournament
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless engine-vs-engine games on a process pool.")
+    parser.add_argument("levels", type=int, nargs="+", choices=[1, 2, 3, 4], help="Difficulty levels taking part (one level plays itself).")
+    parser.add_argument("--games", type=int, default=2, help="Games per pairing per opening, colors alternating.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (games played at once).")
+    parser.add_argument("--openings", default=None, help="A text file with one start FEN per line (default: the normal start).")
+    parser.add_argument("--max-plies", type=int, default=tournament.MAX_PLIES, help="Unfinished ('*') after this many plies.")
+    parser.add_argument("-o", "--output", default=tournament.DEFAULT_OUTPUT_DIR, help="Output directory.")
+    args = parser.parse_args()
+
+    openings = None
+    if args.openings:
+        with open(args.openings, "r", encoding="utf-8") as f:
+            openings = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    def progress(done: int, total: int):
+        sys.stderr.write(f"\r{done}/{total} games")
+        sys.stderr.flush()
+
+    summary = tournament.run_tournament(args.levels, args.games, args.workers, args.output, openings, args.max_plies, progress)
+    sys.stderr.write("\n")
+    print(f"{summary['games']} games in {summary['seconds']:.1f}s ({summary['games_per_minute']:.1f} games/minute) -> {args.output}")
+    print("Results: " + ", ".join(f"{result}: {count}" for result, count in summary["results"].items()))
+    for level, points in sorted(summary["scores"].items()):
+        print(f"  Level {level}: {points:g} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import os
-from colorama import Fore, Style, init
+from colorama import Fore, Style
 
-init()
+from ui.renderer import clear_screen
 
 LOGO = r"""
 ████████  ██████ ██   ██ ███████ ███████ ███████ 
@@ -11,13 +11,30 @@ LOGO = r"""
    ██     ██████ ██   ██ ███████ ███████ ███████ 
 """
 
-def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+def ask_workers() -> int:
+    """
+    How many CPU cores the AI gets. Anything weird (or just Enter) means 1.
+    """
+    cores = os.cpu_count() or 1
+    if cores <= 1:
+        return 1 # Nothing to choose from
+    choice = input(f"\n    AI Cores [1-{cores}] (Enter = 1) ❯ ").strip()
+    if choice.isdigit():
+        return min(max(int(choice), 1), cores)
+    return 1
+
+
+def ask_resume(plies: int) -> bool:
+    """
+    The history log has an unfinished game in it (a crash, or somebody quit). Pick it up again? Just Enter means no.
+    """
+    choice = input(f"\n    Resume the unfinished game ({plies} half moves in)? [y/N] ❯ ").strip().lower()
+    return choice in ('y', 'yes')
 
 
 def show_main_menu():
     """
-    Returns a dict: {'mode': 'pvp'|'pve', 'difficulty': 1-4, 'color': 'w'|'b'}
+    Returns a dict: {'mode': 'pvp'|'pve', 'difficulty': 1-4, 'color': 'w'|'b', 'workers': 1+}
     """
     while True:
         clear_screen()
@@ -36,10 +53,10 @@ def show_main_menu():
         choice = input("\n    Select Mode ❯ ").strip().lower()
         
         # Default config
-        config = {'mode': 'pve', 'difficulty': 1, 'color': 'w'}
+        config = {'mode': 'pve', 'difficulty': 1, 'color': 'w', 'workers': 1}
 
         if choice == '1':
-            return {'mode': 'pvp', 'difficulty': 0, 'color': 'w'}
+            return {'mode': 'pvp', 'difficulty': 0, 'color': 'w', 'workers': 1}
         
         elif choice == 'q':
             exit()
@@ -56,4 +73,5 @@ def show_main_menu():
             c_choice = input("\n    Select Color ❯ ").strip().lower()
             
             config['color'] = 'b' if c_choice == 'b' else 'w'
+            config['workers'] = ask_workers()
             return config
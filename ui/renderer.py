@@ -1,5 +1,6 @@
-import os
 import shutil
+import sys
+import time
 from colorama import Fore, Back, Style
 
 # COLOR CONFIGURATION
@@ -28,20 +29,64 @@ LETTERS = {
     '+': ' '
 }
 
+# RENDER MODES
+# full: clear the screen and print everything, every frame. Works everywhere.
+# diff: remember the last frame and only repaint the squares and stats lines that changed, using ANSI cursor moves.
+#       One write per frame, no 'clear' process. Much nicer over SSH.
+RENDER_MODES = ("full", "diff")
+render_mode = "full"
+
+# Visible widths of the layout (the color codes don't take up space on screen)
+BOARD_WIDTH = 61 # 5 for the rank label + 8 tiles * 7
+STATS_GAP = 4
+TILE_WIDTH = 7
+TILE_LEFT = 5
+
+# (piece, background, icons?) -> the tile's 3 lines, color codes included
+TILE_CACHE: dict[tuple[str, str, bool], tuple[str, str, str]] = {}
+
+# What the diff renderer thinks is on screen right now. None = nothing we can trust, repaint everything.
+_last_frame: dict | None = None
+
+CLEAR = "\x1b[H\x1b[2J" # Home + clear, the ANSI way. No 'clear' process (colorama translates it on old Windows consoles).
+
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    sys.stdout.write(CLEAR)
+    sys.stdout.flush()
+
+
+def set_render_mode(mode: str):
+    """
+    Switches between 'full' and 'diff' (see RENDER_MODES).
+    """
+    global render_mode, _last_frame
+    if mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode '{mode}'")
+    render_mode = mode
+    _last_frame = None
+
 
+def invalidate_frame():
+    """
+    Call this after printing something the diff renderer doesn't know about. The next frame repaints everything.
+    """
+    global _last_frame
+    _last_frame = None
 
-def get_graveyard(board):
+
+def get_graveyard(board, material=None):
     initial = {
         'P': 8, 'R': 2, 'N': 2, 'B': 2, 'Q': 1, 'K': 1,
         'p': 8, 'r': 2, 'n': 2, 'b': 2, 'q': 1, 'k': 1
     }
-    current = {}
-    for row in board:
-        for char in row:
-            if char != "+":
-                current[char] = current.get(char, 0) + 1
+    # Position.material already has the counts. Only scan the board if nobody gave them to us.
+    current = material
+    if current is None:
+        current = {}
+        for row in board:
+            for char in row:
+                if char != "+":
+                    current[char] = current.get(char, 0) + 1
     
     graveyard = {'w': [], 'b': []}
     symbols = ICONS if USE_ICONS else LETTERS
@@ -55,69 +100,79 @@ def get_graveyard(board):
     return graveyard
 
 
+def get_square_color(r, c, highlights, error_pos, check_pos, last_move):
+    # Priority Color Logic
+    if check_pos == (r, c):
+        return COLOR_HIGHLIGHT_ERROR
+    if error_pos == (r, c):
+        return COLOR_HIGHLIGHT_ERROR
+    if (r, c) in highlights:
+        return COLOR_HIGHLIGHT_MOVE
+    if (r, c) in last_move:
+        return COLOR_HIGHLIGHT_LAST_MOVE
+    return COLOR_LIGHT_SQ if (r + c) % 2 == 0 else COLOR_DARK_SQ
+
+
+def get_tile(piece_char, bg):
+    """
+    The 3 lines of one square (7 chars wide each). There are only 13 pieces and a handful of backgrounds,
+    so every combination gets built once and then comes out of TILE_CACHE.
+    """
+    key = (piece_char, bg, USE_ICONS)
+    tile = TILE_CACHE.get(key)
+    if tile is None:
+        symbols = ICONS if USE_ICONS else LETTERS
+
+        # Foreground Color
+        if piece_char == "+": fg = ""
+        elif piece_char.isupper(): fg = COLOR_WHITE_P
+        else: fg = COLOR_BLACK_P
+
+        symbol = symbols.get(piece_char, ' ')
+        padding = "   "
+        empty = f"{bg}{padding} {padding}{Style.RESET_ALL}"
+        tile = (empty, f"{bg}{padding}{fg}{symbol}{padding}{Style.RESET_ALL}", empty)
+        TILE_CACHE[key] = tile
+    return tile
+
+
+def get_board_header():
+    gap = " " * 6
+    return "        " + gap.join("ABCDEFGH") + "   "
+
+
 def generate_board_lines(board, highlights=None, error_pos=None, check_pos=None, last_move=None):
     if highlights is None: highlights = []
     if last_move is None: last_move = []
     
     lines = []
-    symbols = ICONS if USE_ICONS else LETTERS
     
     # Header (File Labels)
-    gap = " " * 6
-    header = "        " + gap.join("ABCDEFGH") + "   "
+    header = get_board_header()
     lines.append(header)
     
     for r in range(8):
         # 3 lines per Rank
-        line_top = f"     "   # Padding
-        line_mid = f"  {8-r}  " # Rank Label
-        line_bot = f"     "   # Padding
+        line_top = [f"     "]   # Padding
+        line_mid = [f"  {8-r}  "] # Rank Label
+        line_bot = [f"     "]   # Padding
         
         for c in range(8):
-            piece_char = board[r][c]
-            
-            # Priority Color Logic
-            if check_pos == (r, c): 
-                bg = COLOR_HIGHLIGHT_ERROR
-            elif error_pos == (r, c): 
-                bg = COLOR_HIGHLIGHT_ERROR
-            elif (r, c) in highlights: 
-                bg = COLOR_HIGHLIGHT_MOVE
-            elif (r, c) in last_move:
-                bg = COLOR_HIGHLIGHT_LAST_MOVE
-            else:
-                bg = COLOR_LIGHT_SQ if (r + c) % 2 == 0 else COLOR_DARK_SQ
-            
-            # Foreground Color
-            if piece_char == "+": fg = ""
-            elif piece_char.isupper(): fg = COLOR_WHITE_P
-            else: fg = COLOR_BLACK_P
+            bg = get_square_color(r, c, highlights, error_pos, check_pos, last_move)
+            top, mid, bot = get_tile(board[r][c], bg)
+            line_top.append(top)
+            line_mid.append(mid)
+            line_bot.append(bot)
             
-            symbol = symbols.get(piece_char, ' ')
-            
-            # Construct Tile (7 chars wide)
-            padding = "   "
-            
-            # 1. Top
-            line_top += f"{bg}{padding} {padding}{Style.RESET_ALL}"
-            # 2. Middle
-            line_mid += f"{bg}{padding}{fg}{symbol}{padding}{Style.RESET_ALL}"
-            # 3. Bottom
-            line_bot += f"{bg}{padding} {padding}{Style.RESET_ALL}"
-            
-        lines.append(line_top)
-        lines.append(line_mid)
-        lines.append(line_bot)
+        lines.append("".join(line_top))
+        lines.append("".join(line_mid))
+        lines.append("".join(line_bot))
         
     lines.append(header)
     return lines
 
 
-def draw_game_state(board, turn, game_status="PLAYING", highlights=None, error_pos=None, check_pos=None, last_move=None, message=""):
-    clear_screen()
-    board_lines = generate_board_lines(board, highlights, error_pos, check_pos, last_move)
-    graveyard = get_graveyard(board)
-    
+def get_stats_lines(turn, game_status, graveyard, message):
     # Stats Panel
     stats = []
     stats.append(f"{Style.BRIGHT}:: TCHESS ENGINE ::{Style.RESET_ALL}")
@@ -142,18 +197,35 @@ def draw_game_state(board, turn, game_status="PLAYING", highlights=None, error_p
             else:
                 line += w + " "
         stats.append(line)
+    return stats
 
-    # Stitching
-    max_lines = max(len(board_lines), len(stats))
-    
+
+def get_layout(content_lines):
     term_width = shutil.get_terminal_size().columns
     term_height = shutil.get_terminal_size().lines
     
     # Visual width estimation (Board ~65 chars + Gap 4 + Stats ~30)
     total_content_width = 99
     
-    padding_left = " " * max(0, (term_width - total_content_width) // 2)
-    padding_top = max(0, (term_height - max_lines - 3) // 2)
+    padding_left = max(0, (term_width - total_content_width) // 2)
+    padding_top = max(0, (term_height - content_lines - 3) // 2)
+    return padding_left, padding_top
+
+
+def draw_game_state(board, turn, game_status="PLAYING", highlights=None, error_pos=None, check_pos=None, last_move=None, message="", material=None):
+    if render_mode == "diff":
+        draw_game_state_diff(board, turn, game_status, highlights, error_pos, check_pos, last_move, message, material)
+        return
+
+    clear_screen()
+    board_lines = generate_board_lines(board, highlights, error_pos, check_pos, last_move)
+    graveyard = get_graveyard(board, material)
+    stats = get_stats_lines(turn, game_status, graveyard, message)
+
+    # Stitching
+    max_lines = max(len(board_lines), len(stats))
+    padding_left, padding_top = get_layout(max_lines)
+    padding_left = " " * padding_left
     
     print("\n" * padding_top)
     
@@ -161,16 +233,89 @@ def draw_game_state(board, turn, game_status="PLAYING", highlights=None, error_p
         if i < len(board_lines):
             b_line = board_lines[i]
         else:
-            b_line = " " * 65 # Pad if board is shorter than stats (unlikely)
+            b_line = " " * (BOARD_WIDTH + STATS_GAP) # Pad if board is shorter than stats (unlikely)
             
         s_line = stats[i] if i < len(stats) else ""
         
-        gap = "    "
+        gap = " " * STATS_GAP
         print(f"{padding_left}{b_line}{gap}{s_line}")
 
     print("\n")
 
 
+def move_cursor(row, col):
+    """
+    ANSI 'go to row, col' (1-based, like the terminal counts).
+    """
+    return f"\x1b[{row};{col}H"
+
+
+def draw_game_state_diff(board, turn, game_status="PLAYING", highlights=None, error_pos=None, check_pos=None, last_move=None, message="", material=None):
+    """
+    Same picture as draw_game_state, but only the parts that changed get sent to the terminal.
+
+    Logic:
+        Every square is a (piece, background) pair, every stats line is a string.
+        Compare them with the last frame, and for each difference jump there with the cursor and overwrite it.
+        A normal move changes 2-4 squares and a couple of stats lines, instead of ~30 full lines.
+        If the terminal got resized (or it's the first frame), we clear once and paint everything.
+        Everything goes out in ONE write.
+    """
+    global _last_frame
+    if highlights is None: highlights = []
+    if last_move is None: last_move = []
+
+    squares = [[(board[r][c], get_square_color(r, c, highlights, error_pos, check_pos, last_move)) for c in range(8)] for r in range(8)]
+    stats = get_stats_lines(turn, game_status, get_graveyard(board, material), message)
+    max_lines = max(26, len(stats)) # Header + 8 ranks * 3 + header
+    padding_left, padding_top = get_layout(max_lines)
+    layout = (shutil.get_terminal_size(), padding_left, padding_top)
+
+    # Same spot the full renderer ends up at: print("\n" * padding_top) moves down padding_top + 1 lines
+    top = padding_top + 2
+    left = padding_left + 1
+    stats_left = left + BOARD_WIDTH + STATS_GAP
+    out = []
+
+    previous = _last_frame
+    # If the prompt sits on the last row, pressing Enter scrolls the screen and every remembered position is off by one
+    fits = top + max_lines + 2 <= layout[0].lines
+    if previous is None or previous["layout"] != layout or not fits:
+        out.append(CLEAR)
+        header = get_board_header()
+        out.append(move_cursor(top, left) + header)
+        out.append(move_cursor(top + 25, left) + header)
+        previous = {"squares": [[None] * 8 for _ in range(8)], "stats": []}
+
+    for r in range(8):
+        old_row = previous["squares"][r]
+        for c in range(8):
+            if squares[r][c] == old_row[c]:
+                continue
+            tile = get_tile(*squares[r][c])
+            row = top + 1 + r * 3
+            col = left + TILE_LEFT + c * TILE_WIDTH
+            if old_row[c] is None and c == 0:
+                # Fresh paint: the rank label goes in front of the first tile
+                out.append(move_cursor(row + 1, left) + f"  {8-r}  ")
+            for k in range(3):
+                out.append(move_cursor(row + k, col) + tile[k])
+
+    old_stats = previous["stats"]
+    for i in range(max(len(stats), len(old_stats))):
+        line = stats[i] if i < len(stats) else ""
+        if i < len(old_stats) and old_stats[i] == line:
+            continue
+        out.append(move_cursor(top + i, stats_left) + line + "\x1b[K") # Overwrite, then wipe whatever was longer
+
+    # Park the cursor under the board and wipe the old prompt, so input() starts on a clean line
+    out.append(move_cursor(top + max_lines + 1, 1) + "\x1b[J")
+    sys.stdout.write("".join(out))
+    sys.stdout.flush()
+
+    _last_frame = {"layout": layout, "squares": squares, "stats": stats}
+
+
 def get_player_input(turn_color):
     prompt_char = "❯"
     color = Fore.GREEN if turn_color == 'w' else Fore.BLUE
@@ -178,3 +323,21 @@ def get_player_input(turn_color):
         return input(f" {color}[{'WHITE' if turn_color == 'w' else 'BLACK'}] {prompt_char}{Style.RESET_ALL} ").strip()
     except KeyboardInterrupt:
         return "q"
+
+
+def wait_with_spinner(future, label="AI is thinking"):
+    """
+    Keeps the terminal alive while a background job (the engine) works. Returns the job's result.
+    """
+    frames = "|/-\\"
+    i = 0
+    while not future.done():
+        sys.stdout.write(f"\r  {label}... {frames[i % len(frames)]}")
+        sys.stdout.flush()
+        i += 1
+        time.sleep(0.1)
+    sys.stdout.write("\r" + " " * (len(label) + 10) + "\r")
+    sys.stdout.flush()
+    if i:
+        invalidate_frame() # We wrote where the diff renderer wasn't looking
+    return future.result()